@@ -2,12 +2,24 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 from recommender import recommend_engineers_memory_cf
 import job_manager
-from gemini_mapping import get_matching_services 
+from gemini_mapping import get_matching_services, get_matching_services_batch, get_mapping_metrics
+from core.db import begin_scope, end_scope
 
 app = Flask(__name__)
 CORS(app)
 
 
+# One pooled connection and one transaction per request, shared by every job_manager call
+@app.before_request
+def open_db_scope():
+    begin_scope(job_manager.DB_PATH)
+
+
+@app.teardown_request
+def close_db_scope(error=None):
+    end_scope(error)
+
+
 @app.route('/jobs', methods=['GET'])
 def get_jobs():
     jobs_df = job_manager.fetch_all_jobs()
@@ -41,18 +53,13 @@ def assign_engineer_to_task():
     if isinstance(recommendations, str):
         return jsonify({"error": recommendations}), 400
 
-    assigned_engineer = None
-    for eng_id, score in recommendations:
-        if job_manager.check_availability(eng_id):
-            assigned_engineer = eng_id
-            break
+    # Claim atomically, falling through the ranked list if a concurrent request wins an engineer
+    assigned_engineer = job_manager.claim_engineer_for_task(
+        task_id, [eng_id for eng_id, score in recommendations])
 
     if not assigned_engineer:
         return jsonify({"error": "No available engineer found"}), 409
 
-    job_manager.update_task_assignment(task_id, assigned_engineer)
-    job_manager.mark_engineer_unavailable(assigned_engineer)
-
     return jsonify({
         "message": f"Engineer {assigned_engineer} assigned to task {task_id}",
         "recommendation_reason": reason
@@ -64,12 +71,13 @@ def complete_task_endpoint():
     data = request.get_json()
     task_id = data.get('task_id')
     outcome_score = data.get('outcome_score')
+    job_id = data.get('job_id')  # Optional: the same task can be pending on several jobs
 
     if not task_id or outcome_score is None:
         return jsonify({"error": "Missing task_id or outcome_score"}), 400
 
     try:
-        job_manager.complete_task(task_id, outcome_score)
+        job_manager.complete_task(task_id, outcome_score, job_id)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -86,6 +94,21 @@ def select_serv():
     services = get_matching_services(user_input)
     return jsonify({"services": services})
 
+@app.route('/mapping_services/batch', methods = ['POST'])
+def select_serv_batch():
+    data = request.get_json()
+    descriptions = data.get('descriptions')
+
+    if not descriptions or not isinstance(descriptions, list):
+        return jsonify({"error": "Missing descriptions list"}), 400
+
+    services = get_matching_services_batch([str(d) for d in descriptions])
+    return jsonify({"results": [{"description": d, "services": s} for d, s in zip(descriptions, services)]})
+
+@app.route('/mapping_services/metrics', methods = ['GET'])
+def mapping_metrics():
+    return jsonify(get_mapping_metrics())
+
 
 if __name__ == "__main__":
     app.run(debug=True)
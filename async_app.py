@@ -0,0 +1,196 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from recommender import recommend_engineers_memory_cf
+import job_manager
+from gemini_mapping import get_matching_services, get_matching_services_batch, get_mapping_metrics, BATCH_WAIT_SECONDS
+from core.db import connection_scope
+
+# asyncio serving mode for the same endpoints as app.py.
+# Database work runs on a bounded thread pool and Gemini calls on their own pool,
+# behind a concurrency limit and a timeout, so a slow LLM round-trip never blocks
+# /tasks/assign. A timed-out call keeps its worker until its thread returns (the
+# Gemini request itself is bounded in gemini_mapping), so mapping requests are
+# turned away with 503 while every LLM worker is still busy instead of queueing.
+DB_WORKERS = int(os.getenv("DB_WORKERS", "8"))
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "10"))
+
+db_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="db")
+llm_executor = ThreadPoolExecutor(max_workers=LLM_CONCURRENCY, thread_name_prefix="llm")
+
+
+class ExecutorSlots:
+    """
+    Counts calls submitted to an executor until their threads finish. Used from the
+    event loop thread only, so no lock is needed.
+    """
+
+    def __init__(self, executor, limit):
+        self.executor = executor
+        self.limit = limit
+        self.in_flight = 0
+
+    def submit(self, func, *args):
+        """Starts func(*args) on the executor, or returns None if every worker is taken."""
+        if self.in_flight >= self.limit:
+            return None
+        self.in_flight += 1
+        future = asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        self.in_flight -= 1
+
+
+async def run_llm(request, timeout, func, *args):
+    """
+    Runs a mapping call on the LLM pool. Returns (result, None), or (None, status) when
+    the pool is full (503) or the call outlives timeout (504). The future is shielded so
+    giving up on it does not free its slot while the thread is still running.
+    """
+    future = request.app['llm_slots'].submit(func, *args)
+    if future is None:
+        return None, 503
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout=timeout), None
+    except asyncio.TimeoutError:
+        return None, 504
+
+
+async def run_db(func, *args):
+    """Runs a blocking job_manager call on the DB pool, in one connection/transaction."""
+    def call():
+        with connection_scope(job_manager.DB_PATH):
+            return func(*args)
+    return await asyncio.get_running_loop().run_in_executor(db_executor, call)
+
+
+def records(df):
+    return df.to_dict(orient='records')
+
+
+def assign_task(task_id):
+    recommendations, reason = recommend_engineers_memory_cf(task_id, top_n=5)
+    if isinstance(recommendations, str):
+        return {"error": recommendations}, 400
+
+    # Claim atomically, falling through the ranked list if a concurrent request wins an engineer
+    assigned_engineer = job_manager.claim_engineer_for_task(
+        task_id, [eng_id for eng_id, score in recommendations])
+
+    if not assigned_engineer:
+        return {"error": "No available engineer found"}, 409
+
+    return {
+        "message": f"Engineer {assigned_engineer} assigned to task {task_id}",
+        "recommendation_reason": reason
+    }, 200
+
+
+async def get_jobs(request):
+    return web.json_response(records(await run_db(job_manager.fetch_all_jobs)))
+
+
+async def get_unassigned_jobs(request):
+    return web.json_response(records(await run_db(job_manager.fetch_unassigned_jobs)))
+
+
+async def get_available_engineers(request):
+    return web.json_response(records(await run_db(job_manager.fetch_available_engineers)))
+
+
+async def assign_engineer_to_task(request):
+    data = await request.json()
+    task_id = data.get('task_id')
+
+    if not task_id:
+        return web.json_response({"error": "Missing task_id"}, status=400)
+
+    body, status = await run_db(assign_task, task_id)
+    return web.json_response(body, status=status)
+
+
+async def complete_task_endpoint(request):
+    data = await request.json()
+    task_id = data.get('task_id')
+    outcome_score = data.get('outcome_score')
+    job_id = data.get('job_id')  # Optional: the same task can be pending on several jobs
+
+    if not task_id or outcome_score is None:
+        return web.json_response({"error": "Missing task_id or outcome_score"}, status=400)
+
+    try:
+        await run_db(job_manager.complete_task, task_id, outcome_score, job_id)
+    except Exception as e:
+        return web.json_response({"error": str(e)}, status=500)
+
+    return web.json_response({"message": f"Task {task_id} marked as completed with score {outcome_score}"})
+
+
+async def select_serv(request):
+    data = await request.json()
+    user_input = data.get('description')
+
+    if not user_input:
+        return web.json_response({"error": ""}, status=400)
+
+    services, error_status = await run_llm(request, LLM_TIMEOUT_SECONDS, get_matching_services, user_input)
+    if error_status == 503:
+        return web.json_response({"error": "Service mapping is busy, try again shortly", "services": []}, status=503)
+    if error_status == 504:
+        return web.json_response({"error": "Service mapping timed out", "services": []}, status=504)
+    return web.json_response({"services": services})
+
+
+async def select_serv_batch(request):
+    data = await request.json()
+    descriptions = data.get('descriptions')
+
+    if not descriptions or not isinstance(descriptions, list):
+        return web.json_response({"error": "Missing descriptions list"}, status=400)
+
+    # Chunks run concurrently inside the call; it falls back locally after BATCH_WAIT_SECONDS
+    services, error_status = await run_llm(request, BATCH_WAIT_SECONDS + LLM_TIMEOUT_SECONDS,
+                                           get_matching_services_batch, [str(d) for d in descriptions])
+    if error_status == 503:
+        return web.json_response({"error": "Service mapping is busy, try again shortly", "results": []}, status=503)
+    if error_status == 504:
+        return web.json_response({"error": "Service mapping timed out", "results": []}, status=504)
+    return web.json_response({"results": [{"description": d, "services": s} for d, s in zip(descriptions, services)]})
+
+
+async def mapping_metrics(request):
+    return web.json_response(get_mapping_metrics())
+
+
+@web.middleware
+async def cors_middleware(request, handler):
+    if request.method == 'OPTIONS':
+        response = web.Response()
+    else:
+        response = await handler(request)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    return response
+
+
+def create_app():
+    app = web.Application(middlewares=[cors_middleware])
+    app['llm_slots'] = ExecutorSlots(llm_executor, LLM_CONCURRENCY)
+    app.router.add_get('/jobs', get_jobs)
+    app.router.add_get('/jobs/unassigned', get_unassigned_jobs)
+    app.router.add_get('/engineers/available', get_available_engineers)
+    app.router.add_post('/tasks/assign', assign_engineer_to_task)
+    app.router.add_post('/tasks/complete', complete_task_endpoint)
+    app.router.add_post('/mapping_services', select_serv)
+    app.router.add_post('/mapping_services/batch', select_serv_batch)
+    app.router.add_get('/mapping_services/metrics', mapping_metrics)
+    return app
+
+
+if __name__ == "__main__":
+    web.run_app(create_app(), port=int(os.getenv("PORT", "8080")))
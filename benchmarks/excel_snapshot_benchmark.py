@@ -0,0 +1,66 @@
+# In benchmarks/excel_snapshot_benchmark.py
+"""
+Cold Excel vs warm columnar snapshot load times for the job history workbooks.
+
+For each file: times pd.read_excel (cold), builds the snapshot, then times
+read_excel_cached from the snapshot (warm) and checks both frames are equal.
+Snapshots are written to a temporary directory so data/.snapshots is untouched.
+
+Usage: python benchmarks/excel_snapshot_benchmark.py --repeats 5
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from core.excel_snapshot import read_excel_cached
+
+HISTORY_FILES = [
+    os.path.join(BASE_DIR, 'data', 'generated_flat_job_history.xlsx'),
+    os.path.join(BASE_DIR, 'data', 'generated_flat_job_history_FINAL.xlsx'),
+    os.path.join(BASE_DIR, 'data', 'generated_flat_job_test.xlsx'),
+]
+
+
+def best_of(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+
+def run(files, repeats):
+    snapshot_dir = tempfile.mkdtemp(prefix='excel_snapshot_')
+    try:
+        print(f"{'File':<40}{'Rows':>7}{'Excel (ms)':>12}{'First (ms)':>12}{'Warm (ms)':>11}{'Speedup':>9}  Equal")
+        print("-" * 98)
+        for path in files:
+            cold_ms, expected = best_of(lambda: pd.read_excel(path), repeats)
+            first_ms, _ = best_of(lambda: read_excel_cached(path, snapshot_dir=snapshot_dir), 1)
+            warm_ms, actual = best_of(lambda: read_excel_cached(path, snapshot_dir=snapshot_dir), repeats)
+            try:
+                pd.testing.assert_frame_equal(expected, actual)
+                equal = "yes"
+            except AssertionError as e:
+                equal = f"NO ({str(e).splitlines()[0]})"
+            print(f"{os.path.basename(path):<40}{len(expected):>7}{cold_ms:>12.1f}{first_ms:>12.1f}"
+                  f"{warm_ms:>11.2f}{cold_ms / warm_ms:>8.0f}x  {equal}")
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('files', nargs='*', default=HISTORY_FILES)
+    args = parser.parse_args()
+    run(args.files, args.repeats)
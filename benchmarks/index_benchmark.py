@@ -0,0 +1,123 @@
+# In benchmarks/index_benchmark.py
+"""
+Before/after report for the indexes created by core/db_setup.migrate_database.
+
+Builds a scratch copy of the workshop database whose job_history table is
+scaled up to millions of rows, times the hot queries and prints their
+EXPLAIN QUERY PLAN, then applies the migrations and repeats.
+
+Usage: python benchmarks/index_benchmark.py --rows 2000000
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from core.db_setup import migrate_database
+
+# (label, sql, params) -- the lookups made by recommender, job_manager and engineer_analyzer
+HOT_QUERIES = [
+    ("engineer x task average", "SELECT AVG(Outcome_Score), COUNT(*) FROM job_history WHERE Engineer_Id = ? AND Task_Id = ?", ('ENG007', 'T014')),
+    ("engineer x job average", "SELECT AVG(Outcome_Score), COUNT(*) FROM job_history WHERE Engineer_Id = ? AND Job_Name = ?", ('ENG007', 'Full Service')),
+    ("history rows for a task", "SELECT COUNT(*) FROM job_history WHERE Task_Id = ?", ('T014',)),
+    ("history rows by status", "SELECT COUNT(*) FROM job_history WHERE Status = ?", ('In Progress',)),
+    ("next unassigned row for a task", "SELECT rowid FROM job_card WHERE Task_Id = ? AND Engineer_Id IS NULL ORDER BY rowid LIMIT 1", ('T007',)),
+    ("job cards by status", "SELECT COUNT(*) FROM job_card WHERE Status = ?", ('Assigned',)),
+    ("tasks held by an engineer", "SELECT Task_Id FROM job_card WHERE Engineer_Id = ?", ('ENG003',)),
+    ("available engineers", "SELECT Engineer_ID FROM engineer_profiles WHERE Availability = 'Yes'", ()),
+    ("engineer availability", "SELECT Availability FROM engineer_profiles WHERE Engineer_ID = ?", ('ENG003',)),
+]
+
+
+def build_scaled_database(source_db, target_rows, job_card_rows):
+    """Copies source_db and grows job_history / job_card by re-inserting their rows."""
+    tmp_dir = tempfile.mkdtemp(prefix='index_benchmark_')
+    db_path = os.path.join(tmp_dir, 'workshop_scaled.db')
+    shutil.copy(source_db, db_path)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("PRAGMA synchronous = OFF;")
+    seed_rows = conn.execute("SELECT COUNT(*) FROM job_history").fetchone()[0]
+    print(f"Scaling job_history from {seed_rows} to {target_rows:,} rows...")
+    while True:
+        current = conn.execute("SELECT COUNT(*) FROM job_history").fetchone()[0]
+        if current >= target_rows:
+            break
+        conn.execute(f"""
+            INSERT INTO job_history
+            SELECT Job_ID || '-' || (rowid + {current}), Job_Name, Task_Id, Task_Description,
+                   CASE WHEN abs(random()) % 100 = 0 THEN 'In Progress' ELSE Status END,
+                   Date_Completed, Urgency, VIN, Make, Model, Mileage,
+                   'ENG' || printf('%03d', 1 + abs(random()) % 18), Engineer_Name, Engineer_Level,
+                   Time_Started, Time_Ended, Time_Taken_minutes, Estimated_Standard_Time,
+                   1 + abs(random()) % 5
+            FROM job_history LIMIT {target_rows - current}
+        """)
+        conn.commit()
+
+    conn.execute("DELETE FROM job_card")
+    conn.execute(f"""
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {job_card_rows})
+        INSERT INTO job_card (Job_Id, Job_Name, Task_Id, Status, Urgency, Engineer_Id)
+        SELECT 'CARD' || i, 'Custom Service', 'T' || printf('%03d', 1 + i % 20),
+               CASE WHEN i % 10 = 0 THEN 'Created' ELSE 'Assigned' END, 'Normal',
+               CASE WHEN i % 10 = 0 THEN NULL ELSE 'ENG' || printf('%03d', 1 + i % 18) END
+        FROM n
+    """)
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def measure(db_path, repeats):
+    conn = sqlite3.connect(db_path)
+    results = {}
+    for label, sql, params in HOT_QUERIES:
+        plan = " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+        start = time.perf_counter()
+        for _ in range(repeats):
+            conn.execute(sql, params).fetchall()
+        results[label] = ((time.perf_counter() - start) / repeats * 1000, plan)
+    conn.close()
+    return results
+
+
+def print_report(before, after):
+    print(f"\n{'Query':<32}{'Before (ms)':>12}{'After (ms)':>12}{'Speedup':>10}")
+    print("-" * 66)
+    for label, _, _ in HOT_QUERIES:
+        before_ms, _ = before[label]
+        after_ms, _ = after[label]
+        speedup = before_ms / after_ms if after_ms else float('inf')
+        print(f"{label:<32}{before_ms:>12.3f}{after_ms:>12.3f}{speedup:>9.1f}x")
+
+    print("\n--- EXPLAIN QUERY PLAN ---")
+    for label, _, _ in HOT_QUERIES:
+        print(f"{label}:\n  before: {before[label][1]}\n  after:  {after[label][1]}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2_000_000, help='job_history rows after scaling')
+    parser.add_argument('--job-card-rows', type=int, default=50_000)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--db', default=os.path.join(BASE_DIR, 'database', 'workshopnew.db'))
+    args = parser.parse_args()
+
+    db_path = build_scaled_database(args.db, args.rows, args.job_card_rows)
+    try:
+        before = measure(db_path, args.repeats)
+        start = time.perf_counter()
+        migrate_database(db_path)
+        print(f"Migration took {time.perf_counter() - start:.1f} s")
+        after = measure(db_path, args.repeats)
+        print_report(before, after)
+    finally:
+        shutil.rmtree(os.path.dirname(db_path), ignore_errors=True)
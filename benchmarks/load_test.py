@@ -0,0 +1,106 @@
+# In benchmarks/load_test.py
+"""
+Mixed-traffic load test for the HTTP servers (app.py and async_app.py).
+
+Sends a mix of GET /jobs/unassigned, GET /engineers/available,
+POST /tasks/assign and POST /mapping_services from many concurrent clients
+and reports p50/p99 latency per endpoint for each server URL given.
+
+Usage:
+    python app.py                # Flask, port 5000
+    python async_app.py          # asyncio, port 8080
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --url http://127.0.0.1:8080
+"""
+import argparse
+import json
+import random
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+TASK_IDS = [f"T{i:03d}" for i in range(1, 21)]
+COMPLAINTS = [
+    "brakes squeal when stopping", "oil light on", "car pulls to the left",
+    "battery keeps dying", "engine misfires at idle", "wipers leave streaks",
+]
+
+# (endpoint label, weight)
+TRAFFIC_MIX = [
+    ("GET /jobs/unassigned", 30),
+    ("GET /engineers/available", 30),
+    ("POST /tasks/assign", 30),
+    ("POST /mapping_services", 10),
+]
+
+
+def send(base_url, label, rng, timeout):
+    method, path = label.split(" ", 1)
+    body = None
+    if path == "/tasks/assign":
+        body = {"task_id": rng.choice(TASK_IDS)}
+    elif path == "/mapping_services":
+        body = {"description": rng.choice(COMPLAINTS)}
+
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(base_url + path, data=data, method=method,
+                                     headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code  # 409s from /tasks/assign are expected once engineers are booked
+    except Exception:
+        status = 'error'
+    return label, status, time.perf_counter() - start
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def run(base_url, num_requests, concurrency, seed, timeout):
+    rng = random.Random(seed)
+    labels = [label for label, weight in TRAFFIC_MIX]
+    weights = [weight for label, weight in TRAFFIC_MIX]
+    plan = rng.choices(labels, weights=weights, k=num_requests)
+    request_rngs = [random.Random(seed + i) for i in range(num_requests)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda i: send(base_url, plan[i], request_rngs[i], timeout), range(num_requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    for label, status, latency in results:
+        latencies[label].append(latency)
+        latencies["ALL"].append(latency)
+        if status == 'error' or (isinstance(status, int) and status >= 500):
+            errors[label] += 1
+
+    print(f"\n--- {base_url}: {num_requests} requests, concurrency {concurrency}, "
+          f"{num_requests / elapsed:.1f} req/s ---")
+    print(f"{'Endpoint':<28}{'n':>6}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for label in labels + ["ALL"]:
+        values = sorted(latencies[label])
+        if not values:
+            continue
+        errors_for_label = sum(errors.values()) if label == "ALL" else errors[label]
+        print(f"{label:<28}{len(values):>6}{percentile(values, 0.5) * 1000:>10.1f}"
+              f"{percentile(values, 0.99) * 1000:>10.1f}{errors_for_label:>8}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', action='append', required=True, help='server base URL (repeatable)')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    args = parser.parse_args()
+    for url in args.url:
+        run(url.rstrip('/'), args.requests, args.concurrency, args.seed, args.timeout)
@@ -0,0 +1,103 @@
+# In benchmarks/online_learning_benchmark.py
+"""
+Online partial_fit updates vs full LogisticRegression retrains of the job success model.
+
+Builds a synthetic engineer_past_performance history in insertion order, trains both
+models on the first part, then feeds the rest in batches: the online model does one
+partial_fit per batch, the full model retrains on everything seen so far. Reports the
+per-batch latency of each and their ROC AUC on the most recent (held-out) outcomes.
+
+Usage: python benchmarks/online_learning_benchmark.py --rows 200000 --batch 2000
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score
+from sklearn.pipeline import Pipeline
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from core.predictive_model import (CATEGORICAL_FEATURES, build_online_classifier, category_vocabulary,
+                                   preprocess_data, update_online_model)
+
+MAKES = ['Toyota', 'Ford', 'Honda', 'BMW', 'Audi', 'Nissan', 'Volkswagen', 'Hyundai']
+
+
+def synthetic_history(rows, engineers=50, job_types=20, seed=42):
+    """Outcome scores driven by engineer skill, job difficulty and engineer/job affinity."""
+    rng = np.random.default_rng(seed)
+    skill = rng.normal(0, 0.8, engineers)
+    difficulty = rng.normal(0, 0.6, job_types)
+    affinity = rng.normal(0, 0.7, (engineers, job_types))
+    eng = rng.integers(0, engineers, rows)
+    job = rng.integers(0, job_types, rows)
+    latent = 3.3 + skill[eng] - difficulty[job] + affinity[eng, job] + rng.normal(0, 0.8, rows)
+    return pd.DataFrame({
+        'history_order': np.arange(1, rows + 1),
+        'engineer_id': np.char.add('ENG', np.char.zfill(eng.astype(str), 3)),
+        'job_description_text': np.char.add('Job ', job.astype(str)),
+        'vehicle_make': rng.choice(MAKES, rows),
+        'vehicle_model': 'Model',
+        'outcome_score': np.clip(np.round(latent), 1, 5),
+        'engineer_general_score': 60 + 10 * skill[eng],
+        'job_estimated_time': (45 + 15 * (difficulty[job] + 2)).round(),
+    })
+
+
+def holdout_auc(model, X, y):
+    return roc_auc_score(y, model.predict_proba(X)[:, 1])
+
+
+def run(rows, batch, seed_fraction, test_fraction):
+    with contextlib.redirect_stdout(io.StringIO()):
+        X, y, preprocessor = preprocess_data(synthetic_history(rows))
+    seed_end = int(rows * seed_fraction)
+    test_start = int(rows * (1 - test_fraction))
+    X_test, y_test = X.iloc[test_start:], y.iloc[test_start:]
+
+    vocabulary = category_vocabulary(X.iloc[:seed_end])
+    preprocessor.set_params(cat__categories=[vocabulary[col] for col in CATEGORICAL_FEATURES])
+    online = Pipeline([('preprocessor', clone(preprocessor)), ('classifier', build_online_classifier())])
+    online.fit(X.iloc[:seed_end], y.iloc[:seed_end])
+
+    def full_retrain(end):
+        model = Pipeline([('preprocessor', clone(preprocessor)),
+                          ('classifier', LogisticRegression(solver='liblinear', random_state=42, class_weight='balanced'))])
+        return model.fit(X.iloc[:end], y.iloc[:end])
+
+    full = full_retrain(seed_end)
+    online_ms, full_ms = [], []
+    for start in range(seed_end, test_start, batch):
+        end = min(start + batch, test_start)
+        t0 = time.perf_counter()
+        update_online_model(online, X.iloc[start:end], y.iloc[start:end])
+        online_ms.append((time.perf_counter() - t0) * 1000)
+        t0 = time.perf_counter()
+        full = full_retrain(end)
+        full_ms.append((time.perf_counter() - t0) * 1000)
+
+    print(f"History rows: {rows:,}  seed: {seed_end:,}  batches: {len(online_ms)} x {batch:,}  held-out: {len(X_test):,}")
+    print(f"{'Mode':<28}{'Median update (ms)':>20}{'Max (ms)':>12}{'ROC AUC':>10}")
+    print("-" * 70)
+    print(f"{'online partial_fit':<28}{statistics.median(online_ms):>20.1f}{max(online_ms):>12.1f}{holdout_auc(online, X_test, y_test):>10.4f}")
+    print(f"{'full retrain (liblinear)':<28}{statistics.median(full_ms):>20.1f}{max(full_ms):>12.1f}{holdout_auc(full, X_test, y_test):>10.4f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--batch', type=int, default=2_000)
+    parser.add_argument('--seed-fraction', type=float, default=0.5)
+    parser.add_argument('--test-fraction', type=float, default=0.1)
+    args = parser.parse_args()
+    run(args.rows, args.batch, args.seed_fraction, args.test_fraction)
@@ -0,0 +1,81 @@
+# In benchmarks/scorer_benchmark.py
+"""
+Compiled NumPy scorer vs the sklearn pipeline's predict_proba.
+
+Trains the job success pipeline (LogisticRegression and the online SGD model) on a
+synthetic history, exports the compiled scorer, reloads it from disk, checks that it
+matches predict_proba on every row (plus unseen and missing categories), then times
+per-candidate scoring latency for a few candidate batch sizes.
+
+Usage: python benchmarks/scorer_benchmark.py --rows 50000 --repeats 200
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from core.compiled_scorer import LinearScorer, check_scorer_parity, export_scorer
+from core.predictive_model import build_online_classifier, preprocess_data
+from online_learning_benchmark import synthetic_history
+
+BATCH_SIZES = [1, 20, 200]
+
+
+def median_ms(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def run(rows, repeats):
+    with contextlib.redirect_stdout(io.StringIO()):
+        X, y, preprocessor = preprocess_data(synthetic_history(rows))
+    edge_cases = X.iloc[:4].copy()
+    edge_cases['job_description_text'] = ['Job 0', 'Unseen job', None, 'Job 3']
+    edge_cases['vehicle_make'] = ['Tesla', None, 'Ford', 'BMW']
+
+    tmp_dir = tempfile.mkdtemp(prefix='scorer_benchmark_')
+    try:
+        for label, classifier in [('LogisticRegression', LogisticRegression(solver='liblinear', random_state=42, class_weight='balanced')),
+                                  ('SGD (online)', build_online_classifier())]:
+            model = Pipeline([('preprocessor', preprocessor), ('classifier', classifier)]).fit(X, y)
+            path = os.path.join(tmp_dir, 'job_success_scorer.npz')
+            export_scorer(model, path)
+            scorer = LinearScorer.load(path)
+
+            ok, max_diff = check_scorer_parity(model, scorer, X)
+            edge_ok, edge_diff = check_scorer_parity(model, scorer, edge_cases)
+            print(f"\n{label}: parity on {len(X):,} rows {'OK' if ok else 'FAILED'} (max |dP| {max_diff:.2e}), "
+                  f"unseen/missing categories {'OK' if edge_ok else 'FAILED'} (max |dP| {edge_diff:.2e}), "
+                  f"artifact {os.path.getsize(path):,} bytes")
+            print(f"{'Candidates':>10}{'Pipeline (ms)':>15}{'Scorer (ms)':>13}{'Per cand. pipeline (us)':>25}{'Per cand. scorer (us)':>23}{'Speedup':>9}")
+            for n in BATCH_SIZES:
+                batch = X.iloc[:n]
+                pipeline_ms = median_ms(lambda: model.predict_proba(batch), repeats)
+                scorer_ms = median_ms(lambda: scorer.predict_proba(batch), repeats)
+                print(f"{n:>10}{pipeline_ms:>15.3f}{scorer_ms:>13.3f}{pipeline_ms * 1000 / n:>25.1f}"
+                      f"{scorer_ms * 1000 / n:>23.1f}{pipeline_ms / scorer_ms:>8.0f}x")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+    run(args.rows, args.repeats)
@@ -0,0 +1,113 @@
+# In benchmarks/stress_assign.py
+"""
+Concurrency stress test for POST /tasks/assign.
+
+Copies the workshop database to a temporary file, queues a batch of pending
+tasks, makes every engineer available, and fires many assignment requests in
+parallel through the Flask app. Afterwards it checks that no engineer was
+double-booked and that every 200 response matches exactly one assigned row,
+and reports throughput.
+
+Usage: python benchmarks/stress_assign.py --requests 400 --workers 32
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.chdir(BASE_DIR)
+
+import job_manager
+import recommender
+
+TASK_IDS = [f"T{i:03d}" for i in range(1, 21)]
+
+
+def prepare_database(source_db, num_tasks, seed):
+    """Copies the database and queues num_tasks unassigned job_card rows."""
+    tmp_dir = tempfile.mkdtemp(prefix='stress_assign_')
+    db_path = os.path.join(tmp_dir, 'workshop_stress.db')
+    shutil.copy(source_db, db_path)
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM job_card")
+    conn.execute("UPDATE engineer_profiles SET Availability = 'Yes'")
+    conn.executemany(
+        "INSERT INTO job_card (Job_Id, Job_Name, Task_Id, Status, Urgency) VALUES (?, 'Custom Service', ?, 'Created', ?)",
+        [(f"STRESS{i}", rng.choice(TASK_IDS), rng.choice(['Low', 'Normal', 'High'])) for i in range(num_tasks)])
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def run(num_requests, workers, seed, source_db):
+    db_path = prepare_database(source_db, num_requests, seed)
+    job_manager.DB_PATH = db_path
+    recommender.DB_PATH = db_path
+
+    import app as flask_app  # Imported after the paths are pointed at the copy
+
+    rng = random.Random(seed)
+    task_ids = [rng.choice(TASK_IDS) for _ in range(num_requests)]
+    recommender.get_engine().rank_engineers(task_ids[0])  # Build the recommender before timing
+
+    def assign(task_id):
+        client = flask_app.app.test_client()
+        start = time.perf_counter()
+        response = client.post('/tasks/assign', json={'task_id': task_id})
+        return response.status_code, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(assign, task_ids))
+    elapsed = time.perf_counter() - start
+
+    statuses = Counter(status for status, _ in results)
+    latencies = sorted(latency for _, latency in results)
+
+    conn = sqlite3.connect(db_path)
+    assigned_rows = conn.execute(
+        "SELECT Engineer_Id FROM job_card WHERE Engineer_Id IS NOT NULL").fetchall()
+    per_engineer = Counter(row[0] for row in assigned_rows)
+    double_booked = {eng: n for eng, n in per_engineer.items() if n > 1}
+    still_available = conn.execute(
+        f"SELECT COUNT(*) FROM engineer_profiles WHERE Availability = 'Yes' AND Engineer_ID IN ({', '.join('?' for _ in per_engineer)})",
+        list(per_engineer)).fetchone()[0] if per_engineer else 0
+    conn.close()
+
+    print(f"\n--- /tasks/assign stress test: {num_requests} requests, {workers} workers ---")
+    print(f"Responses: {dict(statuses)}")
+    print(f"Assigned rows: {len(assigned_rows)}, engineers booked: {len(per_engineer)}")
+    print(f"Throughput: {num_requests / elapsed:.1f} requests/s over {elapsed:.2f} s")
+    print(f"Latency p50: {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"p99: {latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000:.1f} ms")
+
+    ok = not double_booked and statuses.get(200, 0) == len(assigned_rows) and still_available == 0
+    if double_booked:
+        print(f"DOUBLE BOOKED: {double_booked}")
+    if statuses.get(200, 0) != len(assigned_rows):
+        print("MISMATCH: successful responses do not match assigned rows")
+    if still_available:
+        print(f"MISMATCH: {still_available} booked engineers are still marked available")
+    print("Result:", "PASS - no double booking" if ok else "FAIL")
+    shutil.rmtree(os.path.dirname(db_path), ignore_errors=True)
+    return ok
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', default=os.path.join(BASE_DIR, 'database', 'workshopnew.db'))
+    args = parser.parse_args()
+    sys.exit(0 if run(args.requests, args.workers, args.seed, args.db) else 1)
@@ -0,0 +1,137 @@
+# In core/compiled_scorer.py
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+# --- Compiled linear scorer ---
+# A trained Pipeline(ColumnTransformer(OneHotEncoder, StandardScaler), linear classifier)
+# reduced to plain arrays. The one-hot columns become one weight per category and the
+# scaler is folded into the numeric weights, so scoring a batch of candidates is a few
+# lookups, one dot product and a sigmoid, without sklearn's per-call overhead.
+SCORER_FORMAT = 1
+
+
+class LinearScorer:
+    """
+    Scores like model_pipeline.predict_proba for a linear classifier pipeline.
+    Build it with from_pipeline(), store it with save() and read it back with load().
+    """
+
+    def __init__(self, categorical, numeric_columns, numeric_weights, bias):
+        # categorical: list of (column, categories, weights, missing_weight); weights has one
+        # extra trailing 0.0 that unknown categories (index -1) pick up
+        self.categorical = categorical
+        self.category_index = [{value: i for i, value in enumerate(categories)} for _, categories, _, _ in categorical]
+        self.numeric_columns = list(numeric_columns)
+        self.numeric_weights = np.asarray(numeric_weights, dtype=float)
+        self.bias = float(bias)
+
+    @classmethod
+    def from_pipeline(cls, model_pipeline):
+        """Extracts the arrays from a fitted pipeline; raises ValueError if it is not linear."""
+        preprocessor, classifier = model_pipeline[0], model_pipeline[-1]
+        if len(model_pipeline) != 2 or not hasattr(classifier, 'coef_') or not hasattr(preprocessor, 'transformers_'):
+            raise ValueError("Only a (ColumnTransformer, linear classifier) pipeline can be compiled.")
+        if getattr(classifier, 'loss', 'log_loss') != 'log_loss' or classifier.coef_.shape[0] != 1:
+            raise ValueError("The classifier must be a binary logistic model.")
+
+        coef = classifier.coef_[0]
+        bias = float(classifier.intercept_[0])
+        categorical, numeric_columns, numeric_weights = [], [], []
+        offset = 0
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == 'drop' or len(columns) == 0:
+                continue
+            if name == 'cat':
+                for column, categories in zip(columns, transformer.categories_):
+                    weights = coef[offset:offset + len(categories)]
+                    offset += len(categories)
+                    missing = pd.isna(categories)
+                    categorical.append((column, np.asarray(categories[~missing], dtype=object),
+                                        np.append(weights[~missing], 0.0),
+                                        float(weights[missing][0]) if missing.any() else 0.0))
+            elif name == 'num':
+                weights = coef[offset:offset + len(columns)]
+                offset += len(columns)
+                mean = transformer.mean_ if transformer.with_mean else np.zeros(len(columns))
+                scale = transformer.scale_ if transformer.with_std else np.ones(len(columns))
+                # w * (x - mean) / scale == (w / scale) * x - sum(w * mean / scale)
+                numeric_columns.extend(columns)
+                numeric_weights.extend(weights / scale)
+                bias -= float(np.sum(weights * mean / scale))
+            else:
+                raise ValueError(f"Cannot compile transformer '{name}'.")
+        if offset != len(coef):
+            raise ValueError("Pipeline output columns do not match the classifier coefficients.")
+        return cls(categorical, numeric_columns, numeric_weights, bias)
+
+    def decision_function(self, X):
+        """Log-odds of class 1. X is a DataFrame or a dict of equal-length columns."""
+        z = self.bias + np.column_stack([np.asarray(X[col], dtype=float) for col in self.numeric_columns]) @ self.numeric_weights
+        for (column, _, weights, missing_weight), index in zip(self.categorical, self.category_index):
+            values = X[column]
+            codes = np.fromiter((index.get(value, -1) for value in values), dtype=np.intp, count=len(values))
+            z = z + weights[codes]
+            if missing_weight:
+                z = z + np.where(pd.isna(np.asarray(values, dtype=object)), missing_weight, 0.0)
+        return z
+
+    def predict_proba(self, X):
+        """Same shape and meaning as the sklearn method: columns are P(0), P(1)."""
+        positive = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1.0 - positive, positive])
+
+    def save(self, path):
+        """Writes the arrays to an .npz file next to the model, atomically."""
+        meta = {'format': SCORER_FORMAT, 'numeric_columns': self.numeric_columns, 'bias': self.bias,
+                'categorical': [[column, float(missing_weight)] for column, _, _, missing_weight in self.categorical]}
+        arrays = {'numeric_weights': self.numeric_weights}
+        for i, (_, categories, weights, _) in enumerate(self.categorical):
+            arrays[f'categories_{i}'] = categories.astype(str)
+            arrays[f'weights_{i}'] = weights
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.npz.tmp')
+        os.close(fd)
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('format') != SCORER_FORMAT:
+                raise ValueError(f"Unsupported scorer format in {path}.")
+            categorical = [(column, data[f'categories_{i}'].astype(object), data[f'weights_{i}'], missing_weight)
+                           for i, (column, missing_weight) in enumerate(meta['categorical'])]
+            return cls(categorical, meta['numeric_columns'], data['numeric_weights'], meta['bias'])
+
+
+def export_scorer(model_pipeline, path):
+    """
+    Compiles and saves the pipeline's scorer. Returns it, or None if the model is not
+    linear; an older scorer at path is then removed so it is never used with this model.
+    """
+    try:
+        scorer = LinearScorer.from_pipeline(model_pipeline)
+    except (ValueError, AttributeError, IndexError) as e:
+        print(f"Compiled scorer not exported: {e}")
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+    scorer.save(path)
+    return scorer
+
+def check_scorer_parity(model_pipeline, scorer, X, tolerance=1e-9):
+    """Largest |P(1)| difference between the pipeline and the compiled scorer on X, and whether it is within tolerance."""
+    expected = model_pipeline.predict_proba(X)[:, 1]
+    actual = scorer.predict_proba(X)[:, 1]
+    max_diff = float(np.max(np.abs(expected - actual))) if len(X) else 0.0
+    return max_diff <= tolerance, max_diff
@@ -2,6 +2,20 @@
 import pandas as pd
 import sqlite3
 import os
+import sys
+import argparse
+from datetime import date, datetime
+
+try:
+    from core.db import get_connection
+    from core.excel_snapshot import read_excel_cached
+    from core.db_setup import ENGINEER_COLUMN, table_columns, create_history_key_index
+except ImportError:  # Running this file directly (python core/data_loader.py)
+    from db import get_connection
+    from excel_snapshot import read_excel_cached
+    from db_setup import ENGINEER_COLUMN, table_columns, create_history_key_index
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.helpers import COLUMN_MAPPING, standardize_columns
 
 # --- Configuration ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -10,6 +24,14 @@ DB_PATH = os.path.join(BASE_DIR, 'database/workshop.db')
 HISTORY_EXCEL_PATH = os.path.join(BASE_DIR, 'data/generated_flat_job_history.xlsx') 
 ENGINEER_PROFILES_EXCEL_PATH = os.path.join(BASE_DIR, 'data/engineer_profiles.xlsx') 
 
+# --- Streaming ingest settings ---
+CHUNK_SIZE = 10_000                 # Source rows held in memory at once
+ROWS_PER_TRANSACTION = 100_000      # Rows written between commits
+HISTORY_KEY = ('Job_ID', 'Task_Id')
+# History files keep the task text in Task_Description, so only these renames apply
+HISTORY_COLUMN_MAPPING = {name: COLUMN_MAPPING[name] for name in
+                          ('Engineer_Id', 'Time_Taken_minutes', 'Outcome_Score', 'Job_Name')}
+
 def load_data_from_excel():
     """
     Reads the data from the source Excel files, ensures columns match the database schema,
@@ -20,7 +42,7 @@ def load_data_from_excel():
     try:
         # --- Load JOB HISTORY data ---
         print(f"Reading job history from: {HISTORY_EXCEL_PATH}")
-        df_history = pd.read_excel(HISTORY_EXCEL_PATH)
+        df_history = read_excel_cached(HISTORY_EXCEL_PATH)
         # Ensure datetime columns are handled correctly
         df_history['Time_Started'] = pd.to_datetime(df_history['Time_Started'])
         df_history['Time_Ended'] = pd.to_datetime(df_history['Time_Ended'])
@@ -29,7 +51,7 @@ def load_data_from_excel():
 
         # --- Load ENGINEER PROFILES data ---
         print(f"Reading engineer profiles from: {ENGINEER_PROFILES_EXCEL_PATH}")
-        df_engineers = pd.read_excel(ENGINEER_PROFILES_EXCEL_PATH)
+        df_engineers = read_excel_cached(ENGINEER_PROFILES_EXCEL_PATH)
         print(f"Loaded {len(df_engineers)} engineer profiles.")
 
     except FileNotFoundError as e:
@@ -43,7 +65,7 @@ def load_data_from_excel():
     # --- Connect to the database and load the data ---
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection(DB_PATH)
         print("Successfully connected to the database.")
 
         # Populate the 'job_history' table
@@ -64,7 +86,135 @@ def load_data_from_excel():
             conn.close()
             print("Database connection closed.")
 
+def iter_source_chunks(source_path, chunk_size=CHUNK_SIZE):
+    """Yields the rows of a .csv or .xlsx file as DataFrames of at most chunk_size rows."""
+    if source_path.lower().endswith('.csv'):
+        yield from pd.read_csv(source_path, chunksize=chunk_size)
+        return
+
+    # openpyxl's read-only mode streams rows from the sheet XML instead of loading the workbook
+    from openpyxl import load_workbook
+    workbook = load_workbook(source_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(col) for col in next(rows, ())]
+        batch = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+def _sql_value(value):
+    """Converts a cell to what to_sql would have stored (datetimes as 'YYYY-MM-DD HH:MM:SS')."""
+    if value is None or value is pd.NaT or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d 00:00:00')
+    if hasattr(value, 'item'):  # NumPy scalar
+        return value.item()
+    return value
+
+def _resolve_columns(chunk_columns, columns):
+    """Maps source columns to job_history columns, matching case-insensitively and either engineer spelling."""
+    resolved = {}
+    for col in chunk_columns:
+        options = ENGINEER_COLUMN if col in ENGINEER_COLUMN else [col]
+        match = next((columns[name.lower()] for name in options if name.lower() in columns), None)
+        if match is not None:
+            resolved[col] = match
+    return resolved
+
+def ingest_history(source_path=HISTORY_EXCEL_PATH, db_path=DB_PATH, mode='upsert',
+                   chunk_size=CHUNK_SIZE, rows_per_transaction=ROWS_PER_TRANSACTION):
+    """
+    Streams a history file into job_history without dropping the table or its indexes.
+    mode='upsert' updates rows whose (Job_ID, Task_Id) already exists; mode='append'
+    keeps the existing row and skips the new one. Either way re-running is idempotent.
+    Returns the number of source rows processed.
+    """
+    if mode not in ('upsert', 'append'):
+        raise ValueError(f"Unknown ingest mode: {mode}")
+
+    print(f"--- Streaming job history from {source_path} ({mode}, {chunk_size} rows per chunk) ---")
+    conn = get_connection(db_path)
+    total_rows = 0
+    pending_rows = 0
+    statements = {}
+    try:
+        for chunk in iter_source_chunks(source_path, chunk_size):
+            chunk = standardize_columns(chunk, HISTORY_COLUMN_MAPPING)
+
+            columns = table_columns(conn, 'job_history')
+            if not columns:
+                # Fresh database: let pandas create the table from the first chunk's types
+                chunk.head(0).to_sql('job_history', conn, if_exists='append', index=False)
+                columns = table_columns(conn, 'job_history')
+            create_history_key_index(conn)
+
+            resolved = _resolve_columns(chunk.columns, columns)
+            key_columns = [columns[key.lower()] for key in HISTORY_KEY]
+            target_columns = tuple(resolved.values())
+            if target_columns not in statements:
+                skipped = [col for col in chunk.columns if col not in resolved]
+                if skipped:
+                    print(f"Ignoring columns not in job_history: {', '.join(skipped)}")
+                column_sql = ", ".join(f'"{col}"' for col in target_columns)
+                placeholders = ", ".join("?" for _ in target_columns)
+                updates = ", ".join(f'"{col}" = excluded."{col}"' for col in target_columns if col not in key_columns)
+                conflict = ", ".join(f'"{col}"' for col in key_columns)
+                on_conflict = f"DO UPDATE SET {updates}" if mode == 'upsert' and updates else "DO NOTHING"
+                statements[target_columns] = (
+                    f'INSERT INTO job_history ({column_sql}) VALUES ({placeholders}) '
+                    f'ON CONFLICT ({conflict}) {on_conflict}')
+
+            rows = [tuple(_sql_value(value) for value in row)
+                    for row in chunk[list(resolved)].itertuples(index=False, name=None)]
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            conn.executemany(statements[target_columns], rows)
+            total_rows += len(rows)
+            pending_rows += len(rows)
+            if pending_rows >= rows_per_transaction:
+                conn.commit()
+                pending_rows = 0
+                print(f"  ...{total_rows} rows written")
+        conn.commit()
+    except sqlite3.IntegrityError as e:
+        conn.rollback()
+        print(f"Database error: {e}")
+        print("job_history already holds duplicate (Job_ID, Task_Id) rows; remove them before streaming ingest.")
+        raise
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    print(f"Streamed {total_rows} job history rows into {db_path}.")
+    return total_rows
+
 if __name__ == '__main__':
     # Ensure your db_setup.py has been run first to create the tables.
-    load_data_from_excel()
+    parser = argparse.ArgumentParser(description="Load the workshop data into the database.")
+    parser.add_argument('--stream', action='store_true',
+                        help="stream job history in chunks and upsert it instead of replacing the tables")
+    parser.add_argument('--source', default=HISTORY_EXCEL_PATH, help="history .xlsx or .csv file (with --stream)")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--mode', choices=['upsert', 'append'], default='upsert')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if args.stream:
+        ingest_history(args.source, args.db, args.mode, args.chunk_size)
+    else:
+        load_data_from_excel()
     print("\nData loading process complete.")
\ No newline at end of file
@@ -0,0 +1,163 @@
+# In core/db.py
+import sqlite3
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+# Default database path (the core modules' workshop database)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_NAME = os.path.join(BASE_DIR, 'database', 'workshop.db')
+
+POOL_SIZE = 8
+
+# Applied once when a pooled connection is created
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL;",        # Readers don't block the writer
+    "PRAGMA synchronous = NORMAL;",      # Safe with WAL, far fewer fsyncs
+    "PRAGMA cache_size = -16000;",       # ~16 MB page cache per connection
+    "PRAGMA mmap_size = 268435456;",     # Memory-map up to 256 MB of the file
+    "PRAGMA busy_timeout = 5000;",       # Wait for a lock instead of failing at once
+    "PRAGMA foreign_keys = ON;",         # Enforce declared foreign keys on every borrower alike
+)
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    A sqlite3 connection that goes back to its pool when closed, so existing
+    `conn.close()` calls release the connection instead of throwing it away.
+    """
+    pool = None
+    bound = False  # True while owned by a connection_scope; close() is then a no-op
+
+    def close(self):
+        if self.bound:
+            return
+        if self.pool is not None:
+            self.pool.release(self)
+        else:
+            super().close()
+
+    def close_for_real(self):
+        sqlite3.Connection.close(self)
+
+
+class ConnectionPool:
+    """A small LIFO pool of configured connections to one database file."""
+
+    def __init__(self, db_path, size=POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def _create(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, factory=PooledConnection, check_same_thread=False)
+        conn.row_factory = sqlite3.Row # Allows accessing columns by name
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        conn.pool = self
+        return conn
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._create()
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()  # Never hand out a connection with someone else's open transaction
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close_for_real()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close_for_real()
+            except queue.Empty:
+                return
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_scope = threading.local()
+
+def get_pool(db_path=DATABASE_NAME):
+    """Returns the process-wide connection pool for a database file."""
+    db_path = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = ConnectionPool(db_path)
+            _pools[db_path] = pool
+        return pool
+
+def get_connection(db_path=DATABASE_NAME):
+    """
+    Returns a pooled connection. If the current thread is inside connection_scope()
+    for this database, that scope's connection is returned instead.
+    Calling close() on it hands it back to the pool.
+    """
+    bound = getattr(_scope, 'connections', {}).get(os.path.abspath(db_path))
+    if bound is not None:
+        return bound[0]
+    return get_pool(db_path).acquire()
+
+@contextmanager
+def connection_scope(db_path=DATABASE_NAME):
+    """
+    Binds one connection and one transaction to the current thread, e.g. for the
+    lifetime of an HTTP request. Nested scopes for the same database reuse the
+    outer connection; the outermost scope commits (or rolls back on error) and
+    returns the connection to the pool.
+    """
+    db_path = os.path.abspath(db_path)
+    connections = getattr(_scope, 'connections', None)
+    if connections is None:
+        connections = _scope.connections = {}
+
+    bound = connections.get(db_path)
+    if bound is not None:
+        bound[1] += 1
+        try:
+            yield bound[0]
+        finally:
+            bound[1] -= 1
+        return
+
+    conn = get_pool(db_path).acquire()
+    conn.bound = True
+    connections[db_path] = [conn, 1]
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        del connections[db_path]
+        conn.bound = False
+        conn.close()
+
+def begin_scope(db_path=DATABASE_NAME):
+    """Opens a connection_scope that is closed later by end_scope (for request hooks)."""
+    scope = connection_scope(db_path)
+    scope.__enter__()
+    stack = getattr(_scope, 'open_scopes', None)
+    if stack is None:
+        stack = _scope.open_scopes = []
+    stack.append(scope)
+
+def end_scope(error=None):
+    """Closes the innermost scope opened by begin_scope, rolling back if error is set."""
+    stack = getattr(_scope, 'open_scopes', None)
+    if not stack:
+        return
+    scope = stack.pop()
+    if error is None:
+        scope.__exit__(None, None, None)
+    else:
+        scope.__exit__(type(error), error, error.__traceback__)
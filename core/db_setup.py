@@ -1,6 +1,12 @@
 # In core/db_setup.py
 import sqlite3
 import os
+import sys
+
+try:
+    from core.feature_store import SQL_CREATE_FEATURE_TABLE, install_feature_store
+except ImportError:  # Running this file directly (python core/db_setup.py)
+    from feature_store import SQL_CREATE_FEATURE_TABLE, install_feature_store
 
 DATABASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database')
 DATABASE_NAME = os.path.join(DATABASE_DIR, 'workshop.db')
@@ -22,6 +28,158 @@ def create_table(conn, create_table_sql):
     except sqlite3.Error as e:
         print(f"Error creating table: {e}")
 
+# --- Secondary indexes for the hot query paths ---
+# Each column is a list of accepted spellings, because databases loaded from Excel
+# use Engineer_Id where the schema above uses Assigned_Engineer_Id.
+ENGINEER_COLUMN = ['Assigned_Engineer_Id', 'Engineer_Id']
+
+INDEX_DEFINITIONS = [
+    # (index name, table, columns)
+    ('idx_job_history_status', 'job_history', [['Status']]),
+    ('idx_job_history_task', 'job_history', [['Task_Id']]),
+    # Covering indexes for per-engineer task/job averages (no table lookups needed)
+    ('idx_job_history_engineer_task', 'job_history', [ENGINEER_COLUMN, ['Task_Id'], ['Outcome_Score']]),
+    ('idx_job_history_engineer_job', 'job_history', [ENGINEER_COLUMN, ['Job_Name'], ['Outcome_Score']]),
+    ('idx_job_card_status', 'job_card', [['Status']]),
+    # Finds the next unassigned row for a task (Engineer_Id IS NULL) without a scan
+    ('idx_job_card_task_engineer', 'job_card', [['Task_Id'], ENGINEER_COLUMN]),
+    ('idx_job_card_engineer', 'job_card', [ENGINEER_COLUMN]),
+    ('idx_engineer_profiles_availability', 'engineer_profiles', [['Availability'], ['Engineer_ID']]),
+    ('idx_engineer_profiles_engineer', 'engineer_profiles', [['Engineer_ID']]),
+    ('idx_past_performance_engineer_job', 'engineer_past_performance',
+     [['engineer_id'], ['job_description_text'], ['outcome_score']]),
+]
+
+def table_columns(conn, table):
+    """Returns the table's column names keyed by lower case (SQLite names are case-insensitive)."""
+    return {row[1].lower(): row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+
+def create_indexes(conn):
+    """Creates every index in INDEX_DEFINITIONS whose table and columns exist in this database."""
+    created = []
+    for index_name, table, column_options in INDEX_DEFINITIONS:
+        columns = table_columns(conn, table)
+        if not columns:
+            continue
+        resolved = []
+        for options in column_options:
+            match = next((columns[name.lower()] for name in options if name.lower() in columns), None)
+            if match is None:
+                break
+            resolved.append(match)
+        if len(resolved) != len(column_options):
+            print(f"Skipping {index_name}: {table} is missing one of its columns.")
+            continue
+        column_sql = ", ".join(f'"{col}"' for col in resolved)
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON "{table}" ({column_sql})')
+        created.append(index_name)
+    return created
+
+# Natural key of a history row; streaming ingest upserts on it
+HISTORY_KEY_INDEX = 'idx_job_history_job_task'
+
+def create_history_key_index(conn):
+    """Creates the unique (Job_ID, Task_Id) index on job_history. Raises IntegrityError on duplicates."""
+    columns = table_columns(conn, 'job_history')
+    if 'job_id' not in columns or 'task_id' not in columns:
+        return False
+    conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS {HISTORY_KEY_INDEX} '
+                 f'ON job_history ("{columns["job_id"]}", "{columns["task_id"]}")')
+    return True
+
+def ensure_indexes(conn):
+    """
+    Creates whichever indexes from INDEX_DEFINITIONS, plus the history key, are still
+    missing, e.g. because their table did not exist yet when migration 1 ran. Idempotent;
+    migrate_database runs it every time. Returns the names of the indexes it created.
+    """
+    index_names = "SELECT name FROM sqlite_master WHERE type = 'index'"
+    existing = {row[0] for row in conn.execute(index_names)}
+    create_indexes(conn)
+    try:
+        create_history_key_index(conn)
+    except sqlite3.IntegrityError:
+        pass  # Migration 3 reports the duplicates and stays pending until they are gone
+    return sorted({row[0] for row in conn.execute(index_names)} - existing)
+
+# Each migration returns True once fully applied; False leaves it (and every later one)
+# pending, so it is retried on the next run instead of being recorded as done.
+def _migration_add_indexes(conn):
+    created = create_indexes(conn)
+    conn.execute("ANALYZE")  # Give the query planner statistics for the new indexes
+    print(f"Created {len(created)} indexes: {', '.join(created)}")
+    return True
+
+def _migration_add_feature_store(conn):
+    # Seeded from engineer_past_performance, so inference has real features from the start
+    install_feature_store(conn)
+    return True
+
+def _migration_add_history_key(conn):
+    try:
+        create_history_key_index(conn)
+    except sqlite3.IntegrityError:
+        # Leave the data alone; ingest_history reports the duplicates when it needs the key
+        print(f"Cannot add {HISTORY_KEY_INDEX} yet: job_history has duplicate (Job_ID, Task_Id) rows.")
+        return False
+    return True
+
+# --- Versioned migrations, tracked in PRAGMA user_version ---
+MIGRATIONS = [
+    (1, 'secondary indexes for hot queries', _migration_add_indexes),
+    (2, 'engineer_job_features feature store', _migration_add_feature_store),
+    (3, 'unique (Job_ID, Task_Id) key on job_history', _migration_add_history_key),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def migrate_database(db_file=DATABASE_NAME):
+    """
+    Upgrades an existing database in place: switches it to WAL mode and applies every
+    migration newer than its PRAGMA user_version, each in its own transaction. The
+    version only advances past migrations that fully applied. Missing indexes are then
+    created whatever the version. Safe to run repeatedly; returns True when the
+    database is at SCHEMA_VERSION.
+    """
+    conn = create_connection(db_file)
+    if conn is None:
+        return False
+    try:
+        conn.execute("PRAGMA journal_mode = WAL;")
+        current_version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for version, description, migration in MIGRATIONS:
+            if version <= current_version:
+                continue
+            print(f"Applying migration {version}: {description}...")
+            try:
+                conn.execute("BEGIN")
+                if not migration(conn):
+                    conn.rollback()
+                    print(f"Migration {version} is incomplete; it will be retried on the next run.")
+                    break
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.commit()
+                current_version = version
+            except sqlite3.Error as e:
+                conn.rollback()
+                print(f"Migration {version} failed: {e}")
+                return False
+
+        try:
+            conn.execute("BEGIN")
+            created = ensure_indexes(conn)
+            if created:
+                conn.execute("ANALYZE")
+                print(f"Created missing indexes: {', '.join(created)}")
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"Creating missing indexes failed: {e}")
+            return False
+        print(f"{db_file} is at schema version {current_version}.")
+        return current_version >= SCHEMA_VERSION
+    finally:
+        conn.close()
+
 def setup_database():
     # --- This is the new, centralized job_history table schema ---
     sql_create_job_history_table = """
@@ -142,10 +300,18 @@ def setup_database():
         create_table(conn, sql_create_job_task_mapping_table)
         create_table(conn, sql_create_engineer_profiles_table)
         create_table(conn, sql_create_job_card_table)
+        create_table(conn, SQL_CREATE_FEATURE_TABLE)
         conn.close()
+        migrate_database(DATABASE_NAME)
         print("Database setup complete.")
     else:
         print("Error! Cannot create the database connection.")
 
 if __name__ == '__main__':
-    setup_database()
\ No newline at end of file
+    # python core/db_setup.py                -> create tables and indexes in the default database
+    # python core/db_setup.py path/to/a.db   -> upgrade existing databases in place
+    if len(sys.argv) > 1:
+        for db_file in sys.argv[1:]:
+            migrate_database(db_file)
+    else:
+        setup_database()
\ No newline at end of file
@@ -1,110 +1,414 @@
 # In core/engineer_analyzer.py
 import pandas as pd
-import sqlite3
 import os
 import numpy as np
+import sys
+from datetime import datetime
+
+try:
+    from core.db import get_connection
+    from core.db_setup import ENGINEER_COLUMN, table_columns
+except ImportError:  # Running this file directly (python core/engineer_analyzer.py)
+    from db import get_connection
+    from db_setup import ENGINEER_COLUMN, table_columns
 
 # --- Configuration ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(BASE_DIR, 'database/workshop.db')
 
-def calculate_overall_performance(engineer_df):
-    """Calculates a credible Overall_Performance_Score using a weighted average."""
+# Accepted spellings of the task name column in job_history
+TASK_COLUMN = ['Task_to_be_done', 'Task_Description']
+
+# --- Persistent aggregates for incremental profile refreshes ---
+AGGREGATE_TABLE = 'engineer_profile_aggregates'
+WATERMARK_TABLE = 'profile_watermarks'
+
+SQL_CREATE_AGGREGATE_TABLE = f"""
+CREATE TABLE IF NOT EXISTS {AGGREGATE_TABLE} (
+    engineer_id TEXT NOT NULL,
+    scope TEXT NOT NULL,            -- 'overall', 'job' or 'task'
+    name TEXT NOT NULL,             -- Job or task name ('' for overall)
+    score_sum REAL NOT NULL DEFAULT 0,
+    score_count INTEGER NOT NULL DEFAULT 0,
+    time_sum REAL NOT NULL DEFAULT 0,
+    time_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (engineer_id, scope, name)
+) WITHOUT ROWID;
+"""
+
+# Last job_history rowid folded into the aggregates, plus that row's key so a
+# replaced table (rowids restarting) is noticed
+SQL_CREATE_WATERMARK_TABLE = f"""
+CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+    source TEXT PRIMARY KEY,
+    last_rowid INTEGER NOT NULL,
+    last_key TEXT,
+    updated_at TEXT
+);
+"""
+
+def job_score_column(job_name):
+    return f"Overall_{job_name.replace(' ', '_')}_Score"
+
+def task_score_column(task_name):
+    return f"{task_name.replace(' ', '_').replace('(', '').replace(')', '').replace(',', '')}_Score"
+
+def resolve_history_columns(conn):
+    """Returns the (engineer, task) column names this database's job_history uses."""
+    columns = table_columns(conn, 'job_history')
+    engineer_col = next((columns[c.lower()] for c in ENGINEER_COLUMN if c.lower() in columns), None)
+    task_col = next((columns[c.lower()] for c in TASK_COLUMN if c.lower() in columns), None)
+    if engineer_col is None or task_col is None:
+        raise ValueError("job_history has no engineer or task column.")
+    return engineer_col, task_col
+
+PERFORMANCE_WEIGHTS = {'quality': 0.75, 'customer': 0.05, 'timeliness': 0.20}
+
+def overall_performance_scores(quality_scores, customer_rating, avg_completion_time, global_avg_time=None):
+    """
+    Vectorized Overall_Performance_Score. quality_scores is an [engineers, scores] array
+    (NaN = no score); the other two are per-engineer arrays. Returns an int array.
+    """
+    quality_scores = np.asarray(quality_scores, dtype=float)
+    avg_completion_time = np.asarray(avg_completion_time, dtype=float)
+    present = ~np.isnan(quality_scores)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        quality = np.where(present, quality_scores, 0).sum(axis=1) / present.sum(axis=1)
+        normalized_rating = ((np.asarray(customer_rating, dtype=float) - 1) / 4) * 100
+        if global_avg_time is None:
+            global_avg_time = np.nanmean(avg_completion_time)
+        timeliness = np.clip(global_avg_time / avg_completion_time * 75, 0, 100)
+
+    final_score = (quality * PERFORMANCE_WEIGHTS['quality'] + normalized_rating * PERFORMANCE_WEIGHTS['customer']
+                   + timeliness * PERFORMANCE_WEIGHTS['timeliness'])
+    return np.clip(np.round(final_score).astype(int), 0, 100)
+
+def calculate_overall_performance(engineer_df, global_avg_time=None):
+    """
+    Calculates a credible Overall_Performance_Score using a weighted average.
+    global_avg_time defaults to the mean over engineer_df; pass the fleet-wide mean
+    when engineer_df holds only some engineers.
+    """
     print("Calculating credible Overall_Performance_Score...")
     score_columns = [col for col in engineer_df.columns if col.endswith('_Score') and 'Overall_Performance_Score' not in col]
-    
-    engineer_df['Quality_Score'] = engineer_df[score_columns].mean(axis=1)
-    engineer_df['Normalized_Customer_Rating'] = ((engineer_df['Customer_Rating'] - 1) / 4) * 100
-    
-    global_avg_time = engineer_df['Avg_Job_Completion_Time'].mean()
-    speed_factor = global_avg_time / engineer_df['Avg_Job_Completion_Time']
-    
-    engineer_df['Timeliness_Score'] = np.clip(speed_factor * 75, 0, 100)
-    
-    weights = {'quality': 0.75, 'customer': 0.05, 'timeliness': 0.20}
-    final_score = (engineer_df['Quality_Score'] * weights['quality'] + engineer_df['Normalized_Customer_Rating'] * weights['customer'] + engineer_df['Timeliness_Score'] * weights['timeliness'])
-    
-    engineer_df['Overall_Performance_Score'] = np.clip(final_score.round().astype(int), 0, 100)
-    
-    columns_to_drop = ['Quality_Score', 'Normalized_Customer_Rating', 'Timeliness_Score']
-    
-    engineer_df.drop(columns=columns_to_drop, inplace=True, errors='ignore')
+    engineer_df['Overall_Performance_Score'] = overall_performance_scores(
+        engineer_df[score_columns].to_numpy(dtype=float),
+        engineer_df['Customer_Rating'].to_numpy(dtype=float),
+        engineer_df['Avg_Job_Completion_Time'].to_numpy(dtype=float),
+        global_avg_time)
     return engineer_df
 
+def pandas_engineer_scores(df_history, engineer_col='Assigned_Engineer_Id', task_col='Task_to_be_done'):
+    """
+    Reference implementation on an in-memory history frame: per-engineer averages plus
+    one normalized score column per job and per task. Indexed by engineer id.
+    """
+    engineer_stats = df_history.groupby(engineer_col).agg(
+        Avg_Job_Completion_Time=('Time_Taken_minutes', 'mean'),
+        Customer_Rating=('Outcome_Score', 'mean')
+    )
+
+    # Job-level scores
+    job_scores = df_history.groupby([engineer_col, 'Job_Name'])['Outcome_Score'].mean().unstack()
+    job_scores = ((job_scores - 1) / 4) * 100
+    job_scores.columns = [job_score_column(col) for col in job_scores.columns]
+
+    # Task-level scores
+    task_scores = df_history.groupby([engineer_col, task_col])['Outcome_Score'].mean().unstack()
+    task_scores = ((task_scores - 1) / 4) * 100
+    task_scores.columns = [task_score_column(col) for col in task_scores.columns]
+
+    scores = engineer_stats.join(job_scores).join(task_scores)
+    scores.index.name = 'Engineer_Id'
+    return scores
+
+def sql_engineer_scores(conn, completed_only=True):
+    """
+    Same result as pandas_engineer_scores, computed inside SQLite: one GROUP BY with a
+    conditional AVG per job and per task, so only one row per engineer comes back.
+    """
+    engineer_col, task_col = resolve_history_columns(conn)
+    where = f'WHERE "{engineer_col}" IS NOT NULL' + (" AND Status = 'Completed'" if completed_only else "")
+    job_names = [row[0] for row in conn.execute(
+        f"SELECT DISTINCT Job_Name FROM job_history {where} AND Job_Name IS NOT NULL ORDER BY Job_Name")]
+    task_names = [row[0] for row in conn.execute(
+        f'SELECT DISTINCT "{task_col}" FROM job_history {where} AND "{task_col}" IS NOT NULL ORDER BY "{task_col}"')]
+
+    pivots = [f'(AVG(CASE WHEN Job_Name = ? THEN Outcome_Score END) - 1) / 4.0 * 100 AS "{job_score_column(name)}"'
+              for name in job_names]
+    pivots += [f'(AVG(CASE WHEN "{task_col}" = ? THEN Outcome_Score END) - 1) / 4.0 * 100 AS "{task_score_column(name)}"'
+               for name in task_names]
+    query = f"""
+        SELECT "{engineer_col}" AS Engineer_Id,
+               AVG(Time_Taken_minutes) AS Avg_Job_Completion_Time,
+               AVG(Outcome_Score) AS Customer_Rating
+               {''.join(', ' + pivot for pivot in pivots)}
+        FROM job_history {where}
+        GROUP BY "{engineer_col}"
+        ORDER BY "{engineer_col}"
+    """
+    scores = pd.read_sql_query(query, conn, params=job_names + task_names, index_col='Engineer_Id')
+    return scores.astype(float)
+
+def merge_engineer_scores(profiles_df, scores):
+    """Left-joins per-engineer scores onto profile rows and applies the default fills."""
+    updated_df = profiles_df.merge(scores, left_on='Engineer_ID', right_index=True, how='left')
+    score_cols_to_fill = [col for col in updated_df.columns if '_Score' in col]
+    updated_df[score_cols_to_fill] = updated_df[score_cols_to_fill].fillna(75.0)
+    updated_df['Avg_Job_Completion_Time'] = updated_df['Avg_Job_Completion_Time'].fillna(updated_df['Avg_Job_Completion_Time'].mean())
+    updated_df['Customer_Rating'] = updated_df['Customer_Rating'].fillna(3.0)
+    return updated_df
+
 def analyze_and_update_profiles():
     """
-    Reads from the job_history table, calculates performance metrics,
+    Aggregates the job_history table inside SQLite, calculates performance metrics,
     and updates the engineer_profiles table in the database.
     """
     print("--- Starting Engineer Performance Analysis ---")
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection(DB_PATH)
     
     try:
-        # 1. Read all necessary data from the database
-        print("Reading data from database...")
-        df_history = pd.read_sql_query("SELECT * FROM job_history WHERE Status = 'Completed'", conn)
-        df_profiles = pd.read_sql_query("SELECT * FROM engineer_profiles", conn)
-
-        if df_history.empty:
+        # 1. Aggregate per engineer in the database; only one row per engineer is read back
+        print("Calculating performance metrics from history...")
+        scores = sql_engineer_scores(conn)
+        if scores.empty:
             print("Job history is empty. No new data to analyze.")
             return
 
-        # 2. Calculate REAL metrics from the job history data
-        print("Calculating performance metrics from history...")
-        # General stats
-        engineer_stats = df_history.groupby('Assigned_Engineer_Id').agg(
-            Avg_Job_Completion_Time=('Time_Taken_minutes', 'mean'),
-            Customer_Rating=('Outcome_Score', 'mean')
-        ).reset_index()
-
-        # Job-level scores
-        job_scores = df_history.groupby(['Assigned_Engineer_Id', 'Job_Name'])['Outcome_Score'].mean().unstack()
-        job_scores = ((job_scores - 1) / 4) * 100
-        job_scores.columns = [f"Overall_{col.replace(' ', '_')}_Score" for col in job_scores.columns]
-        
-        # Task-level scores
-        task_scores = df_history.groupby(['Assigned_Engineer_Id', 'Task_to_be_done'])['Outcome_Score'].mean().unstack()
-        task_scores = ((task_scores - 1) / 4) * 100
-        task_scores.columns = [f"{col.replace(' ', '_').replace('(', '').replace(')', '').replace(',', '')}_Score" for col in task_scores.columns]
-
-        # 3. Merge calculated scores into the base profiles
+        # 2. Merge calculated scores into the base profiles
         print("Merging calculated scores...")
-        # Start with the original profiles
-        updated_df = pd.merge(df_profiles[['Engineer_ID', 'Engineer_Name']], engineer_stats, left_on='Engineer_ID', right_on='Assigned_Engineer_Id', how='left')
-        updated_df = pd.merge(updated_df, job_scores, left_on='Engineer_ID', right_on='Assigned_Engineer_Id', how='left')
-        updated_df = pd.merge(updated_df, task_scores, left_on='Engineer_ID', right_on='Assigned_Engineer_Id', how='left')
-        
-        # Clean up and fill missing values
-        updated_df.drop(columns=[col for col in updated_df.columns if 'Assigned_Engineer_Id' in str(col)], inplace=True)
-        score_cols_to_fill = [col for col in updated_df.columns if '_Score' in col]
-        updated_df[score_cols_to_fill] = updated_df[score_cols_to_fill].fillna(75.0)
-        updated_df['Avg_Job_Completion_Time'].fillna(updated_df['Avg_Job_Completion_Time'].mean(), inplace=True)
-        updated_df['Customer_Rating'].fillna(3.0, inplace=True)
-        
-        # 4. Calculate the final weighted performance score
+        df_profiles = pd.read_sql_query("SELECT Engineer_ID, Engineer_Name FROM engineer_profiles", conn)
+        updated_df = merge_engineer_scores(df_profiles, scores)
+
+        # 3. Calculate the final weighted performance score
         final_profiles_df = calculate_overall_performance(updated_df)
         
-        # 5. Update the database table
+        # 4. Update the database table, and restart the incremental aggregates from this state
         print("Updating engineer_profiles table in the database...")
-        cursor = conn.cursor()
-        for _, row in final_profiles_df.iterrows():
-            # Prepare the SET part of the SQL query dynamically
-            set_clause = ", ".join([f'"{col}" = ?' for col in final_profiles_df.columns if col != 'Engineer_ID'])
-            values = [row[col] for col in final_profiles_df.columns if col != 'Engineer_ID']
-            values.append(row['Engineer_ID']) # for the WHERE clause
-            
-            sql_update = f"UPDATE engineer_profiles SET {set_clause} WHERE Engineer_ID = ?"
-            cursor.execute(sql_update, values)
-
+        conn.execute("BEGIN IMMEDIATE")
+        write_profiles(conn, final_profiles_df)
+        rebuild_profile_aggregates(conn)
         conn.commit()
         print(f"Successfully updated {len(final_profiles_df)} records in the engineer_profiles table.")
 
     except Exception as e:
+        if conn.in_transaction:
+            conn.rollback()
         print(f"An error occurred during analysis: {e}")
     finally:
         if conn:
             conn.close()
 
+def check_aggregation_parity(db_path=DB_PATH, tolerance=1e-9):
+    """
+    Compares the SQL aggregation and vectorized scoring against the pandas reference
+    on the same database. Returns (ok, report) without writing anything.
+    """
+    conn = get_connection(db_path)
+    try:
+        engineer_col, task_col = resolve_history_columns(conn)
+        df_history = pd.read_sql_query("SELECT * FROM job_history WHERE Status = 'Completed'", conn)
+        expected = pandas_engineer_scores(df_history, engineer_col, task_col)
+        actual = sql_engineer_scores(conn)
+        df_profiles = pd.read_sql_query("SELECT Engineer_ID, Engineer_Name FROM engineer_profiles", conn)
+    finally:
+        conn.close()
+
+    report = {'engineers': len(expected), 'columns': len(expected.columns)}
+    if list(expected.columns) != list(actual.columns) or list(expected.index) != list(actual.index):
+        report['mismatch'] = 'different engineers or score columns'
+        return False, report
+    report['max_abs_diff'] = float(np.nanmax(np.abs(expected.to_numpy(dtype=float) - actual.to_numpy(dtype=float)), initial=0.0))
+    same_missing = bool((expected.isna().to_numpy() == actual.isna().to_numpy()).all())
+
+    # Overall score: the original pandas formula on the reference scores vs the vectorized pass
+    reference = merge_engineer_scores(df_profiles, expected)
+    score_columns = [col for col in reference.columns if col.endswith('_Score')]
+    quality = reference[score_columns].mean(axis=1)
+    speed_factor = reference['Avg_Job_Completion_Time'].mean() / reference['Avg_Job_Completion_Time']
+    final_score = (quality * PERFORMANCE_WEIGHTS['quality']
+                   + ((reference['Customer_Rating'] - 1) / 4) * 100 * PERFORMANCE_WEIGHTS['customer']
+                   + np.clip(speed_factor * 75, 0, 100) * PERFORMANCE_WEIGHTS['timeliness'])
+    expected_overall = np.clip(final_score.round().astype(int), 0, 100).to_numpy()
+    actual_overall = calculate_overall_performance(merge_engineer_scores(df_profiles, actual))['Overall_Performance_Score'].to_numpy()
+    report['overall_score_mismatches'] = int((expected_overall != actual_overall).sum())
+
+    ok = report['max_abs_diff'] <= tolerance and same_missing and report['overall_score_mismatches'] == 0
+    return ok, report
+
+def write_profiles(conn, profiles_df):
+    """Writes profile rows back with one executemany UPDATE (columns missing from the table are skipped)."""
+    profile_columns = table_columns(conn, 'engineer_profiles')
+    columns = [col for col in profiles_df.columns if col != 'Engineer_ID' and col.lower() in profile_columns]
+    set_clause = ", ".join(f'"{profile_columns[col.lower()]}" = ?' for col in columns)
+    values = profiles_df[columns + ['Engineer_ID']].astype(object)
+    values = values.where(values.notna(), None)
+    conn.executemany(f"UPDATE engineer_profiles SET {set_clause} WHERE Engineer_ID = ?",
+                     [tuple(v.item() if hasattr(v, 'item') else v for v in row)
+                      for row in values.itertuples(index=False, name=None)])
+
+def ensure_aggregate_tables(conn):
+    conn.execute(SQL_CREATE_AGGREGATE_TABLE)
+    conn.execute(SQL_CREATE_WATERMARK_TABLE)
+
+def _history_key(conn, rowid):
+    row = conn.execute("SELECT Job_ID || '|' || Task_Id FROM job_history WHERE rowid = ?", (rowid,)).fetchone()
+    return row[0] if row else None
+
+def _fold_history(conn, after_rowid):
+    """
+    Adds completed job_history rows with rowid > after_rowid to the aggregates and moves
+    the watermark. Returns the engineers whose aggregates changed.
+    """
+    engineer_col, task_col = resolve_history_columns(conn)
+    last_rowid = conn.execute("SELECT MAX(rowid) FROM job_history").fetchone()[0] or 0
+    if last_rowid <= after_rowid:
+        return set()
+
+    grouped = conn.execute(f"""
+        WITH new_rows AS (
+            SELECT "{engineer_col}" AS engineer_id, Job_Name, "{task_col}" AS task_name,
+                   Outcome_Score, Time_Taken_minutes
+            FROM job_history
+            WHERE rowid > ? AND rowid <= ? AND Status = 'Completed' AND "{engineer_col}" IS NOT NULL
+        )
+        SELECT engineer_id, 'overall', '', SUM(Outcome_Score), COUNT(Outcome_Score),
+               SUM(Time_Taken_minutes), COUNT(Time_Taken_minutes)
+        FROM new_rows GROUP BY engineer_id
+        UNION ALL
+        SELECT engineer_id, 'job', Job_Name, SUM(Outcome_Score), COUNT(Outcome_Score), 0, 0
+        FROM new_rows WHERE Job_Name IS NOT NULL GROUP BY engineer_id, Job_Name
+        UNION ALL
+        SELECT engineer_id, 'task', task_name, SUM(Outcome_Score), COUNT(Outcome_Score), 0, 0
+        FROM new_rows WHERE task_name IS NOT NULL GROUP BY engineer_id, task_name
+    """, (after_rowid, last_rowid)).fetchall()
+
+    conn.executemany(f"""
+        INSERT INTO {AGGREGATE_TABLE} (engineer_id, scope, name, score_sum, score_count, time_sum, time_count)
+        VALUES (?, ?, ?, COALESCE(?, 0), ?, COALESCE(?, 0), ?)
+        ON CONFLICT (engineer_id, scope, name) DO UPDATE SET
+            score_sum = score_sum + excluded.score_sum,
+            score_count = score_count + excluded.score_count,
+            time_sum = time_sum + excluded.time_sum,
+            time_count = time_count + excluded.time_count
+    """, [tuple(row) for row in grouped])
+
+    conn.execute(f"""
+        INSERT INTO {WATERMARK_TABLE} (source, last_rowid, last_key, updated_at) VALUES ('job_history', ?, ?, ?)
+        ON CONFLICT (source) DO UPDATE SET
+            last_rowid = excluded.last_rowid, last_key = excluded.last_key, updated_at = excluded.updated_at
+    """, (last_rowid, _history_key(conn, last_rowid), datetime.now().isoformat(sep=' ', timespec='seconds')))
+    return {row[0] for row in grouped}
+
+def rebuild_profile_aggregates(conn):
+    """Recomputes the aggregates from the whole of job_history. The caller commits."""
+    ensure_aggregate_tables(conn)
+    conn.execute(f"DELETE FROM {AGGREGATE_TABLE}")
+    conn.execute(f"DELETE FROM {WATERMARK_TABLE} WHERE source = 'job_history'")
+    return _fold_history(conn, 0)
+
+def profiles_from_aggregates(conn, engineer_ids):
+    """
+    Builds profile rows for engineer_ids from the aggregates, with the same columns
+    and fill rules as the full analysis, scored against the fleet-wide average time.
+    """
+    profiled = pd.read_sql_query("SELECT Engineer_ID, Engineer_Name FROM engineer_profiles", conn)
+
+    # Every job/task name any engineer has done becomes a score column (as unstack() would)
+    names = conn.execute(f"SELECT DISTINCT scope, name FROM {AGGREGATE_TABLE} WHERE scope != 'overall'").fetchall()
+    job_columns = {name: job_score_column(name) for scope, name in names if scope == 'job'}
+    task_columns = {name: task_score_column(name) for scope, name in names if scope == 'task'}
+
+    # Fleet-wide mean completion time over profiled engineers with history (O(engineers))
+    fleet = pd.read_sql_query(f"""
+        SELECT time_sum * 1.0 / time_count AS avg_time FROM {AGGREGATE_TABLE}
+        WHERE scope = 'overall' AND time_count > 0
+          AND engineer_id IN (SELECT Engineer_ID FROM engineer_profiles)
+    """, conn)
+    global_avg_time = fleet['avg_time'].mean()
+
+    engineer_ids = [eng for eng in engineer_ids if eng in set(profiled['Engineer_ID'])]
+    if not engineer_ids:
+        return pd.DataFrame()
+    placeholders = ", ".join("?" for _ in engineer_ids)
+    rows = pd.read_sql_query(f"""
+        SELECT engineer_id, scope, name, score_sum, score_count, time_sum, time_count
+        FROM {AGGREGATE_TABLE} WHERE engineer_id IN ({placeholders})
+    """, conn, params=engineer_ids)
+
+    profiles = profiled[profiled['Engineer_ID'].isin(engineer_ids)].set_index('Engineer_ID')
+    overall = rows[rows['scope'] == 'overall'].set_index('engineer_id')
+    profiles['Avg_Job_Completion_Time'] = (overall['time_sum'] / overall['time_count'].replace(0, np.nan))
+    profiles['Customer_Rating'] = (overall['score_sum'] / overall['score_count'].replace(0, np.nan))
+    for scope, columns in (('job', job_columns), ('task', task_columns)):
+        scoped = rows[rows['scope'] == scope]
+        means = (scoped['score_sum'] / scoped['score_count'].replace(0, np.nan)).groupby(
+            [scoped['engineer_id'], scoped['name']]).first().unstack()
+        for name, column in columns.items():
+            profiles[column] = ((means[name] - 1) / 4) * 100 if name in means.columns else np.nan
+
+    score_cols_to_fill = [col for col in profiles.columns if '_Score' in col]
+    profiles[score_cols_to_fill] = profiles[score_cols_to_fill].fillna(75.0)
+    profiles['Avg_Job_Completion_Time'] = profiles['Avg_Job_Completion_Time'].fillna(global_avg_time)
+    profiles['Customer_Rating'] = profiles['Customer_Rating'].fillna(3.0)
+    return calculate_overall_performance(profiles.reset_index(), global_avg_time=global_avg_time)
+
+def refresh_profiles_incremental(db_path=DB_PATH):
+    """
+    Folds job_history rows added since the last refresh into the stored aggregates and
+    recomputes profiles only for the engineers those rows touch, in one transaction.
+    Cost scales with the new rows, not the size of job_history.
+
+    Timeliness is scored against the fleet-wide mean time, which new rows move
+    slightly; engineers without new rows keep their previous score until the next
+    full run (a difference of at most a point or so).
+
+    Rows are tracked by rowid, so edits to already-folded rows (e.g. an upsert that
+    rewrites an outcome) need a full analyze_and_update_profiles(). A replaced
+    job_history table is detected and triggers a rebuild of the aggregates.
+    """
+    print("--- Incremental Engineer Profile Refresh ---")
+    conn = get_connection(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        ensure_aggregate_tables(conn)
+        watermark = conn.execute(
+            f"SELECT last_rowid, last_key FROM {WATERMARK_TABLE} WHERE source = 'job_history'").fetchone()
+
+        if watermark is None or _history_key(conn, watermark[0]) != watermark[1]:
+            print("No valid watermark (first run or job_history was replaced); rebuilding aggregates...")
+            affected = rebuild_profile_aggregates(conn)
+        else:
+            affected = _fold_history(conn, watermark[0])
+
+        if not affected:
+            conn.commit()
+            print("No new job history since the last refresh.")
+            return []
+
+        profiles = profiles_from_aggregates(conn, sorted(affected))
+        if not profiles.empty:
+            write_profiles(conn, profiles)
+        conn.commit()
+        print(f"Refreshed {len(profiles)} engineer profiles.")
+        return sorted(profiles['Engineer_ID']) if not profiles.empty else []
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
 if __name__ == '__main__':
-    analyze_and_update_profiles()
+    # python core/engineer_analyzer.py                -> full recompute from job_history
+    # python core/engineer_analyzer.py --incremental  -> only fold in rows added since the last run
+    # python core/engineer_analyzer.py --parity       -> check SQL aggregation against the pandas version
+    if '--incremental' in sys.argv:
+        refresh_profiles_incremental()
+    elif '--parity' in sys.argv:
+        ok, report = check_aggregation_parity()
+        print(report)
+        print("Parity:", "OK" if ok else "MISMATCH")
+        sys.exit(0 if ok else 1)
+    else:
+        analyze_and_update_profiles()
     print("\nAnalysis process complete.")
\ No newline at end of file
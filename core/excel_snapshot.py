@@ -0,0 +1,164 @@
+# In core/excel_snapshot.py
+import hashlib
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+# Columnar snapshots of the Excel data sources.
+# The first read of a workbook parses it with openpyxl and writes one .npy file per
+# column plus a manifest; later reads load the .npy files (memory-mapped) instead.
+# A snapshot is reused while the source's mtime and size are unchanged, or, if only
+# the mtime moved, while its content hash still matches.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_DIR = os.path.join(BASE_DIR, 'data', '.snapshots')
+MANIFEST_NAME = 'manifest.json'
+SNAPSHOT_FORMAT = 1
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def snapshot_path_for(source_path, sheet_name=0, snapshot_dir=SNAPSHOT_DIR):
+    """Directory holding the snapshot of one sheet of one workbook."""
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(snapshot_dir, f"{stem}__{sheet_name}")
+
+
+def _read_manifest(snapshot_path):
+    try:
+        with open(os.path.join(snapshot_path, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('format') == SNAPSHOT_FORMAT else None
+
+
+def _write_manifest(snapshot_path, manifest):
+    tmp_path = os.path.join(snapshot_path, f"{MANIFEST_NAME}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, os.path.join(snapshot_path, MANIFEST_NAME))
+
+
+def _save_column(snapshot_path, prefix, index, series):
+    """Writes one column as .npy file(s) and returns its manifest entry."""
+    entry = {'name': series.name, 'dtype': str(series.dtype)}
+    base = f"{prefix}_{index}"
+    if pd.api.types.is_bool_dtype(series.dtype) or (
+            pd.api.types.is_numeric_dtype(series.dtype) and isinstance(series.dtype, np.dtype)):
+        entry.update(kind='numeric', values=f"{base}.npy")
+        np.save(os.path.join(snapshot_path, entry['values']), series.to_numpy())
+    elif isinstance(series.dtype, np.dtype) and series.dtype.kind == 'M':
+        entry.update(kind='datetime', values=f"{base}.npy")
+        np.save(os.path.join(snapshot_path, entry['values']), series.to_numpy().view('i8'))
+    else:
+        # Strings and other objects: integer codes plus the distinct values (-1 = missing)
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        uniques = np.asarray(uniques, dtype=object)
+        text_only = all(isinstance(value, str) for value in uniques)
+        entry.update(kind='factorized', codes=f"{base}_codes.npy", uniques=f"{base}_uniques.npy",
+                     text_only=text_only)
+        np.save(os.path.join(snapshot_path, entry['codes']), codes.astype(np.int32))
+        np.save(os.path.join(snapshot_path, entry['uniques']),
+                uniques.astype(str) if text_only else uniques, allow_pickle=not text_only)
+    return entry
+
+
+def _load_column(snapshot_path, entry, mmap_mode):
+    def load(name, allow_pickle=False):
+        # asarray drops the np.memmap subclass but keeps the mapping
+        return np.asarray(np.load(os.path.join(snapshot_path, name),
+                                  mmap_mode=None if allow_pickle else mmap_mode, allow_pickle=allow_pickle))
+
+    if entry['kind'] == 'numeric':
+        return pd.Series(load(entry['values']), name=entry['name'], dtype=entry['dtype'], copy=False)
+    if entry['kind'] == 'datetime':
+        return pd.Series(load(entry['values']).view(entry['dtype']), name=entry['name'], copy=False)
+
+    codes = load(entry['codes'])
+    uniques = load(entry['uniques'], allow_pickle=not entry['text_only']).astype(object)
+    values = uniques.take(np.maximum(codes, 0)) if len(uniques) else np.empty(len(codes), dtype=object)
+    values[codes < 0] = np.nan
+    return pd.Series(values, name=entry['name'], dtype=entry['dtype'])
+
+
+def write_snapshot(df, source_path, sheet_name=0, snapshot_dir=SNAPSHOT_DIR, source_hash=None):
+    """Stores df as the columnar snapshot of source_path and returns the manifest."""
+    snapshot_path = snapshot_path_for(source_path, sheet_name, snapshot_dir)
+    os.makedirs(snapshot_path, exist_ok=True)
+    old_manifest = _read_manifest(snapshot_path)
+
+    # New column files get a fresh prefix so readers of the old manifest never see a half-written file
+    prefix = uuid.uuid4().hex[:12]
+    stat = os.stat(source_path)
+    manifest = {
+        'format': SNAPSHOT_FORMAT,
+        'source': os.path.abspath(source_path),
+        'sheet_name': sheet_name,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': source_hash or file_sha256(source_path),
+        'rows': len(df),
+        'columns': [_save_column(snapshot_path, prefix, i, df[col]) for i, col in enumerate(df.columns)],
+    }
+    _write_manifest(snapshot_path, manifest)
+
+    if old_manifest:
+        for entry in old_manifest['columns']:
+            for key in ('values', 'codes', 'uniques'):
+                if key in entry:
+                    try:
+                        os.remove(os.path.join(snapshot_path, entry[key]))
+                    except OSError:
+                        pass
+    return manifest
+
+
+def load_snapshot(source_path, sheet_name=0, snapshot_dir=SNAPSHOT_DIR, mmap_mode='c'):
+    """Returns the snapshot DataFrame if it is still valid for source_path, else None."""
+    snapshot_path = snapshot_path_for(source_path, sheet_name, snapshot_dir)
+    manifest = _read_manifest(snapshot_path)
+    if manifest is None:
+        return None
+
+    stat = os.stat(source_path)
+    if (stat.st_mtime_ns, stat.st_size) != (manifest['mtime_ns'], manifest['size']):
+        # Touched or copied but maybe not changed: fall back to the content hash
+        if stat.st_size != manifest['size'] or file_sha256(source_path) != manifest['sha256']:
+            return None
+        manifest['mtime_ns'] = stat.st_mtime_ns
+        _write_manifest(snapshot_path, manifest)
+
+    try:
+        columns = [_load_column(snapshot_path, entry, mmap_mode) for entry in manifest['columns']]
+    except (OSError, ValueError):
+        return None  # Incomplete or corrupted snapshot; rebuilt by the caller
+    if not columns:
+        return pd.DataFrame(index=range(manifest['rows']))
+    return pd.concat(columns, axis=1)
+
+
+def read_excel_cached(source_path, sheet_name=0, snapshot_dir=SNAPSHOT_DIR, mmap_mode='c'):
+    """
+    Drop-in replacement for pd.read_excel(source_path, sheet_name=sheet_name) that
+    goes through the columnar snapshot. Raises FileNotFoundError like read_excel.
+    """
+    df = load_snapshot(source_path, sheet_name, snapshot_dir, mmap_mode)
+    if df is not None:
+        return df
+
+    source_hash = file_sha256(source_path)
+    df = pd.read_excel(source_path, sheet_name=sheet_name)
+    try:
+        write_snapshot(df, source_path, sheet_name, snapshot_dir, source_hash)
+    except OSError as e:
+        print(f"Warning: could not write snapshot for {source_path}: {e}")
+    return df
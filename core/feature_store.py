@@ -0,0 +1,162 @@
+# In core/feature_store.py
+import sqlite3
+from datetime import datetime
+import pandas as pd
+
+# --- Running per-(engineer, job/task type) outcome aggregates ---
+# Both training (predictive_model.py) and inference (job_assigner.py) read the
+# engineer's job-specific average score and experience count from this table,
+# so the two always see exactly the same feature values.
+FEATURE_TABLE = 'engineer_job_features'
+SOURCE_TABLE = 'engineer_past_performance'
+FEATURE_TRIGGER = 'trg_past_performance_features'
+
+SQL_CREATE_FEATURE_TABLE = f"""
+CREATE TABLE IF NOT EXISTS {FEATURE_TABLE} (
+    engineer_id TEXT NOT NULL,
+    job_type TEXT NOT NULL,
+    score_sum REAL NOT NULL DEFAULT 0,
+    score_count INTEGER NOT NULL DEFAULT 0,
+    last_updated DATETIME,
+    PRIMARY KEY (engineer_id, job_type)
+) WITHOUT ROWID;
+"""
+
+# Folds every row inserted into engineer_past_performance into the store, whoever writes it
+SQL_CREATE_FEATURE_TRIGGER = f"""
+CREATE TRIGGER IF NOT EXISTS {FEATURE_TRIGGER}
+AFTER INSERT ON {SOURCE_TABLE}
+WHEN NEW.outcome_score IS NOT NULL AND NEW.engineer_id IS NOT NULL AND NEW.job_description_text IS NOT NULL
+BEGIN
+    INSERT INTO {FEATURE_TABLE} (engineer_id, job_type, score_sum, score_count, last_updated)
+    VALUES (NEW.engineer_id, NEW.job_description_text, NEW.outcome_score, 1, datetime('now', 'localtime'))
+    ON CONFLICT (engineer_id, job_type) DO UPDATE SET
+        score_sum = score_sum + excluded.score_sum,
+        score_count = score_count + 1,
+        last_updated = excluded.last_updated;
+END;
+"""
+
+def install_feature_store(conn):
+    """
+    Creates the table and, if engineer_past_performance exists but is not wired to it yet,
+    folds that table's rows in and adds the insert trigger that keeps the store in step.
+    Existing totals (e.g. from record_outcome) are added to, never reset. The caller owns
+    the transaction.
+    """
+    conn.execute(SQL_CREATE_FEATURE_TABLE)
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SOURCE_TABLE,)).fetchone():
+        fold_source_rows(conn)
+        conn.execute(SQL_CREATE_FEATURE_TRIGGER)
+
+def fold_source_rows(conn):
+    """
+    Adds every engineer_past_performance row to the store with one grouped upsert, unless
+    the trigger is already installed (those rows are in the store then). The trigger check
+    is part of the INSERT, so two processes installing at once cannot both fold.
+    """
+    conn.execute(f"""
+        INSERT INTO {FEATURE_TABLE} (engineer_id, job_type, score_sum, score_count, last_updated)
+        SELECT engineer_id, job_description_text, SUM(outcome_score), COUNT(outcome_score), ?
+        FROM {SOURCE_TABLE}
+        WHERE outcome_score IS NOT NULL AND engineer_id IS NOT NULL AND job_description_text IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?)
+        GROUP BY engineer_id, job_description_text
+        ON CONFLICT (engineer_id, job_type) DO UPDATE SET
+            score_sum = score_sum + excluded.score_sum,
+            score_count = score_count + excluded.score_count,
+            last_updated = excluded.last_updated
+    """, (datetime.now().isoformat(sep=' ', timespec='seconds'), FEATURE_TRIGGER))
+
+def ensure_feature_table(conn):
+    """
+    Makes sure the feature store is usable: creates and seeds it if it is missing, or folds
+    engineer_past_performance in and installs the trigger if that table is not wired to it
+    yet (e.g. it was created after the store). Commits only if it had to write and no
+    transaction was open.
+    """
+    present = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE name IN (?, ?, ?)", (FEATURE_TABLE, SOURCE_TABLE, FEATURE_TRIGGER))}
+    if FEATURE_TABLE in present and (SOURCE_TABLE not in present or FEATURE_TRIGGER in present):
+        return
+    in_transaction = conn.in_transaction
+    install_feature_store(conn)
+    if not in_transaction:
+        conn.commit()
+
+def record_outcome(conn, engineer_id, job_type, outcome_score):
+    """
+    Folds one new outcome into the engineer's running sum and count for a job/task type.
+    This is a single-row upsert, so it costs the same no matter how much history exists.
+    The caller owns the transaction and commits it.
+    """
+    if engineer_id is None or job_type is None or outcome_score is None:
+        return
+    conn.execute(f"""
+        INSERT INTO {FEATURE_TABLE} (engineer_id, job_type, score_sum, score_count, last_updated)
+        VALUES (?, ?, ?, 1, ?)
+        ON CONFLICT (engineer_id, job_type) DO UPDATE SET
+            score_sum = score_sum + excluded.score_sum,
+            score_count = score_count + 1,
+            last_updated = excluded.last_updated
+    """, (engineer_id, job_type, float(outcome_score), datetime.now().isoformat(sep=' ', timespec='seconds')))
+
+def get_job_features(conn, engineer_ids, job_type):
+    """
+    Point-reads the job-specific average score and experience count for each engineer.
+    Returns a dict of engineer_id -> (avg_score, exp_count); engineers without history are absent.
+    """
+    if not engineer_ids:
+        return {}
+    ensure_feature_table(conn)
+    placeholders = ", ".join("?" for _ in engineer_ids)
+    rows = conn.execute(f"""
+        SELECT engineer_id, score_sum, score_count
+        FROM {FEATURE_TABLE}
+        WHERE job_type = ? AND engineer_id IN ({placeholders})
+    """, (job_type, *engineer_ids)).fetchall()
+    return {
+        row[0]: (row[1] / row[2] if row[2] else None, row[2])
+        for row in rows
+    }
+
+def rebuild_feature_store(conn, commit=True):
+    """
+    Recomputes the whole table from engineer_past_performance, e.g. after rows there
+    were edited or deleted. Totals added by record_outcome without a matching row are
+    dropped; otherwise the store is kept up to date by the insert trigger and record_outcome.
+    """
+    conn.execute(SQL_CREATE_FEATURE_TABLE)
+    conn.execute(f"DELETE FROM {FEATURE_TABLE}")
+    conn.execute(f"""
+        INSERT INTO {FEATURE_TABLE} (engineer_id, job_type, score_sum, score_count, last_updated)
+        SELECT engineer_id, job_description_text, SUM(outcome_score), COUNT(outcome_score), ?
+        FROM engineer_past_performance
+        WHERE outcome_score IS NOT NULL
+        GROUP BY engineer_id, job_description_text
+    """, (datetime.now().isoformat(sep=' ', timespec='seconds'),))
+    if commit:
+        conn.commit()
+    count = conn.execute(f"SELECT COUNT(*) FROM {FEATURE_TABLE}").fetchone()[0]
+    print(f"Feature store rebuilt with {count} engineer/job-type rows.")
+
+def load_feature_frame(conn):
+    """
+    Returns the feature store as a DataFrame with the column names used in training:
+    engineer_id, job_description_text, eng_job_specific_avg_score, eng_job_specific_exp_count.
+    Seeds the store from engineer_past_performance first if it was never seeded.
+    """
+    try:
+        ensure_feature_table(conn)
+    except sqlite3.Error as e:
+        print(f"Could not seed the feature store: {e}")
+
+    return pd.read_sql_query(f"""
+        SELECT
+            engineer_id,
+            job_type AS job_description_text,
+            score_sum / score_count AS eng_job_specific_avg_score,
+            score_count AS eng_job_specific_exp_count
+        FROM {FEATURE_TABLE}
+        WHERE score_count > 0
+    """, conn)
@@ -1,8 +1,20 @@
 import sqlite3
 import os
 import pandas as pd
-import joblib # For loading the model
 import random
+import time
+import numpy as np
+
+try:
+    from core.model_registry import get_model_registry
+    from core.feature_store import get_job_features
+    from core.db import get_connection
+    from core.compiled_scorer import LinearScorer
+except ImportError:  # Running this file directly (python core/job_assigner.py)
+    from model_registry import get_model_registry
+    from feature_store import get_job_features
+    from db import get_connection
+    from compiled_scorer import LinearScorer
 
 # Database path
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # garage_ai_assigner directory
@@ -11,28 +23,27 @@ DATABASE_NAME = os.path.join(BASE_DIR, 'database', 'workshop.db')
 # Model path (should match where predictive_model.py saved it)
 MODEL_DIR = os.path.join(BASE_DIR, 'models')
 MODEL_FILE_PATH = os.path.join(MODEL_DIR, 'job_success_model.joblib')
+SCORER_FILE_PATH = os.path.join(MODEL_DIR, 'job_success_scorer.npz')
 
 
 def get_db_connection():
-    """Establishes a connection to the SQLite database."""
-    conn = sqlite3.connect(DATABASE_NAME)
-    conn.row_factory = sqlite3.Row # Allows accessing columns by name
-    conn.execute("PRAGMA foreign_keys = ON;")
-    return conn
+    """Returns a pooled connection to the SQLite database (rows accessible by name, foreign keys enforced)."""
+    return get_connection(DATABASE_NAME)
 
 def load_model():
-    """Loads the trained model pipeline from disk."""
-    if os.path.exists(MODEL_FILE_PATH):
-        try:
-            model_pipeline = joblib.load(MODEL_FILE_PATH)
-            print(f"Model pipeline loaded successfully from {MODEL_FILE_PATH}")
-            return model_pipeline
-        except Exception as e:
-            print(f"Error loading model: {e}")
-            return None
-    else:
-        print(f"Model file not found at {MODEL_FILE_PATH}. Train the model first using predictive_model.py.")
-        return None
+    """Returns the trained model pipeline from the process-wide model registry."""
+    return get_model_registry(MODEL_FILE_PATH).get()
+
+def load_scorer():
+    """
+    Returns the compiled NumPy scorer if predictive_model exported one, else the model
+    pipeline. Both have predict_proba, so score_candidates_batch accepts either.
+    """
+    if os.path.exists(SCORER_FILE_PATH):
+        scorer = get_model_registry(SCORER_FILE_PATH, LinearScorer.load).get()
+        if scorer is not None:
+            return scorer
+    return load_model()
 
 def get_pending_job_details(conn, vehicle_job_id):
     """Fetches details for a specific pending job."""
@@ -72,112 +83,194 @@ def get_available_engineers(conn):
 
 def get_engineer_specific_job_history(conn, engineer_id, job_description_text):
     """
-    Fetches an engineer's average score and experience count for a specific job type.
+    Fetches an engineer's average score and experience count for a specific job type
+    from the feature store.
     """
-    cursor = conn.cursor()
-    query = """
-    SELECT 
-        AVG(outcome_score) as eng_job_specific_avg_score,
-        COUNT(performance_id) as eng_job_specific_exp_count
-    FROM 
-        engineer_past_performance
-    WHERE 
-        engineer_id = ? AND job_description_text = ?; 
-        -- Assuming job_description_text in past_performance matches job_definitions.job_name
-    """
-    cursor.execute(query, (engineer_id, job_description_text))
-    history = cursor.fetchone()
-    
-    avg_score = history['eng_job_specific_avg_score'] if history and history['eng_job_specific_avg_score'] is not None else None
-    exp_count = history['eng_job_specific_exp_count'] if history and history['eng_job_specific_exp_count'] is not None else 0
-    
-    return avg_score, exp_count
+    history = get_job_features(conn, [engineer_id], job_description_text)
+    return history.get(engineer_id, (None, 0))
 
-def assign_job_to_engineer(target_vehicle_job_id):
+def get_engineer_job_histories(conn, engineer_ids, job_description_text):
     """
-    Main logic to assign a target pending job to the best available engineer.
+    Fetches the average score and experience count for a specific job type for
+    many engineers at once, as indexed point reads on the feature store.
+    Returns a dict of engineer_id -> (avg_score, exp_count).
     """
-    conn = get_db_connection()
-    if conn is None: return
+    return get_job_features(conn, engineer_ids, job_description_text)
 
-    model_pipeline = load_model()
-    if model_pipeline is None: return
+def build_candidate_features(job_to_assign, available_engineers, histories):
+    """
+    Builds one feature row per candidate engineer for the given job.
+    The columns and missing-value rules mirror preprocess_data in predictive_model.py.
+    """
+    engineer_ids = []
+    general_scores = []
+    specific_avg_scores = []
+    specific_exp_counts = []
 
-    job_to_assign = get_pending_job_details(conn, target_vehicle_job_id)
-    if not job_to_assign:
-        conn.close()
-        return
+    for engineer in available_engineers:
+        engineer_id = engineer['engineer_id']
+        engineer_general_score = engineer['overall_past_job_score']
+        specific_avg_score, specific_exp_count = histories.get(engineer_id, (None, 0))
 
-    available_engineers = get_available_engineers(conn)
-    if not available_engineers:
-        print("No engineers are currently available.")
-        conn.close()
-        return
+        # Fill missing specific scores (e.g., if first time for this job type)
+        if specific_avg_score is None:
+            specific_avg_score = engineer_general_score  # Use general score if no specific history
+            if specific_avg_score is None: specific_avg_score = 3.0 # Fallback if general also missing (avg score)
 
+        engineer_ids.append(engineer_id)
+        general_scores.append(engineer_general_score if engineer_general_score is not None else 3.0)
+        specific_avg_scores.append(specific_avg_score)
+        specific_exp_counts.append(specific_exp_count if specific_exp_count is not None else 0)
+
+    n_candidates = len(engineer_ids)
+    job_estimated_time = job_to_assign['job_estimated_time'] if job_to_assign['job_estimated_time'] is not None else 60
+    feature_df = pd.DataFrame({
+        'job_description_text': [job_to_assign['job_description_text']] * n_candidates,
+        'vehicle_make': [job_to_assign['vehicle_make']] * n_candidates,
+        'engineer_general_score': general_scores,
+        'job_estimated_time': [job_estimated_time] * n_candidates,
+        'eng_job_specific_avg_score': specific_avg_scores,
+        'eng_job_specific_exp_count': specific_exp_counts
+    })
+    return engineer_ids, feature_df
+
+def score_candidates_batch(conn, model_pipeline, job_to_assign, available_engineers):
+    """
+    Scores every available engineer for a job with one history query and one
+    predict_proba call. Returns the candidates ranked by probability and timing stats.
+    """
+    start = time.perf_counter()
+    engineer_ids = [engineer['engineer_id'] for engineer in available_engineers]
+    histories = get_engineer_job_histories(conn, engineer_ids, job_to_assign['job_description_text'])
+    query_done = time.perf_counter()
+
+    engineer_ids, feature_df = build_candidate_features(job_to_assign, available_engineers, histories)
+    features_done = time.perf_counter()
+
+    probabilities = model_pipeline.predict_proba(feature_df)[:, 1]
+    predict_done = time.perf_counter()
+
+    ranked_candidates = [
+        {'engineer_id': engineer_ids[i], 'probability': float(probabilities[i])}
+        for i in np.argsort(-probabilities, kind='stable')
+    ]
+    stats = {
+        'n_candidates': len(ranked_candidates),
+        'query_ms': (query_done - start) * 1000,
+        'features_ms': (features_done - query_done) * 1000,
+        'predict_ms': (predict_done - features_done) * 1000,
+        'total_ms': (predict_done - start) * 1000
+    }
+    return ranked_candidates, stats
+
+def score_candidates_per_engineer(conn, model_pipeline, job_to_assign, available_engineers):
+    """
+    Scores engineers one at a time (one query and one predict_proba call each).
+    Kept as the reference path for comparing against score_candidates_batch.
+    """
+    start = time.perf_counter()
     engineer_predictions = []
 
     for engineer in available_engineers:
         engineer_id = engineer['engineer_id']
-        engineer_general_score = engineer['overall_past_job_score']
-        
-        # Get engineer's specific history for this job type
-        # job_to_assign['job_description_text'] should be the key used in training
         specific_avg_score, specific_exp_count = get_engineer_specific_job_history(
             conn, engineer_id, job_to_assign['job_description_text']
         )
+        _, sample_df = build_candidate_features(
+            job_to_assign, [engineer], {engineer_id: (specific_avg_score, specific_exp_count)}
+        )
 
-        # Fill missing specific scores (e.g., if first time for this job type)
-        # This logic should mirror what was done in preprocess_data in predictive_model.py
-        if specific_avg_score is None:
-            specific_avg_score = engineer_general_score  # Use general score if no specific history
-            if specific_avg_score is None: specific_avg_score = 3.0 # Fallback if general also missing (avg score)
-        if specific_exp_count is None: # Should be 0 from query if no records
-            specific_exp_count = 0
-
-        # Construct feature DataFrame for prediction (must match training structure)
-        # The model pipeline's preprocessor expects a DataFrame.
-        feature_data = {
-            'job_description_text': [job_to_assign['job_description_text']],
-            'vehicle_make': [job_to_assign['vehicle_make']], # Ensure this was used in training
-            'engineer_general_score': [engineer_general_score if engineer_general_score is not None else 3.0],
-            'job_estimated_time': [job_to_assign['job_estimated_time'] if job_to_assign['job_estimated_time'] is not None else 60],
-            'eng_job_specific_avg_score': [specific_avg_score],
-            'eng_job_specific_exp_count': [specific_exp_count]
-            # Add other features if they were used in training, matching column names.
-        }
-        # Ensure all columns expected by the preprocessor are present.
-        # The preprocessor in the pipeline will handle one-hot encoding, scaling etc.
-        # Check your predictive_model.py for the exact feature set `X.columns` before preprocessor.
-        
-        # For this example, ensure feature_data keys match the original columns fed to ColumnTransformer
-        # Original features used in ColumnTransformer (from predictive_model.py):
-        # categorical_features = ['job_description_text', 'vehicle_make']
-        # numerical_features = ['engineer_general_score', 'job_estimated_time', 
-        #                       'eng_job_specific_avg_score', 'eng_job_specific_exp_count']
-        # So the DataFrame should have these columns.
-        
-        sample_df = pd.DataFrame(feature_data)
-        
         try:
             # Predict probability of "High Success" (class 1)
             probability_high_success = model_pipeline.predict_proba(sample_df)[:, 1][0]
             engineer_predictions.append({
                 'engineer_id': engineer_id,
-                'probability': probability_high_success
+                'probability': float(probability_high_success)
             })
-            print(f"  Engineer {engineer_id}: Predicted Success Probability = {probability_high_success:.4f}")
         except Exception as e:
             print(f"  Error predicting for engineer {engineer_id}: {e}. Check feature consistency.")
-            print(f"  Features provided: {feature_data}")
+            print(f"  Features provided: {sample_df.to_dict(orient='records')}")
+
+    engineer_predictions.sort(key=lambda x: x['probability'], reverse=True)
+    stats = {
+        'n_candidates': len(engineer_predictions),
+        'total_ms': (time.perf_counter() - start) * 1000
+    }
+    return engineer_predictions, stats
+
+def compare_scoring_paths(target_vehicle_job_id, repeats=5):
+    """
+    Times the per-engineer scoring loop against the batch path for one pending job
+    and checks that both produce the same ranking.
+    """
+    conn = get_db_connection()
+    model_pipeline = load_model()
+    if model_pipeline is None:
+        conn.close()
+        return None
+
+    job_to_assign = get_pending_job_details(conn, target_vehicle_job_id)
+    available_engineers = get_available_engineers(conn) if job_to_assign else []
+    if not available_engineers:
+        conn.close()
+        return None
 
+    loop_times, batch_times = [], []
+    for _ in range(repeats):
+        loop_ranking, loop_stats = score_candidates_per_engineer(conn, model_pipeline, job_to_assign, available_engineers)
+        batch_ranking, batch_stats = score_candidates_batch(conn, model_pipeline, job_to_assign, available_engineers)
+        loop_times.append(loop_stats['total_ms'])
+        batch_times.append(batch_stats['total_ms'])
+    conn.close()
+
+    same_ranking = [p['engineer_id'] for p in loop_ranking] == [p['engineer_id'] for p in batch_ranking]
+    result = {
+        'n_candidates': batch_stats['n_candidates'],
+        'loop_ms': float(np.median(loop_times)),
+        'batch_ms': float(np.median(batch_times)),
+        'same_ranking': same_ranking
+    }
+    result['speedup'] = result['loop_ms'] / result['batch_ms'] if result['batch_ms'] else float('inf')
+    print(f"Scored {result['n_candidates']} engineers: loop {result['loop_ms']:.2f} ms, "
+          f"batch {result['batch_ms']:.2f} ms ({result['speedup']:.1f}x), same ranking: {same_ranking}")
+    return result
+
+def assign_job_to_engineer(target_vehicle_job_id):
+    """
+    Main logic to assign a target pending job to the best available engineer.
+    """
+    conn = get_db_connection()
+    if conn is None: return
+
+    model_pipeline = load_scorer()
+    if model_pipeline is None: return
+
+    job_to_assign = get_pending_job_details(conn, target_vehicle_job_id)
+    if not job_to_assign:
+        conn.close()
+        return
+
+    available_engineers = get_available_engineers(conn)
+    if not available_engineers:
+        print("No engineers are currently available.")
+        conn.close()
+        return
+
+    try:
+        # Score all candidates in one query and one predict_proba call
+        engineer_predictions, scoring_stats = score_candidates_batch(conn, model_pipeline, job_to_assign, available_engineers)
+    except Exception as e:
+        print(f"  Error predicting for available engineers: {e}. Check feature consistency.")
+        engineer_predictions = []
 
     if not engineer_predictions:
         print("Could not make predictions for any engineer.")
         conn.close()
         return
 
-    # Sort engineers by probability in descending order
-    engineer_predictions.sort(key=lambda x: x['probability'], reverse=True)
+    for prediction in engineer_predictions:
+        print(f"  Engineer {prediction['engineer_id']}: Predicted Success Probability = {prediction['probability']:.4f}")
+    print(f"  Scored {scoring_stats['n_candidates']} engineers in {scoring_stats['total_ms']:.2f} ms")
 
     best_engineer = None
     if engineer_predictions:
@@ -2,6 +2,11 @@ import sqlite3
 import os
 from datetime import datetime
 
+try:
+    from core.db import get_connection
+except ImportError:  # Running this file directly (python core/job_card_creator.py)
+    from db import get_connection
+
 # --- Configuration & Data Dictionaries ---
 # In a real application, this data might be loaded from a central config file or database
 # For the POC, we define it here so this script can run independently for testing.
@@ -68,7 +73,7 @@ def create_job_from_ui_input(job_name, vin, make, model, mileage, urgency, selec
         
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection(DB_PATH)
         cursor = conn.cursor()
         sql = """
         INSERT INTO job_card (
@@ -3,6 +3,18 @@ import os
 from datetime import datetime
 import pandas as pd
 
+try:
+    from core.feature_store import ensure_feature_table, record_outcome
+    from core.db import get_connection
+except ImportError:  # Running this file directly (python core/job_completion_simulator.py)
+    from feature_store import ensure_feature_table, record_outcome
+    from db import get_connection
+
+try:
+    from recommender import record_task_outcome
+except ImportError:  # recommender.py lives at the project root, which is not on the path when run as a script
+    record_task_outcome = None
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(BASE_DIR, 'database/workshop.db')
 
@@ -10,8 +22,7 @@ def complete_and_archive_task(job_card_id, outcome_score):
     print(f"\n--- Completing and Archiving Task for Job Card ID: {job_card_id} ---")
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_connection(DB_PATH)
         cursor = conn.cursor()
 
         cursor.execute("SELECT * FROM job_card WHERE job_card_id = ? AND status = 'Assigned'", (job_card_id,))
@@ -71,9 +82,19 @@ def complete_and_archive_task(job_card_id, outcome_score):
 
 
         cursor.execute("DELETE FROM job_card WHERE job_card_id = ?", (job_card_id,))
+
+        # Fold the outcome into the engineer's running job- and task-level features
+        ensure_feature_table(conn)
+        record_outcome(conn, assigned_engineer_id, task_data['Job_Name'], outcome_score)
+        record_outcome(conn, assigned_engineer_id, task_data['Task_ID'], outcome_score)
         conn.commit()
         print(f"Task {job_card_id} removed from live job_card table.")
 
+        # Make the outcome visible to recommendations straight away
+        if record_task_outcome is not None and time_taken_minutes:
+            record_task_outcome(task_data['Task_ID'], assigned_engineer_id, outcome_score, time_taken_minutes,
+                                task_data['Estimated_Standard_Time'], task_data['Urgency'])
+
         return True, f"Task {job_card_id} successfully completed and archived."
 
     except sqlite3.Error as e:
@@ -0,0 +1,114 @@
+import os
+import threading
+import tempfile
+import joblib
+
+# Model path (should match where predictive_model.py saves it)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # garage_ai_assigner directory
+MODEL_DIR = os.path.join(BASE_DIR, 'models')
+MODEL_FILE_PATH = os.path.join(MODEL_DIR, 'job_success_model.joblib')
+
+
+class ModelRegistry:
+    """
+    Keeps one loaded copy of a joblib model per process.
+
+    Every get() does a cheap os.stat on the model file and only unpickles it again
+    when the file's mtime/size changes (e.g. after run_training_pipeline writes a new
+    model). The loaded model is swapped in as a single reference assignment, so any
+    request that already holds the old model keeps using it until it finishes.
+    """
+
+    def __init__(self, model_path, loader=joblib.load):
+        self.model_path = model_path
+        self.loader = loader
+        self._lock = threading.Lock()
+        # (file stamp, model, version) is replaced as one tuple so readers never see a mix
+        self._current = (None, None, 0)
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.model_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    @property
+    def version(self):
+        """Increments every time a new model is swapped in."""
+        return self._current[2]
+
+    def get(self):
+        """Returns the current model, reloading it first if the file on disk changed."""
+        stamp = self._file_stamp()
+        current_stamp, model, _ = self._current
+        if stamp is not None and stamp == current_stamp:
+            return model
+
+        if stamp is None:
+            if model is None:
+                print(f"Model file not found at {self.model_path}. Train the model first using predictive_model.py.")
+            return model
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            current_stamp, model, version = self._current
+            if stamp == current_stamp:
+                return model
+            try:
+                new_model = self.loader(self.model_path)
+            except Exception as e:
+                print(f"Error loading model: {e}")
+                return model  # Keep serving the previous model, if any
+            self._current = (stamp, new_model, version + 1)
+            print(f"Model pipeline loaded successfully from {self.model_path} (version {version + 1})")
+            return new_model
+
+    def publish(self, model):
+        """Swaps in a model that was just saved to model_path, without reloading it from disk."""
+        with self._lock:
+            _, _, version = self._current
+            self._current = (self._file_stamp(), model, version + 1)
+
+    def clear(self):
+        """Drops the cached model so the next get() reloads from disk."""
+        with self._lock:
+            _, _, version = self._current
+            self._current = (None, None, version)
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+def get_model_registry(model_path=MODEL_FILE_PATH, loader=joblib.load):
+    """
+    Returns the process-wide registry for the given model file and loader (joblib by
+    default). Registries are keyed on both, so a file read with a different loader gets
+    its own registry instead of silently sharing the first one. Pass the same loader
+    object each time (a function or method, not a new lambda) to share a registry.
+    """
+    key = (os.path.abspath(model_path), loader)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = ModelRegistry(key[0], loader)
+            _registries[key] = registry
+        return registry
+
+def save_model(model, model_path=MODEL_FILE_PATH):
+    """
+    Writes the model to a temporary file next to model_path and renames it into place,
+    so readers never see a half-written file. The registry then serves the new model.
+    """
+    model_dir = os.path.dirname(os.path.abspath(model_path))
+    os.makedirs(model_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=model_dir, suffix='.tmp')
+    os.close(fd)
+    try:
+        joblib.dump(model, tmp_path)
+        os.replace(tmp_path, model_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    get_model_registry(model_path).publish(model)
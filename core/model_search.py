@@ -0,0 +1,206 @@
+# In core/model_search.py
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+from sklearn.base import clone
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import Pipeline
+from sklearn.svm import LinearSVC
+from sklearn.utils import get_tags
+from scipy import sparse
+from threadpoolctl import threadpool_limits
+
+try:
+    from core.compiled_scorer import LinearScorer
+except ImportError:  # Running from inside core/
+    from compiled_scorer import LinearScorer
+
+# --- Cross-validated model-family search for the job success model ---
+# Every fold is one-hot encoded and scaled once and cached on disk; the worker
+# processes memory-map the cached folds, so no candidate repeats the preprocessing.
+# The winner is the best mean ROC AUC among candidates whose inference cost per
+# scored engineer stays within the latency budget. Logistic candidates are charged
+# what serving them costs: the compiled scorer (core/compiled_scorer.py) on raw
+# rows. The others pay the sklearn transform plus predict_proba.
+CV_FOLDS = 5
+LATENCY_BUDGET_US = float(os.environ.get('MODEL_LATENCY_BUDGET_US', 100))  # Per candidate engineer
+LATENCY_BATCH = 20  # Candidates scored together, about one assignment's worth
+LATENCY_REPEATS = 50
+
+
+def candidate_models():
+    """(name, unfitted estimator) pairs covering the regularization grid and model families."""
+    candidates = [
+        (f"logistic C={C:g}", LogisticRegression(solver='liblinear', C=C, random_state=42, class_weight='balanced'))
+        for C in (0.01, 0.1, 1.0, 10.0)
+    ]
+    candidates += [
+        (f"sgd logistic alpha={alpha:g}", SGDClassifier(loss='log_loss', alpha=alpha, random_state=42))
+        for alpha in (1e-5, 1e-4, 1e-3)
+    ]
+    candidates += [
+        ("hist gradient boosting lr=0.1", HistGradientBoostingClassifier(learning_rate=0.1, max_iter=200, random_state=42)),
+        ("hist gradient boosting lr=0.05 leaves=15", HistGradientBoostingClassifier(
+            learning_rate=0.05, max_iter=300, max_leaf_nodes=15, random_state=42)),
+        ("calibrated linear svc (sigmoid)", CalibratedClassifierCV(LinearSVC(C=0.1, random_state=42), method='sigmoid', cv=3)),
+        ("calibrated gradient boosting (isotonic)", CalibratedClassifierCV(
+            HistGradientBoostingClassifier(learning_rate=0.1, max_iter=100, random_state=42), method='isotonic', cv=3)),
+    ]
+    return candidates
+
+def cache_preprocessed_folds(X, y, preprocessor, cache_dir, n_folds=CV_FOLDS):
+    """
+    Fits a fresh copy of the preprocessor on each training fold, transforms both sides
+    and dumps them to cache_dir, with the fitted preprocessor and one latency batch of
+    raw validation rows for timing the compiled scorer. Returns the fold file paths and
+    the mean transform cost per candidate (paid by every model served as a pipeline),
+    timed on LATENCY_BATCH-row batches like inference_cost_us.
+    """
+    fold_paths, transform_us = [], []
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=42)
+    for i, (train_idx, val_idx) in enumerate(splitter.split(X, y)):
+        fold_preprocessor = clone(preprocessor).fit(X.iloc[train_idx])
+        transform_us.append(transform_cost_us(fold_preprocessor, X.iloc[val_idx]))
+        fold = {
+            'X_train': fold_preprocessor.transform(X.iloc[train_idx]),
+            'y_train': y.iloc[train_idx].to_numpy(),
+            'X_val': fold_preprocessor.transform(X.iloc[val_idx]),
+            'y_val': y.iloc[val_idx].to_numpy(),
+            'preprocessor': fold_preprocessor,
+            'X_latency_raw': X.iloc[val_idx[:LATENCY_BATCH]],
+        }
+        path = os.path.join(cache_dir, f"fold_{i}.joblib")
+        joblib.dump(fold, path)
+        fold_paths.append(path)
+    return fold_paths, float(np.mean(transform_us))
+
+def transform_cost_us(preprocessor, X_val, batch=LATENCY_BATCH, repeats=LATENCY_REPEATS):
+    """
+    Median transform time per candidate for batches of `batch` raw rows. Timed per
+    batch, not over a whole fold, so the fixed per-call overhead is counted as it is
+    when one assignment's candidates are scored.
+    """
+    rows = X_val[:batch]
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        preprocessor.transform(rows)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1e6 / rows.shape[0]
+
+def inference_cost_us(model, X_val, batch=LATENCY_BATCH, repeats=LATENCY_REPEATS):
+    """Median predict_proba time per candidate for batches of `batch` rows."""
+    rows = X_val[:batch]
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(rows)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1e6 / rows.shape[0]
+
+def compiled_cost_us(model, fold):
+    """
+    Per-candidate cost of serving the fitted model through LinearScorer on raw rows, or
+    None if it cannot be compiled (not a binary logistic model).
+    """
+    try:
+        scorer = LinearScorer.from_pipeline(Pipeline([('preprocessor', fold['preprocessor']), ('classifier', model)]))
+    except (ValueError, AttributeError):
+        return None
+    return inference_cost_us(scorer, fold['X_latency_raw'])
+
+def _evaluate_candidate(job):
+    """Worker: fits one candidate on every cached fold and returns its scores and costs."""
+    name, estimator, fold_paths = job
+    aucs, fit_seconds, costs, compiled_costs = [], [], [], []
+    with threadpool_limits(1):  # One core per worker; the pool provides the parallelism
+        for path in fold_paths:
+            fold = joblib.load(path, mmap_mode='r')
+            model = clone(estimator)
+            X_train, X_val = fold['X_train'], fold['X_val']
+            if sparse.issparse(X_train) and not get_tags(model).input_tags.sparse:
+                X_train, X_val = X_train.toarray(), X_val.toarray()  # e.g. gradient boosting
+            start = time.perf_counter()
+            model.fit(X_train, fold['y_train'])
+            fit_seconds.append(time.perf_counter() - start)
+            aucs.append(roc_auc_score(fold['y_val'], model.predict_proba(X_val)[:, 1]))
+            costs.append(inference_cost_us(model, X_val))
+            compiled_costs.append(compiled_cost_us(model, fold))
+    return {
+        'name': name,
+        'auc_mean': float(np.mean(aucs)),
+        'auc_std': float(np.std(aucs)),
+        'fit_seconds': float(np.mean(fit_seconds)),
+        'inference_us': float(np.median(costs)),
+        'compiled_us': None if None in compiled_costs else float(np.median(compiled_costs)),
+    }
+
+def serving_cost(result, transform_us):
+    """Sets result['served_as'] and result['total_us']: compiled if possible, else transform + pipeline."""
+    if result['compiled_us'] is not None:
+        result['served_as'], result['total_us'] = 'compiled', result['compiled_us']
+    else:
+        result['served_as'], result['total_us'] = 'pipeline', result['inference_us'] + transform_us
+    return result
+
+def select_candidate(results, budget_us):
+    """
+    The highest mean AUC among results within the budget; if none is, the highest mean
+    AUC overall (latencies that far over budget are not worth ranking on their noise).
+    """
+    within_budget = [r for r in results if r['total_us'] <= budget_us]
+    return max(within_budget or results, key=lambda r: r['auc_mean'])
+
+def print_leaderboard(results, budget_us):
+    print(f"\n{'Rank':<5}{'Candidate':<42}{'ROC AUC':>16}{'Fit (s)':>9}{'Infer (us/cand.)':>18}{'Served as':>11}  Budget")
+    print("-" * 109)
+    for rank, result in enumerate(results, 1):
+        auc = f"{result['auc_mean']:.4f} +/- {result['auc_std']:.4f}"
+        within = "ok" if result['total_us'] <= budget_us else "over"
+        print(f"{rank:<5}{result['name']:<42}{auc:>16}{result['fit_seconds']:>9.2f}{result['total_us']:>18.1f}"
+              f"{result['served_as']:>11}  {within}")
+
+def search_model_family(X, y, preprocessor, candidates=None, budget_us=LATENCY_BUDGET_US, workers=None, n_folds=CV_FOLDS):
+    """
+    Cross-validates every candidate in parallel on cached preprocessed folds, prints a
+    leaderboard and returns (best unfitted estimator, leaderboard rows). The best is the
+    highest mean AUC within the per-candidate latency budget, costed as it would be
+    served (see serving_cost); if nothing fits the budget, the highest AUC overall.
+    """
+    candidates = candidates if candidates is not None else candidate_models()
+    workers = workers or os.cpu_count() or 1
+    cache_dir = tempfile.mkdtemp(prefix='model_search_')
+    try:
+        print(f"Caching {n_folds} preprocessed folds...")
+        fold_paths, transform_us = cache_preprocessed_folds(X, y, preprocessor, cache_dir, n_folds)
+        print(f"Evaluating {len(candidates)} candidates on {min(workers, len(candidates))} worker process(es)...")
+        jobs = [(name, estimator, fold_paths) for name, estimator in candidates]
+        if workers == 1:
+            results = [_evaluate_candidate(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+                results = list(executor.map(_evaluate_candidate, jobs))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    for result in results:
+        serving_cost(result, transform_us)
+    results.sort(key=lambda r: (r['total_us'] > budget_us, -r['auc_mean']))
+    print_leaderboard(results, budget_us)
+
+    best = select_candidate(results, budget_us)
+    if best['total_us'] > budget_us:
+        print(f"\nNo candidate fits the {budget_us:g} us budget; choosing on ROC AUC alone.")
+    print(f"\nSelected: {best['name']} (ROC AUC {best['auc_mean']:.4f}, {best['total_us']:.1f} us per candidate, "
+          f"budget {budget_us:g} us)")
+    estimators = dict(candidates)
+    return clone(estimators[best['name']]), results
@@ -1,13 +1,33 @@
 import sqlite3
 import os
+import sys
+import copy
+import time
+import tracemalloc
+from contextlib import contextmanager
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.metrics import accuracy_score, classification_report, roc_auc_score
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
-import joblib # For saving and loading the model
+from sklearn.utils import get_tags
+from pandas.api.types import union_categoricals
+
+try:
+    from core.model_registry import get_model_registry, save_model
+    from core.feature_store import load_feature_frame
+    from core.db import get_connection
+    from core.compiled_scorer import export_scorer
+    from core.model_search import search_model_family
+except ImportError:  # Running this file directly (python core/predictive_model.py)
+    from model_registry import get_model_registry, save_model
+    from feature_store import load_feature_frame
+    from db import get_connection
+    from compiled_scorer import export_scorer
+    from model_search import search_model_family
 
 # Database path
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # garage_ai_assigner directory
@@ -16,23 +36,75 @@ MODEL_DIR = os.path.join(BASE_DIR, 'models') # Directory to save trained models
 os.makedirs(MODEL_DIR, exist_ok=True) # Ensure model directory exists
 MODEL_FILE_PATH = os.path.join(MODEL_DIR, 'job_success_model.joblib')
 PREPROCESSOR_FILE_PATH = os.path.join(MODEL_DIR, 'preprocessor.joblib')
+# Array-only copy of the linear model for latency-critical scoring (core/compiled_scorer.py)
+SCORER_FILE_PATH = os.path.join(MODEL_DIR, 'job_success_scorer.npz')
+
+# --- Online (incremental) training ---
+# The online model is an SGD logistic regression whose one-hot vocabularies are fixed
+# when it is first trained, so later partial_fit batches always see the same columns.
+# Categories that appear later are encoded as all zeros (handle_unknown='ignore').
+ONLINE_CLASSES = np.array([0, 1])
+CATEGORICAL_FEATURES = ['job_description_text', 'vehicle_make']
+NUMERICAL_FEATURES = ['engineer_general_score', 'job_estimated_time',
+                      'eng_job_specific_avg_score', 'eng_job_specific_exp_count']
+
+# --- Memory-lean training data ---
+# Text columns are held as pandas categoricals (one dictionary per column, integer
+# codes per row) and the one-hot features stay sparse (CSR) through to the model.
+CATEGORY_COLUMNS = ['engineer_id', 'job_description_text', 'vehicle_make', 'vehicle_model']
+FETCH_CHUNK_ROWS = 100_000
+
+# --- Out-of-core (streaming) training ---
+# Two passes over the training query in chunks: the first fits the scaler and collects
+# the category vocabulary, the second trains the online model with partial_fit. The
+# most recent rows (at most one chunk) are held out for evaluation.
+STREAM_HOLDOUT_FRACTION = 0.1
+STREAM_EPOCHS = 1
+
+
+class StageMemoryReport:
+    """
+    Peak Python/NumPy heap (tracemalloc) and wall time per training stage.
+    Does nothing unless enabled, since tracing slows allocation-heavy code down.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        start_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            self.stages.append((name, start_bytes, peak_bytes, end_bytes, time.perf_counter() - start))
+
+    def print_report(self):
+        if not self.enabled:
+            return
+        tracemalloc.stop()
+        print(f"\n{'Stage':<22}{'Start (MB)':>12}{'Peak (MB)':>12}{'End (MB)':>11}{'Time (s)':>10}")
+        for name, start_bytes, peak_bytes, end_bytes, seconds in self.stages:
+            print(f"{name:<22}{start_bytes / 2**20:>12.1f}{peak_bytes / 2**20:>12.1f}{end_bytes / 2**20:>11.1f}{seconds:>10.2f}")
 
 
 def get_db_connection():
-    """Establishes a connection to the SQLite database."""
-    conn = sqlite3.connect(DATABASE_NAME)
-    conn.row_factory = sqlite3.Row # Allows accessing columns by name
-    return conn
+    """Returns a pooled connection to the SQLite database (rows accessible by name)."""
+    return get_connection(DATABASE_NAME)
 
-def fetch_training_data():
-    """
-    Fetches data from the database to build a dataset for model training.
-    Each row will represent a completed job from engineer_past_performance.
-    """
-    print("Fetching training data from database...")
-    conn = get_db_connection()
-    query = """
+# One row per completed job, in insertion order, between two rowids (exclusive, inclusive)
+TRAINING_DATA_QUERY = """
     SELECT
+        ep.rowid AS history_order, -- Insertion order, used for point-in-time features
         ep.engineer_id,
         ep.job_description_text, -- This will be our primary job type identifier
         ep.vehicle_make,
@@ -45,12 +117,36 @@ def fetch_training_data():
     JOIN
         engineers e ON ep.engineer_id = e.engineer_id
     LEFT JOIN 
-        job_definitions jd ON ep.job_description_text = jd.job_name; 
+        job_definitions jd ON ep.job_description_text = jd.job_name
         -- We use job_description_text from past_performance as the job identifier
         -- It's assumed this text matches a job_name in job_definitions for estimate
+    WHERE ep.rowid > ? AND ep.rowid <= ?
+    ORDER BY ep.rowid
+"""
+MAX_ROWID = (1 << 63) - 1
+
+def iter_training_chunks(conn, after_rowid=None, up_to_rowid=None, chunk_size=FETCH_CHUNK_ROWS):
+    """Yields the training query's rows as DataFrames of at most chunk_size rows."""
+    params = (after_rowid or 0, MAX_ROWID if up_to_rowid is None else up_to_rowid)
+    yield from pd.read_sql_query(TRAINING_DATA_QUERY, conn, params=params, chunksize=chunk_size)
+
+def fetch_training_data(after_rowid=None):
     """
-    df = pd.read_sql_query(query, conn)
+    Fetches data from the database to build a dataset for model training.
+    Each row will represent a completed job from engineer_past_performance.
+    With after_rowid, only rows added after that rowid are returned (online updates).
+    Rows are read in chunks and the text columns converted to categoricals per chunk,
+    so the full table is never held as Python strings.
+    """
+    print("Fetching training data from database...")
+    conn = get_db_connection()
+    chunks = []
+    for chunk in iter_training_chunks(conn, after_rowid):
+        for col in CATEGORY_COLUMNS:
+            chunk[col] = chunk[col].astype('category')
+        chunks.append(chunk)
     conn.close()
+    df = concat_categorical_chunks(chunks)
     
     if df.empty:
         print("No training data fetched. Check database and table contents.")
@@ -59,50 +155,111 @@ def fetch_training_data():
     print(f"Fetched {len(df)} records for training data construction.")
     return df
 
-def engineer_job_specific_metrics(df_all_past_jobs):
+def concat_categorical_chunks(chunks, category_columns=CATEGORY_COLUMNS):
+    """Concatenates chunks whose category_columns are categoricals, merging their dictionaries."""
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0]
+    category_columns = [col for col in category_columns if col in chunks[0].columns]
+    df = pd.concat([chunk.drop(columns=category_columns) for chunk in chunks], ignore_index=True)
+    for col in category_columns:
+        df[col] = union_categoricals([chunk.pop(col) for chunk in chunks], ignore_order=True)
+    return df
+
+def engineer_job_specific_metrics(df_all_past_jobs, feature_df=None):
     """
-    Calculates engineer's average score and experience count for each specific job type
-    based on their entire history present in df_all_past_jobs.
+    Attaches each engineer's average score and experience count for the job type.
+    The values come from the feature store (core/feature_store.py), the same table
+    job_assigner.py reads at inference time. The columns are added to
+    df_all_past_jobs in place (no merged copy of the frame) and it is returned.
     """
-    # Engineer's average score for a specific job type
-    # Ensure outcome_score is numeric for calculations
-    df_all_past_jobs['outcome_score_numeric'] = pd.to_numeric(df_all_past_jobs['outcome_score'], errors='coerce')
-
-    # Calculate avg score for each engineer on each job_description_text
-    specific_avg_scores = df_all_past_jobs.groupby(['engineer_id', 'job_description_text'])['outcome_score_numeric'].mean().reset_index()
-    specific_avg_scores.rename(columns={'outcome_score_numeric': 'eng_job_specific_avg_score'}, inplace=True)
-
-    # Engineer's experience count for a specific job type
-    specific_exp_counts = df_all_past_jobs.groupby(['engineer_id', 'job_description_text']).size().reset_index(name='eng_job_specific_exp_count')
-    
-    # Merge these features back into the main DataFrame
-    df_merged = pd.merge(df_all_past_jobs, specific_avg_scores, on=['engineer_id', 'job_description_text'], how='left')
-    df_merged = pd.merge(df_merged, specific_exp_counts, on=['engineer_id', 'job_description_text'], how='left')
-    
-    # For a given row (a specific job instance), the specific experience count should ideally be
-    # the count *before* this job. For simplicity in this POC, we're using the total count.
-    # A more advanced approach would involve time-series based feature engineering.
-    # If an engineer is doing a job type for the first time in the dataset, this specific avg_score might be NaN.
-    # And experience count would be 1. We'll fill NaNs later.
+    if feature_df is None:
+        conn = get_db_connection()
+        try:
+            feature_df = load_feature_frame(conn)
+        finally:
+            conn.close()
+
+    # Look the features up by (engineer, job type) and add them as columns
+    keys = ['engineer_id', 'job_description_text']
+    features = feature_df.set_index(keys)
+    rows = pd.MultiIndex.from_arrays([df_all_past_jobs[col].astype(object) for col in keys])
+    aligned = features.reindex(rows)
+    for col in features.columns:
+        df_all_past_jobs[col] = aligned[col].to_numpy()
     
-    df_merged.drop(columns=['outcome_score_numeric'], inplace=True, errors='ignore')
-    return df_merged
+    # These are whole-history totals, i.e. the values inference sees today. For training rows,
+    # point_in_time_job_metrics gives the values as they were before each job instead.
+    return df_all_past_jobs
+
+def point_in_time_job_metrics(df_all_past_jobs, group_columns=('engineer_id', 'job_description_text'),
+                              score_column='outcome_score', order_columns=('history_order',), prior_totals=None):
+    """
+    Adds eng_job_specific_avg_score and eng_job_specific_exp_count as they stood just
+    before each row: only earlier rows of the same (engineer, job type) are counted,
+    never the row itself or anything after it.
+
+    Sorts once (stable) by order_columns and uses grouped cumulative sums, so the cost
+    is O(n log n). Any slice of history gives the features as of that slice, which is
+    what a backtest needs. prior_totals (group columns plus score_sum, score_count)
+    carries in the history that came before df_all_past_jobs, e.g. for online updates.
+    Returns a new DataFrame in the original row order.
+    """
+    df = df_all_past_jobs.reset_index(drop=True)
+    order_columns = [col for col in order_columns if col in df.columns]
+    # Only the row positions are sorted, not a copy of the whole frame
+    order = (df[order_columns].sort_values(order_columns, kind='mergesort').index.to_numpy()
+             if order_columns else np.arange(len(df)))
+    keys = df[list(group_columns)].iloc[order]
+
+    group_ids = keys.groupby(list(group_columns), sort=False, dropna=False, observed=True).ngroup().to_numpy()
+    scores = df[score_column].to_numpy(dtype=float)[order]
+    present = ~np.isnan(scores)
+    scores = np.where(present, scores, 0.0)
+
+    # Inclusive running totals minus the row's own contribution = totals before this row
+    prior_sum = pd.Series(scores).groupby(group_ids).cumsum().to_numpy() - scores
+    prior_count = pd.Series(present.astype(np.int64)).groupby(group_ids).cumsum().to_numpy() - present
+    if prior_totals is not None:
+        carried = keys.merge(prior_totals, on=list(group_columns), how='left')
+        prior_sum = prior_sum + carried['score_sum'].fillna(0).to_numpy(dtype=float)
+        prior_count = prior_count + carried['score_count'].fillna(0).to_numpy(dtype=np.int64)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        prior_avg = np.where(prior_count > 0, prior_sum / prior_count, np.nan)
+    # Scatter back from sorted order to the frame's own row order
+    avg_by_row = np.empty(len(df))
+    count_by_row = np.empty(len(df), dtype=np.int64)
+    avg_by_row[order] = prior_avg
+    count_by_row[order] = prior_count
+    df['eng_job_specific_avg_score'] = avg_by_row
+    df['eng_job_specific_exp_count'] = count_by_row
+    return df
 
-def preprocess_data(df):
+def preprocess_data(df, point_in_time=True, prior_totals=None, fill_values=None, verbose=True):
     """
     Preprocesses the raw data: feature engineering, target creation, and cleaning.
+    With point_in_time=False the job-specific features are the feature store totals,
+    which include each row's own outcome. fill_values ({'engineer_general_score': mean,
+    'job_estimated_time': median}) replaces the statistics taken from df itself, so
+    chunks of a larger history are all filled the same way.
     """
     if df.empty:
         return pd.DataFrame(), None, None # Return empty df, features, and target
 
-    print("Preprocessing data...")
+    if verbose:
+        print("Preprocessing data...")
 
-    # 1. Engineer job-specific metrics (calculated based on the whole dataset)
-    df = engineer_job_specific_metrics(df.copy()) # Use .copy() to avoid SettingWithCopyWarning
+    # 1. Engineer job-specific metrics, from earlier history only (or from the feature store)
+    if point_in_time:
+        df = point_in_time_job_metrics(df, prior_totals=prior_totals)
+    else:
+        df = engineer_job_specific_metrics(df)
 
     # 2. Create Target Variable: 'high_success' (binary)
     # outcome_score is 1-5. Let's say 4, 5 are high success (1), else 0.
-    df['high_success'] = df['outcome_score'].apply(lambda x: 1 if x >= 4 else 0)
+    df['high_success'] = (df['outcome_score'] >= 4).astype(np.int8)
 
     # 3. Feature Selection & Handling Missing Values
     # Initial features:
@@ -111,49 +268,55 @@ def preprocess_data(df):
     
     # Fill NaNs for numerical features (e.g., with mean or a specific value like 0)
     # engineer_general_score should ideally not be NaN if engineer_analyzer.py ran.
-    df['engineer_general_score'].fillna(df['engineer_general_score'].mean(), inplace=True)
+    if fill_values is None:
+        fill_values = {'engineer_general_score': df['engineer_general_score'].mean(),
+                       'job_estimated_time': df['job_estimated_time'].median()}
+    df['engineer_general_score'] = df['engineer_general_score'].fillna(fill_values['engineer_general_score'])
     # job_estimated_time might be NaN if job_description_text from past_performance isn't in job_definitions, or has no estimate.
-    df['job_estimated_time'].fillna(df['job_estimated_time'].median(), inplace=True) # Use median for time
+    df['job_estimated_time'] = df['job_estimated_time'].fillna(fill_values['job_estimated_time']) # Use median for time
     # For eng_job_specific_avg_score, NaN means no prior specific jobs or first time. Could fill with overall avg score or 0.
-    df['eng_job_specific_avg_score'].fillna(df['engineer_general_score'], inplace=True) # Fill with general score
-    # For eng_job_specific_exp_count, NaN (unlikely after groupby.size) can be 0. It will be 1 if it's their first time.
-    df['eng_job_specific_exp_count'].fillna(0, inplace=True)
+    df['eng_job_specific_avg_score'] = df['eng_job_specific_avg_score'].fillna(df['engineer_general_score']) # Fill with general score
+    # For eng_job_specific_exp_count, 0 means this is their first job of this type.
+    df['eng_job_specific_exp_count'] = df['eng_job_specific_exp_count'].fillna(0)
 
 
     # Define features (X) and target (y)
     # Note: 'engineer_id' is not used as a direct feature as its effect should be captured
     # by the engineered features like 'engineer_general_score', 'eng_job_specific_avg_score', etc.
     # 'outcome_score' and 'vehicle_model' are also dropped for this initial model.
-    X = df.drop(columns=['engineer_id', 'outcome_score', 'high_success', 'vehicle_model'])
+    X = df.drop(columns=['engineer_id', 'outcome_score', 'high_success', 'vehicle_model', 'history_order'], errors='ignore')
     y = df['high_success']
     
-    print(f"Data shape before defining preprocessor: X - {X.shape}, y - {y.shape}")
+    if verbose:
+        print(f"Data shape before defining preprocessor: X - {X.shape}, y - {y.shape}")
     if X.empty:
         print("No data available after preprocessing steps.")
         return pd.DataFrame(), None, None
 
     # Identify categorical and numerical features for the preprocessor
-    categorical_features = ['job_description_text', 'vehicle_make']
+    categorical_features = list(CATEGORICAL_FEATURES)
     # Ensure all categorical features are actually in X's columns
     categorical_features = [col for col in categorical_features if col in X.columns]
 
-    numerical_features = ['engineer_general_score', 'job_estimated_time', 
-                          'eng_job_specific_avg_score', 'eng_job_specific_exp_count']
+    numerical_features = list(NUMERICAL_FEATURES)
     # Ensure all numerical features are actually in X's columns
     numerical_features = [col for col in numerical_features if col in X.columns]
 
-    print(f"Identified Categorical Features: {categorical_features}")
-    print(f"Identified Numerical Features: {numerical_features}")
+    if verbose:
+        print(f"Identified Categorical Features: {categorical_features}")
+        print(f"Identified Numerical Features: {numerical_features}")
 
     # Create a preprocessor object using ColumnTransformer
     # OneHotEncoder for categorical features: handle_unknown='ignore' will prevent errors if new categories appear in prediction
     # StandardScaler for numerical features: scales data to have mean 0 and variance 1
+    # sparse_threshold=1.0 keeps the output a CSR matrix however many categories there are
     preprocessor = ColumnTransformer(
         transformers=[
-            ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), categorical_features),
+            ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=True), categorical_features),
             ('num', StandardScaler(), numerical_features)
         ], 
-        remainder='passthrough' # In case some columns are not specified, pass them through
+        remainder='passthrough', # In case some columns are not specified, pass them through
+        sparse_threshold=1.0
     )
     
     # It's good practice to fit the preprocessor on training data only
@@ -163,10 +326,30 @@ def preprocess_data(df):
     return X, y, preprocessor
 
 
-def train_and_evaluate_model(X, y, preprocessor):
+def build_online_classifier():
+    """SGD logistic regression that can keep learning from new batches with partial_fit."""
+    return SGDClassifier(loss='log_loss', alpha=1e-4, learning_rate='optimal', random_state=42)
+
+def category_vocabulary(X, conn=None):
+    """
+    Fixed category lists for the online model's one-hot encoder: every job type in
+    job_definitions plus everything seen in X, and every vehicle make seen in X.
     """
-    Trains a Logistic Regression model and evaluates it.
+    vocabulary = {col: set(X[col].dropna().astype(str)) for col in CATEGORICAL_FEATURES if col in X.columns}
+    if conn is not None and 'job_description_text' in vocabulary:
+        try:
+            vocabulary['job_description_text'].update(
+                row[0] for row in conn.execute("SELECT job_name FROM job_definitions") if row[0] is not None)
+        except sqlite3.Error as e:
+            print(f"Could not read job types from job_definitions: {e}")
+    return {col: sorted(values) for col, values in vocabulary.items()}
+
+def train_and_evaluate_model(X, y, preprocessor, classifier=None, history_watermark=None):
+    """
+    Trains a Logistic Regression model (or the given classifier) and evaluates it.
     Saves the trained model and preprocessor.
+    history_watermark is the last engineer_past_performance rowid the model has seen;
+    run_online_update continues from there.
     """
     if X.empty or y.empty:
         print("Cannot train model: No data available.")
@@ -176,13 +359,19 @@ def train_and_evaluate_model(X, y, preprocessor):
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
     print(f"Training set size: {X_train.shape[0]}, Test set size: {X_test.shape[0]}")
 
+    if classifier is None:
+        # class_weight='balanced' can help if one class is much more frequent
+        classifier = LogisticRegression(solver='liblinear', random_state=42, class_weight='balanced')
+    if not get_tags(classifier).input_tags.sparse:
+        preprocessor.set_params(sparse_threshold=0)  # e.g. gradient boosting needs dense input
+
     # Create a pipeline that includes preprocessing and the model
     # Pipeline helps manage steps: transform data then fit model
     model_pipeline = Pipeline(steps=[
         ('preprocessor', preprocessor),
-        ('classifier', LogisticRegression(solver='liblinear', random_state=42, class_weight='balanced')) 
-        # class_weight='balanced' can help if one class is much more frequent
+        ('classifier', classifier)
     ])
+    model_pipeline.history_watermark_ = history_watermark
 
     print("Training the model...")
     model_pipeline.fit(X_train, y_train)
@@ -202,9 +391,12 @@ def train_and_evaluate_model(X, y, preprocessor):
 
 
     # Save the trained model pipeline (which includes the preprocessor)
+    # Written atomically; running processes pick it up on their next registry lookup
     try:
-        joblib.dump(model_pipeline, MODEL_FILE_PATH)
+        save_model(model_pipeline, MODEL_FILE_PATH)
         print(f"\nTrained model pipeline saved to: {MODEL_FILE_PATH}")
+        if export_scorer(model_pipeline, SCORER_FILE_PATH) is not None:
+            print(f"Compiled scorer saved to: {SCORER_FILE_PATH}")
     except Exception as e:
         print(f"Error saving model: {e}")
         
@@ -212,38 +404,244 @@ def train_and_evaluate_model(X, y, preprocessor):
 
 
 def load_model_and_preprocessor():
-    """Loads the trained model pipeline from disk."""
-    if os.path.exists(MODEL_FILE_PATH):
-        try:
-            model_pipeline = joblib.load(MODEL_FILE_PATH)
-            print(f"Model pipeline loaded successfully from {MODEL_FILE_PATH}")
-            return model_pipeline
-        except Exception as e:
-            print(f"Error loading model: {e}")
-            return None
-    else:
-        print(f"Model file not found at {MODEL_FILE_PATH}. Train the model first.")
+    """Returns the trained model pipeline from the process-wide model registry."""
+    return get_model_registry(MODEL_FILE_PATH).get()
+
+def fetch_prior_job_totals(conn, df_new, watermark):
+    """
+    Score sums and counts per (engineer, job type) over the rows up to watermark,
+    for the engineers in df_new only. Uses the (engineer_id, job_description_text,
+    outcome_score) index, so it does not scan the whole history.
+    """
+    engineer_ids = df_new['engineer_id'].dropna().unique().tolist()
+    if not engineer_ids:
         return None
+    placeholders = ", ".join("?" for _ in engineer_ids)
+    return pd.read_sql_query(f"""
+        SELECT engineer_id, job_description_text,
+               SUM(outcome_score) AS score_sum, COUNT(outcome_score) AS score_count
+        FROM engineer_past_performance
+        WHERE rowid <= ? AND engineer_id IN ({placeholders})
+        GROUP BY engineer_id, job_description_text
+    """, conn, params=(watermark, *engineer_ids))
+
+def update_online_model(model_pipeline, X_new, y_new):
+    """
+    One partial_fit step of the pipeline's classifier on a batch of new outcomes.
+    The preprocessor (vocabulary and scaling) stays as it was fitted.
+    """
+    features = model_pipeline[:-1].transform(X_new)
+    model_pipeline[-1].partial_fit(features, y_new, classes=ONLINE_CLASSES)
+    return model_pipeline
+
+def run_online_update():
+    """
+    Folds the outcomes recorded since the model's watermark into the online model
+    with partial_fit and saves it. A full retrain (run_training_pipeline(online=True))
+    is still the way to correct drift, e.g. on a schedule.
+    """
+    print("\n--- Starting Online Model Update ---")
+    current_model = load_model_and_preprocessor()
+    if current_model is None or not hasattr(current_model[-1], 'partial_fit'):
+        print("No online model to update. Run run_training_pipeline(online=True) first.")
+        return False
+    watermark = getattr(current_model, 'history_watermark_', None) or 0
+
+    new_df = fetch_training_data(after_rowid=watermark)
+    if new_df.empty:
+        print("No new outcomes since the last update.")
+        return True
+
+    conn = get_db_connection()
+    try:
+        prior_totals = fetch_prior_job_totals(conn, new_df, watermark)
+    finally:
+        conn.close()
+    X_new, y_new, _ = preprocess_data(new_df, prior_totals=prior_totals)
+
+    # Update a copy so requests using the current model never see a half-updated one
+    model_pipeline = update_online_model(copy.deepcopy(current_model), X_new, y_new)
+    model_pipeline.history_watermark_ = int(new_df['history_order'].max())
+    save_model(model_pipeline, MODEL_FILE_PATH)
+    export_scorer(model_pipeline, SCORER_FILE_PATH)
+    print(f"Online model updated with {len(X_new)} outcomes (watermark {model_pipeline.history_watermark_}).")
+    return True
 
 # Main execution block
 # (Keep all the functions from before: get_db_connection, fetch_training_data, etc.)
 
-def run_training_pipeline():
+def training_fill_values(conn, up_to_rowid=None):
+    """
+    The fill statistics preprocess_data takes from a whole history frame, computed in
+    SQLite instead: the mean engineer_general_score and the median job_estimated_time
+    (from the counts of its few distinct values).
+    """
+    params = (0, MAX_ROWID if up_to_rowid is None else up_to_rowid)
+    mean_score = conn.execute(f"SELECT AVG(engineer_general_score) FROM ({TRAINING_DATA_QUERY})", params).fetchone()[0]
+    counts = conn.execute(f"""
+        SELECT job_estimated_time, COUNT(*) FROM ({TRAINING_DATA_QUERY})
+        WHERE job_estimated_time IS NOT NULL
+        GROUP BY job_estimated_time ORDER BY job_estimated_time
+    """, params).fetchall()
+    median_time = np.nan
+    if counts:
+        values = np.array([row[0] for row in counts], dtype=float)
+        cumulative = np.cumsum([row[1] for row in counts])
+        total = cumulative[-1]
+        # Middle element(s) of the sorted values, as pandas' median would pick them
+        lower = values[np.searchsorted(cumulative, (total - 1) // 2, side='right')]
+        upper = values[np.searchsorted(cumulative, total // 2, side='right')]
+        median_time = (lower + upper) / 2
+    return {'engineer_general_score': np.nan if mean_score is None else mean_score, 'job_estimated_time': median_time}
+
+def fold_job_totals(totals, chunk, keys=('engineer_id', 'job_description_text')):
+    """Adds a chunk's outcome sums and counts per (engineer, job type) to the running totals."""
+    chunk_totals = chunk.groupby(list(keys), observed=True, dropna=False)['outcome_score'].agg(
+        score_sum='sum', score_count='count').reset_index()
+    if totals is None:
+        return chunk_totals
+    return pd.concat([totals, chunk_totals], ignore_index=True).groupby(
+        list(keys), as_index=False, dropna=False, observed=True).sum()
+
+def iter_feature_chunks(conn, fill_values, chunk_size=FETCH_CHUNK_ROWS):
+    """
+    Yields (X, y, history_order, preprocessor) per chunk of the training query. The
+    point-in-time features carry running totals across chunks, so they match what
+    preprocess_data gives for the whole history at once.
+    """
+    totals = None
+    for chunk in iter_training_chunks(conn, chunk_size=chunk_size):
+        X, y, preprocessor = preprocess_data(chunk, prior_totals=totals, fill_values=fill_values, verbose=False)
+        totals = fold_job_totals(totals, chunk)
+        yield X, y, chunk['history_order'].to_numpy(), preprocessor
+
+def run_streaming_training(chunk_size=FETCH_CHUNK_ROWS, epochs=STREAM_EPOCHS, memory_report=False):
+    """
+    Trains the online (SGD) model out of core: memory is bounded by chunk_size rather
+    than by the size of the history. The saved model can then be kept current with
+    run_online_update; its watermark is the last trained row, so the held-out rows are
+    folded in by the next update.
+    """
+    print("\n--- Starting Streaming Model Training ---")
+    report = StageMemoryReport(memory_report)
+    conn = get_db_connection()
+    try:
+        with report.stage('fill statistics'):
+            total_rows = conn.execute("SELECT COUNT(*) FROM engineer_past_performance").fetchone()[0]
+            if not total_rows:
+                print("No training data in engineer_past_performance. Model training aborted.")
+                return False
+            holdout_rows = min(max(1, int(total_rows * STREAM_HOLDOUT_FRACTION)), chunk_size)
+            cutoff = conn.execute("SELECT rowid FROM engineer_past_performance ORDER BY rowid LIMIT 1 OFFSET ?",
+                                  (total_rows - holdout_rows - 1,)).fetchone()
+            cutoff = cutoff[0] if cutoff else 0
+            fill_values = training_fill_values(conn, cutoff)
+            print(f"{total_rows} rows; training on rowid <= {cutoff}, holding out the last {holdout_rows}.")
+
+        # Pass 1: scaler statistics and category vocabulary
+        with report.stage('pass 1: scaler + vocab'):
+            scaler = StandardScaler()
+            preprocessor, sample, distinct_categories = None, None, []
+            for X, y, order, chunk_preprocessor in iter_feature_chunks(conn, fill_values, chunk_size):
+                X_train = X[order <= cutoff]
+                if X_train.empty:
+                    continue
+                scaler.partial_fit(X_train[NUMERICAL_FEATURES])
+                distinct_categories.append(X_train[CATEGORICAL_FEATURES].drop_duplicates())
+                if preprocessor is None:
+                    preprocessor, sample = chunk_preprocessor, X_train.iloc[:1]
+            if preprocessor is None:
+                print("Not enough training data before the holdout. Model training aborted.")
+                return False
+            vocabulary = category_vocabulary(pd.concat(distinct_categories).drop_duplicates(), conn)
+
+            # Fix the vocabulary, build the fitted structure on one row, then swap in the pass-1 scaler
+            preprocessor.set_params(cat__categories=[vocabulary[col] for col in CATEGORICAL_FEATURES])
+            preprocessor.fit(sample)
+            preprocessor.transformers_ = [(name, scaler if name == 'num' else transformer, columns)
+                                          for name, transformer, columns in preprocessor.transformers_]
+
+        # Pass 2: incremental training, then the held-out rows (they come last in rowid order)
+        with report.stage('pass 2: partial_fit'):
+            classifier = build_online_classifier()
+            holdout_y, holdout_proba = [], []
+            for epoch in range(epochs):
+                for X, y, order, _ in iter_feature_chunks(conn, fill_values, chunk_size):
+                    train = order <= cutoff
+                    if train.any():
+                        classifier.partial_fit(preprocessor.transform(X[train]), y[train], classes=ONLINE_CLASSES)
+                    if epoch == epochs - 1 and not train.all():
+                        holdout_y.append(y[~train].to_numpy())
+                        holdout_proba.append(classifier.predict_proba(preprocessor.transform(X[~train]))[:, 1])
+    finally:
+        conn.close()
+        report.print_report()
+
+    model_pipeline = Pipeline(steps=[('preprocessor', preprocessor), ('classifier', classifier)])
+    model_pipeline.history_watermark_ = int(cutoff)
+    if holdout_y:
+        y_true, y_proba = np.concatenate(holdout_y), np.concatenate(holdout_proba)
+        print("Holdout Accuracy:", accuracy_score(y_true, (y_proba >= 0.5).astype(int)))
+        try:
+            print("Holdout ROC AUC Score:", roc_auc_score(y_true, y_proba))
+        except ValueError as e:
+            print(f"Could not calculate ROC AUC Score: {e}.")
+
+    save_model(model_pipeline, MODEL_FILE_PATH)
+    export_scorer(model_pipeline, SCORER_FILE_PATH)
+    print(f"Streamed model saved to: {MODEL_FILE_PATH}")
+    return True
+
+def run_training_pipeline(online=False, search=False, memory_report=False):
     """
     Executes the full model training and evaluation pipeline.
     This function can be called from other modules.
+    With online=True the model is an SGD logistic regression with a fixed category
+    vocabulary, which run_online_update can then keep up to date between full retrains.
+    With search=True the model family and regularization are picked first by
+    cross-validated ROC AUC under a latency budget (core/model_search.py).
+    With memory_report=True the peak memory of each stage is printed at the end.
     """
+    report = StageMemoryReport(memory_report)
+    try:
+        return _run_training_stages(report, online, search)
+    finally:
+        report.print_report()
+
+def _run_training_stages(report, online, search):
     print("\n--- Starting AI Model Training Pipeline ---")
     # 1. Fetch data
-    raw_data_df = fetch_training_data()
+    with report.stage('fetch'):
+        raw_data_df = fetch_training_data()
 
     if not raw_data_df.empty:
         # 2. Preprocess data
-        X_features, y_target, data_preprocessor = preprocess_data(raw_data_df)
+        with report.stage('features'):
+            X_features, y_target, data_preprocessor = preprocess_data(raw_data_df)
 
         if X_features is not None and not X_features.empty and y_target is not None and not y_target.empty:
             # 3. Train and evaluate model
-            trained_model = train_and_evaluate_model(X_features, y_target, data_preprocessor)
+            watermark = int(raw_data_df['history_order'].max())
+            if online:
+                conn = get_db_connection()
+                try:
+                    vocabulary = category_vocabulary(X_features, conn)
+                finally:
+                    conn.close()
+                data_preprocessor.set_params(cat__categories=[vocabulary[col] for col in CATEGORICAL_FEATURES if col in vocabulary])
+                with report.stage('train + evaluate'):
+                    trained_model = train_and_evaluate_model(X_features, y_target, data_preprocessor,
+                                                             build_online_classifier(), watermark)
+            elif search:
+                with report.stage('model search'):
+                    best_classifier, _ = search_model_family(X_features, y_target, data_preprocessor)
+                with report.stage('train + evaluate'):
+                    trained_model = train_and_evaluate_model(X_features, y_target, data_preprocessor,
+                                                             best_classifier, watermark)
+            else:
+                with report.stage('train + evaluate'):
+                    trained_model = train_and_evaluate_model(X_features, y_target, data_preprocessor,
+                                                             history_watermark=watermark)
             
             if trained_model:
                 print("\n--- Model Training Pipeline Completed Successfully ---")
@@ -262,4 +660,15 @@ def run_training_pipeline():
 # Main execution block
 if __name__ == '__main__':
     # Running this script directly will now execute the training pipeline
-    run_training_pipeline()
\ No newline at end of file
+    # python core/predictive_model.py --online         -> full retrain of the online (SGD) model
+    # python core/predictive_model.py --online-update  -> fold in only the outcomes since the last run
+    # python core/predictive_model.py --search         -> cross-validated model-family search, then train the winner
+    # python core/predictive_model.py --stream         -> out-of-core two-pass training of the online model
+    # add --memory-report to print the peak memory of each training stage
+    if '--online-update' in sys.argv:
+        run_online_update()
+    elif '--stream' in sys.argv:
+        run_streaming_training(memory_report='--memory-report' in sys.argv)
+    else:
+        run_training_pipeline(online='--online' in sys.argv, search='--search' in sys.argv,
+                              memory_report='--memory-report' in sys.argv)
\ No newline at end of file
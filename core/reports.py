@@ -1,15 +1,17 @@
-import sqlite3
 import os
 
+try:
+    from core.db import get_connection
+except ImportError:  # Running this file directly (python core/reports.py)
+    from db import get_connection
+
 # Database path
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATABASE_NAME = os.path.join(BASE_DIR, 'database', 'workshop.db')
 
 def get_db_connection():
-    """Establishes a connection to the SQLite database."""
-    conn = sqlite3.connect(DATABASE_NAME)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Returns a pooled connection to the SQLite database (rows accessible by name)."""
+    return get_connection(DATABASE_NAME)
 
 def display_system_status():
     """Queries and displays a general status of the system."""
@@ -0,0 +1,224 @@
+# In core/task_scheduler.py
+import heapq
+import itertools
+import os
+import threading
+import time
+
+import pandas as pd
+
+try:
+    from core.excel_snapshot import read_excel_cached
+except ImportError:  # Running from inside core/
+    from excel_snapshot import read_excel_cached
+
+# --- Priority scheduler for the pending task queue ---
+# A task becomes eligible once every task before it in the same job is completed, and
+# eligible tasks sit on one heap keyed on
+#     created minute - urgency head start + DURATION_WEIGHT * expected minutes
+# so older, more urgent and shorter tasks go first. Every part of the key is fixed when
+# the task is queued, so ageing needs no re-keying: a Low task that has waited longer
+# than the High head start still overtakes a newly created High one. Dispatch is a heap
+# pop, O(log n); removed tasks are dropped lazily when they reach the top.
+URGENCY_HEADSTART_MINUTES = {'High': 1440, 'Normal': 480, 'Low': 0}  # High counts as created a day earlier
+DURATION_WEIGHT = 0.5            # 60 extra expected minutes count like arriving 30 minutes later
+DEFAULT_EXPECTED_MINUTES = 60
+DISPATCH_LOOKAHEAD = 10          # Eligible tasks pop() inspects for one engineer before giving up
+
+JOB_CARD_QUERY = """
+    SELECT rowid AS card_rowid, Job_Id, Job_Name, Task_Id, Task_Description, Date_Created,
+           Urgency, Engineer_Id, Estimated_Standard_Time
+    FROM job_card
+    WHERE rowid > ? AND COALESCE(Status, '') != 'Completed'
+    ORDER BY rowid
+"""
+
+
+def task_priority(created_minutes, urgency, expected_minutes,
+                  urgency_headstart=URGENCY_HEADSTART_MINUTES, duration_weight=DURATION_WEIGHT):
+    """Heap key of a task; smaller is dispatched first."""
+    if expected_minutes is None or pd.isna(expected_minutes):
+        expected_minutes = DEFAULT_EXPECTED_MINUTES
+    return created_minutes - urgency_headstart.get(urgency, 0) + duration_weight * float(expected_minutes)
+
+def load_task_sequences(conn, mapping_excel_path=None):
+    """
+    {(job name, task): sequence} from job_task_mapping, keyed by Task_id. If the table is
+    missing or empty, falls back to the Job_Task_Mapping workbook it is loaded from,
+    keyed by task name (Job Category is only filled on each job's first row there).
+    """
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if {'job_task_mapping', 'job_definitions'} <= tables:
+        rows = conn.execute("""
+            SELECT jd.Job_name, m.Task_id, m.sequence
+            FROM job_task_mapping m
+            JOIN job_definitions jd ON jd.Parent_job_id = m.Parent_job_id
+        """).fetchall()
+        if rows:
+            return {(job_name, task_id): int(sequence) for job_name, task_id, sequence in rows}
+
+    if mapping_excel_path and os.path.exists(mapping_excel_path):
+        mapping = read_excel_cached(mapping_excel_path)
+        jobs = mapping['Job Category'].ffill()
+        return {
+            (job_name, str(task_name).strip()): int(sequence)
+            for job_name, task_name, sequence in zip(jobs, mapping['Task Name'], mapping['Task Sequence'])
+            if pd.notna(task_name) and pd.notna(sequence)
+        }
+    return {}
+
+
+class TaskScheduler:
+    """
+    The pending task queue in dispatch order. add() queues a task, pop() hands out the
+    best eligible one, complete() releases the next task of its job.
+
+    A task is a dict with 'key' (unique; the job_card rowid), 'job_id', 'task_id',
+    'sequence' (None: no ordering constraint), 'urgency', 'created' (minutes) and
+    'expected_minutes'. Thread-safe; job_manager keeps one per process.
+    """
+
+    def __init__(self, urgency_headstart=URGENCY_HEADSTART_MINUTES, duration_weight=DURATION_WEIGHT):
+        self.urgency_headstart = urgency_headstart
+        self.duration_weight = duration_weight
+        self._lock = threading.RLock()
+        self._heap = []          # [priority, tiebreak, task]; task is None once dequeued
+        self._queued = {}        # key -> heap entry of each eligible task
+        self._tasks = {}         # key -> task, for every task not completed yet
+        self._jobs = {}          # job_id -> {key: task}, the same tasks by job
+        self._counter = itertools.count()
+        self.sequences = None    # Loaded on the first sync()
+        self.watermark = 0       # Highest job_card rowid synced so far
+
+    def __len__(self):
+        return len(self._queued)
+
+    # --- Queue bookkeeping ---
+
+    def priority(self, task):
+        return task_priority(task['created'], task['urgency'], task['expected_minutes'],
+                             self.urgency_headstart, self.duration_weight)
+
+    def _push(self, task):
+        entry = [self.priority(task), next(self._counter), task]
+        heapq.heappush(self._heap, entry)
+        self._queued[task['key']] = entry
+        task['state'] = 'queued'
+
+    def _unqueue(self, key):
+        entry = self._queued.pop(key, None)
+        if entry is not None:
+            entry[-1] = None
+
+    def _release(self, job_id):
+        """Re-derives which of the job's tasks may run: those at the lowest open sequence."""
+        tasks = self._jobs.get(job_id)
+        if not tasks:
+            self._jobs.pop(job_id, None)
+            return
+        open_sequences = [t['sequence'] for t in tasks.values() if t['sequence'] is not None]
+        front = min(open_sequences) if open_sequences else None
+        for task in tasks.values():
+            eligible = task['sequence'] is None or task['sequence'] <= front
+            if task['state'] == 'blocked' and eligible:
+                self._push(task)
+            elif task['state'] == 'queued' and not eligible:
+                self._unqueue(task['key'])  # An earlier task of the job turned up later
+                task['state'] = 'blocked'
+
+    # --- Public API ---
+
+    def add(self, task, started=False):
+        """Queues a task; started=True records one already in progress so it holds back the rest of its job."""
+        with self._lock:
+            if task['key'] in self._tasks:
+                return
+            task = dict(task, state='started' if started else 'blocked')
+            self._tasks[task['key']] = task
+            self._jobs.setdefault(task['job_id'], {})[task['key']] = task
+            self._release(task['job_id'])
+
+    def start(self, key):
+        """Marks a task as taken (assigned by another path), so it is no longer offered."""
+        with self._lock:
+            self._unqueue(key)
+            if key in self._tasks:
+                self._tasks[key]['state'] = 'started'
+
+    def requeue(self, task):
+        """Puts back a task pop() returned that could not be assigned after all."""
+        with self._lock:
+            current = self._tasks.get(task['key'])
+            if current is not None and current['state'] == 'started':
+                current['state'] = 'blocked'
+                self._release(task['job_id'])
+
+    def complete(self, key):
+        """Drops a completed (or cancelled) task and releases the next task of its job."""
+        with self._lock:
+            self._unqueue(key)
+            task = self._tasks.pop(key, None)
+            if task is not None:
+                del self._jobs[task['job_id']][key]
+                self._release(task['job_id'])
+
+    def pop(self, accept=None, lookahead=DISPATCH_LOOKAHEAD):
+        """
+        Removes and returns the highest-priority eligible task that accept(task) approves
+        (any task if accept is None), marked as started. Tasks accept() turns down stay
+        queued; None if nothing is approved among the first `lookahead` candidates.
+        """
+        rejected = []
+        chosen = None
+        with self._lock:
+            while self._heap and len(rejected) < lookahead:
+                entry = heapq.heappop(self._heap)
+                task = entry[-1]
+                if task is None:
+                    continue  # Dequeued earlier
+                if accept is None or accept(task):
+                    del self._queued[task['key']]
+                    task['state'] = 'started'
+                    chosen = task
+                    break
+                rejected.append(entry)
+            for entry in rejected:
+                heapq.heappush(self._heap, entry)
+        return chosen
+
+    def queued(self):
+        """The eligible tasks in dispatch order (a sorted copy; the queue is unchanged)."""
+        with self._lock:
+            return [entry[-1] for entry in sorted(self._queued.values())]
+
+    # --- Loading from job_card ---
+
+    def sync(self, conn, mapping_excel_path=None):
+        """
+        Adds the job_card rows inserted since the last sync (rowid watermark): unassigned
+        rows are queued, assigned ones recorded as in progress. Rows assigned or completed
+        elsewhere are caught when their claim fails, so this is the only read needed.
+        """
+        if self.sequences is None:
+            self.sequences = load_task_sequences(conn, mapping_excel_path)
+        df = pd.read_sql_query(JOB_CARD_QUERY, conn, params=(self.watermark,))
+        if df.empty:
+            return 0
+
+        created = pd.to_datetime(df['Date_Created'], errors='coerce', format='mixed')
+        created_minutes = ((created - pd.Timestamp(0)) / pd.Timedelta(minutes=1)).fillna(time.time() / 60)
+        with self._lock:
+            for row, created_at in zip(df.itertuples(index=False), created_minutes):
+                sequence = self.sequences.get((row.Job_Name, row.Task_Id),
+                                              self.sequences.get((row.Job_Name, row.Task_Description)))
+                self.add({
+                    'key': int(row.card_rowid),
+                    'job_id': row.Job_Id,
+                    'task_id': row.Task_Id,
+                    'sequence': sequence,
+                    'urgency': row.Urgency,
+                    'created': float(created_at),
+                    'expected_minutes': row.Estimated_Standard_Time,
+                }, started=pd.notna(row.Engineer_Id))
+            self.watermark = max(self.watermark, int(df['card_rowid'].max()))
+        return len(df)
@@ -0,0 +1,483 @@
+# In core/workshop_simulator.py
+import os
+import sys
+import time
+import heapq
+import argparse
+import numpy as np
+import pandas as pd
+
+try:
+    from core.db import get_connection
+    from core.excel_snapshot import read_excel_cached
+    from core.job_assigner import build_candidate_features, load_scorer
+    from core.task_scheduler import task_priority
+except ImportError:  # Running this file directly (python core/workshop_simulator.py)
+    from db import get_connection
+    from excel_snapshot import read_excel_cached
+    from job_assigner import build_candidate_features, load_scorer
+    from task_scheduler import task_priority
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from recommender import RecommenderEngine
+from job_manager import URGENCY_WEIGHTS, greedy_assignment, solve_batch_assignment
+from generate_and_load import JOB_TO_TASKS_MAPPING, TASKS_DATA, URGENCY_LEVELS, generate_flat_data
+
+# --- Discrete-event workshop simulator ---
+# Vehicles arrive, wait for a free bay and have their tasks done one after another, in
+# sequence. Every timestamped event (arrival, task done, shift start) sits on one heap,
+# and whenever a task is ready and an engineer is idle during opening hours the real
+# assignment code decides who does what: the recommender's engineer/task scores with
+# job_manager's greedy or batch solver, or the job success model through job_assigner.
+# The priority policy orders the yard and the ready tasks like core/task_scheduler.py.
+# Durations and outcome scores are sampled from job_history for the chosen task and
+# engineer, so a better policy shows up as better outcomes and fewer SLA misses.
+# Nothing is written to the database.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY_DB_PATH = os.path.join(BASE_DIR, 'database', 'workshopnew.db')
+INCOMING_EXCEL_PATH = os.path.join(BASE_DIR, 'data', 'incoming_vehicles.xlsx')
+
+DAY_MINUTES = 24 * 60
+OPEN_MINUTE = 8 * 60    # Tasks start between 08:00 and 18:00; one that is running at closing time is finished
+CLOSE_MINUTE = 18 * 60
+DEFAULT_DAYS = 30
+DEFAULT_BAYS = 10
+DEFAULT_JOBS_PER_DAY = 10
+# A job misses its SLA when its turnaround in opening hours exceeds this multiple of its standard time
+SLA_STANDARD_TIME_MULTIPLE = {'High': 2.0, 'Normal': 3.0, 'Low': 5.0}
+POLICIES = ['greedy', 'batch', 'model', 'priority']
+SOURCES = ['generated', 'incoming']
+
+# Event kinds, in the order they are handled at the same timestamp: a completion frees
+# its engineer before a simultaneous arrival or shift start triggers a decision
+TASK_DONE, ARRIVAL, SHIFT_START = 0, 1, 2
+
+TASK_IDS_BY_NAME = {info['name']: task_id for task_id, info in TASKS_DATA.items()}
+
+
+def next_opening(t):
+    """Earliest time >= t at which the workshop is open."""
+    day, minute = divmod(t, DAY_MINUTES)
+    if minute < OPEN_MINUTE:
+        return day * DAY_MINUTES + OPEN_MINUTE
+    if minute >= CLOSE_MINUTE:
+        return (day + 1) * DAY_MINUTES + OPEN_MINUTE
+    return t
+
+def open_minutes_between(start, end):
+    """Opening-hours minutes between two times (arrays allowed), i.e. elapsed time without nights."""
+    def since_start(t):
+        day, minute = np.divmod(t, DAY_MINUTES)
+        return day * (CLOSE_MINUTE - OPEN_MINUTE) + np.clip(minute, OPEN_MINUTE, CLOSE_MINUTE) - OPEN_MINUTE
+    return since_start(end) - since_start(start)
+
+# --- Arrivals ---
+
+def arrival_times(days, jobs_per_day, rng):
+    """Poisson number of arrivals per day, spread uniformly over opening hours (minutes since day 0)."""
+    counts = rng.poisson(jobs_per_day, days)
+    day = np.repeat(np.arange(days), counts)
+    return np.sort(day * DAY_MINUTES + OPEN_MINUTE + rng.random(len(day)) * (CLOSE_MINUTE - OPEN_MINUTE))
+
+def generated_visits(num_jobs, rng):
+    """Jobs drawn by generate_and_load's synthetic history generator, one visit per Job_ID, tasks in sequence."""
+    df = generate_flat_data(num_jobs, seed=int(rng.integers(2**31)))
+    visits = []
+    for _, job in df.groupby('Job_ID', sort=False):
+        first = job.iloc[0]
+        visits.append({
+            'job_name': first['Job_Name'],
+            'urgency': first['Urgency'],
+            'make': first['Make'],
+            'tasks': list(zip(job['Task_Id'], job['Estimated_Standard_Time'].astype(float)))
+        })
+    return visits
+
+def incoming_visits(num_jobs, rng, excel_path=INCOMING_EXCEL_PATH):
+    """
+    Visits resampled from incoming_vehicles.xlsx. A service name expands to its task
+    sequence, a known task name maps to its Task_Id and any other job becomes a single
+    task with the sheet's estimate. The sheet has no urgency, so it is drawn at random.
+    """
+    templates = []
+    for _, vehicle in read_excel_cached(excel_path).iterrows():
+        descriptions, tasks = [], []
+        for k in (1, 2, 3):
+            description, estimate = vehicle.get(f'Job{k}_Desc'), vehicle.get(f'Job{k}_EstTime')
+            if pd.isna(description):
+                continue
+            description = str(description).strip()
+            descriptions.append(description)
+            if JOB_TO_TASKS_MAPPING.get(description):
+                tasks += [(task_id, float(TASKS_DATA[task_id]['time'])) for task_id in JOB_TO_TASKS_MAPPING[description]]
+            else:
+                tasks.append((TASK_IDS_BY_NAME.get(description, description), 60.0 if pd.isna(estimate) else float(estimate)))
+        if tasks:
+            job_name = next((d for d in descriptions if d in JOB_TO_TASKS_MAPPING), 'Custom Service')
+            templates.append({'job_name': job_name, 'make': vehicle['Make'], 'tasks': tasks})
+    if not templates:
+        raise ValueError(f"No jobs found in {excel_path}.")
+
+    picks = rng.integers(0, len(templates), num_jobs)
+    urgencies = rng.integers(0, len(URGENCY_LEVELS), num_jobs)
+    return [dict(templates[p], urgency=URGENCY_LEVELS[u]) for p, u in zip(picks, urgencies)]
+
+# --- History ---
+
+def load_history(db_path=HISTORY_DB_PATH):
+    """Completed job_history rows and the engineer profiles, read once."""
+    conn = get_connection(db_path)
+    try:
+        history_columns = {row[1] for row in conn.execute("PRAGMA table_info(job_history)")}
+        engineer_col = 'Assigned_Engineer_Id' if 'Assigned_Engineer_Id' in history_columns else 'Engineer_Id'
+        history = pd.read_sql_query(f"""
+            SELECT Task_Id, {engineer_col} AS Engineer_Id, Job_Name, Time_Taken_minutes,
+                   Estimated_Standard_Time, Outcome_Score
+            FROM job_history WHERE Status = 'Completed'
+        """, conn)
+        profiles = pd.read_sql_query("SELECT * FROM engineer_profiles", conn)
+    finally:
+        conn.close()
+    return history.dropna(subset=['Engineer_Id', 'Time_Taken_minutes', 'Outcome_Score']).reset_index(drop=True), profiles
+
+
+class HistorySampler:
+    """
+    Draws a (duration, outcome score) pair for a task done by an engineer: a past row of
+    that task by that engineer if there is one, else any row of the task, else the
+    actual/standard time ratio of a random row applied to the task's standard time.
+    """
+
+    def __init__(self, history, rng):
+        self.rng = rng
+        self.minutes = history['Time_Taken_minutes'].to_numpy(dtype=float)
+        self.outcomes = history['Outcome_Score'].to_numpy(dtype=float)
+        standard = history['Estimated_Standard_Time'].to_numpy(dtype=float)
+        self.ratios = np.where(standard > 0, self.minutes / np.where(standard > 0, standard, 1.0), 1.0)
+        self.pair_rows = history.groupby(['Task_Id', 'Engineer_Id']).indices
+        self.task_rows = history.groupby('Task_Id').indices
+
+    def sample(self, task_id, engineer_id, standard_minutes):
+        rows = self.pair_rows.get((task_id, engineer_id))
+        if rows is None:
+            rows = self.task_rows.get(task_id)
+        if rows is not None:
+            row = rows[self.rng.integers(len(rows))]
+            return max(1.0, self.minutes[row]), self.outcomes[row]
+        row = self.rng.integers(len(self.minutes))
+        return max(1.0, standard_minutes * self.ratios[row]), self.outcomes[row]
+
+
+class JobScoreTracker:
+    """
+    Running (engineer, job) outcome averages, seeded from history and updated as the
+    simulation completes tasks; the in-memory counterpart of the feature store that
+    job_assigner reads its job-specific features from.
+    """
+
+    def __init__(self, history):
+        grouped = history.groupby(['Engineer_Id', 'Job_Name'])['Outcome_Score'].agg(['sum', 'count'])
+        self.totals = {key: [float(s), int(c)] for key, s, c in zip(grouped.index, grouped['sum'], grouped['count'])}
+
+    def record(self, engineer_id, job_name, outcome_score):
+        totals = self.totals.setdefault((engineer_id, job_name), [0.0, 0])
+        totals[0] += outcome_score
+        totals[1] += 1
+
+    def histories(self, engineer_ids, job_name):
+        """engineer_id -> (avg_score, exp_count), the shape get_engineer_job_histories returns."""
+        result = {}
+        for engineer_id in engineer_ids:
+            total, count = self.totals.get((engineer_id, job_name), (0.0, 0))
+            result[engineer_id] = (total / count if count else None, count)
+        return result
+
+# --- Assignment policies ---
+
+def recommender_scores(engine, tasks, engineer_ids):
+    """
+    Engineer/task similarity for every ready task. Pairs without shared history score 0
+    instead of being infeasible, so tasks nobody has done before still get an engineer.
+    """
+    return np.nan_to_num(engine.score_matrix([task['task_id'] for task in tasks], engineer_ids), nan=0.0)
+
+def make_policy(name, engine, job_scores, general_scores, model_pipeline=None):
+    """
+    Returns policy(tasks, engineer_ids) -> [(task_index, engineer_index), ...] for one decision point.
+      greedy: recommender scores, tasks in queue order (as assign_engineers_to_pending_jobs)
+      batch:  recommender scores, urgency-weighted assignment
+      model:  job success probabilities from job_assigner's candidate features, urgency-weighted assignment
+              (as assign_engineers_to_pending_jobs_batch)
+      priority: recommender scores, tasks in task_scheduler order (urgency, age, expected duration)
+    """
+    def urgency_weights(tasks):
+        return [URGENCY_WEIGHTS.get(task['urgency'], 1.0) for task in tasks]
+
+    if name == 'greedy':
+        def greedy(tasks, engineer_ids):
+            return greedy_assignment(recommender_scores(engine, tasks, engineer_ids), [1] * len(engineer_ids))
+        return greedy
+
+    if name == 'batch':
+        def batch(tasks, engineer_ids):
+            return solve_batch_assignment(recommender_scores(engine, tasks, engineer_ids),
+                                          urgency_weights(tasks), [1] * len(engineer_ids))
+        return batch
+
+    if name == 'priority':
+        def priority(tasks, engineer_ids):
+            order = sorted(range(len(tasks)), key=lambda i: task_priority(
+                tasks[i]['created'], tasks[i]['urgency'], tasks[i]['expected_minutes']))
+            scores = recommender_scores(engine, [tasks[i] for i in order], engineer_ids)
+            return [(order[task], engineer) for task, engineer in greedy_assignment(scores, [1] * len(engineer_ids))]
+        return priority
+
+    if name == 'model':
+        if model_pipeline is None:
+            raise ValueError("The model policy needs a trained job success model. Run core/predictive_model.py first.")
+
+        def model(tasks, engineer_ids):
+            available = [{'engineer_id': e, 'overall_past_job_score': general_scores.get(e)} for e in engineer_ids]
+            frames = []
+            for task in tasks:
+                job = {'job_description_text': task['job_name'], 'vehicle_make': task['make'],
+                       'job_estimated_time': task['job_minutes']}
+                _, features = build_candidate_features(job, available, job_scores.histories(engineer_ids, task['job_name']))
+                frames.append(features)
+            probabilities = model_pipeline.predict_proba(pd.concat(frames, ignore_index=True))[:, 1]
+            return solve_batch_assignment(probabilities.reshape(len(tasks), len(engineer_ids)),
+                                          urgency_weights(tasks), [1] * len(engineer_ids))
+        return model
+
+    raise ValueError(f"Unknown policy '{name}'. Choose one of: {', '.join(POLICIES)}.")
+
+# --- Simulation ---
+
+class WorkshopSimulator:
+    """
+    One simulated run. visits[i] arrives at arrivals[i]; run() processes events in time
+    order until every visit is finished and returns the report dict. Vehicles waiting
+    for a bay go in first come, first served, or in task_scheduler order if prioritize.
+    """
+
+    def __init__(self, visits, arrivals, engineer_ids, policy, sampler, engine, job_scores, bays=DEFAULT_BAYS,
+                 prioritize=False):
+        self.visits = visits
+        self.arrivals = arrivals
+        self.engineer_ids = list(engineer_ids)
+        self.policy = policy
+        self.sampler = sampler
+        self.engine = engine
+        self.job_scores = job_scores
+        self.bays = bays
+        self.prioritize = prioritize
+
+        self.events = []
+        self.sequence = 0
+        self.now = 0.0
+        self.waiting = []            # Heap of (admission key, visit index): arrived, no free bay yet
+        self.ready = []              # In a bay with its next task waiting for an engineer
+        self.idle = set(self.engineer_ids)
+        self.free_bays = bays
+
+        self.busy_minutes = dict.fromkeys(self.engineer_ids, 0.0)
+        self.outcomes = []
+        self.decisions = 0
+        self.assignments = 0
+        self.decision_seconds = 0.0
+
+    def push(self, t, kind, payload=None):
+        heapq.heappush(self.events, (t, kind, self.sequence, payload))
+        self.sequence += 1
+
+    def run(self):
+        start = time.perf_counter()
+        for i, (visit, arrival) in enumerate(zip(self.visits, self.arrivals)):
+            visit.update(arrived=float(arrival), next_task=0, admitted=None, finished=None,
+                         job_minutes=sum(minutes for _, minutes in visit['tasks']))
+            self.push(float(arrival), ARRIVAL, i)
+        self.push(next_opening(0.0), SHIFT_START)
+
+        while self.events:
+            self.now, kind, _, payload = heapq.heappop(self.events)
+            if kind == TASK_DONE:
+                self.finish_task(*payload)
+            elif kind == ARRIVAL:
+                visit = self.visits[payload]
+                key = task_priority(visit['arrived'], visit['urgency'], visit['job_minutes']) if self.prioritize else payload
+                heapq.heappush(self.waiting, (key, payload))
+                self.admit()
+            elif self.events or self.waiting or self.ready:
+                self.push(self.now + DAY_MINUTES, SHIFT_START)  # Keep opening while work remains
+            self.dispatch()
+        return self.report(time.perf_counter() - start)
+
+    def admit(self):
+        while self.waiting and self.free_bays:
+            _, visit_index = heapq.heappop(self.waiting)
+            self.visits[visit_index]['admitted'] = self.now
+            self.free_bays -= 1
+            self.ready.append(visit_index)
+
+    def dispatch(self):
+        """Decision point: offers every ready task and idle engineer to the policy."""
+        if not self.ready or not self.idle or next_opening(self.now) != self.now:
+            return
+        engineer_ids = [e for e in self.engineer_ids if e in self.idle]
+        tasks = []
+        for visit_index in self.ready:
+            visit = self.visits[visit_index]
+            task_id, standard_minutes = visit['tasks'][visit['next_task']]
+            tasks.append({'task_id': task_id, 'job_name': visit['job_name'], 'urgency': visit['urgency'],
+                          'make': visit['make'], 'job_minutes': visit['job_minutes'],
+                          'created': visit['arrived'], 'expected_minutes': standard_minutes})
+
+        start = time.perf_counter()
+        pairs = self.policy(tasks, engineer_ids)
+        self.decision_seconds += time.perf_counter() - start
+        self.decisions += 1
+
+        started = set()
+        for task_index, engineer_index in pairs:
+            visit_index, engineer_id = self.ready[task_index], engineer_ids[engineer_index]
+            visit = self.visits[visit_index]
+            task_id, standard_minutes = visit['tasks'][visit['next_task']]
+            minutes, outcome = self.sampler.sample(task_id, engineer_id, standard_minutes)
+            self.idle.discard(engineer_id)
+            self.busy_minutes[engineer_id] += minutes
+            started.add(visit_index)
+            self.push(self.now + minutes, TASK_DONE, (visit_index, engineer_id, minutes, outcome))
+        self.assignments += len(started)
+        self.ready = [v for v in self.ready if v not in started]
+
+    def finish_task(self, visit_index, engineer_id, minutes, outcome):
+        visit = self.visits[visit_index]
+        task_id, standard_minutes = visit['tasks'][visit['next_task']]
+        # Same live updates complete_task makes, so later decisions see the outcome
+        self.engine.record_outcome(task_id, engineer_id, outcome, minutes, standard_minutes, visit['urgency'])
+        self.job_scores.record(engineer_id, visit['job_name'], outcome)
+        self.outcomes.append(outcome)
+        self.idle.add(engineer_id)
+
+        visit['next_task'] += 1
+        if visit['next_task'] < len(visit['tasks']):
+            self.ready.append(visit_index)
+        else:
+            visit['finished'] = self.now
+            self.free_bays += 1
+            self.admit()
+
+    def report(self, wall_seconds):
+        finished = [v for v in self.visits if v['finished'] is not None]
+        end = max((v['finished'] for v in finished), default=self.now)
+        simulated_days = end / DAY_MINUTES
+        open_minutes = open_minutes_between(0.0, end)
+
+        turnaround = {}
+        for urgency in SLA_STANDARD_TIME_MULTIPLE:
+            jobs = [v for v in finished if v['urgency'] == urgency]
+            hours = open_minutes_between(np.array([v['arrived'] for v in jobs]), np.array([v['finished'] for v in jobs])) / 60
+            allowed = np.array([v['job_minutes'] for v in jobs]) * SLA_STANDARD_TIME_MULTIPLE[urgency] / 60
+            turnaround[urgency] = {
+                'jobs': len(jobs),
+                'mean_hours': float(np.mean(hours)) if len(jobs) else 0.0,
+                'p90_hours': float(np.percentile(hours, 90)) if len(jobs) else 0.0,
+                'sla_misses': int(np.sum(hours > allowed)),
+            }
+
+        # Busy time includes tasks that overrun closing time, so an engineer can exceed 100%
+        utilization = np.array(list(self.busy_minutes.values())) / max(open_minutes, 1.0)
+        bay_minutes = sum(v['finished'] - v['admitted'] for v in finished)
+        return {
+            'jobs': len(self.visits),
+            'jobs_finished': len(finished),
+            'tasks_done': len(self.outcomes),
+            'simulated_days': simulated_days,
+            'bay_throughput_per_day': len(finished) / self.bays / max(simulated_days, 1e-9),
+            'bay_occupancy': bay_minutes / (self.bays * max(end, 1.0)),
+            'utilization_mean': float(utilization.mean()),
+            'utilization_min': float(utilization.min()),
+            'utilization_max': float(utilization.max()),
+            'mean_outcome_score': float(np.mean(self.outcomes)) if self.outcomes else 0.0,
+            'turnaround': turnaround,
+            'sla_misses': sum(t['sla_misses'] for t in turnaround.values()),
+            'decisions': self.decisions,
+            'assignments': self.assignments,
+            'decisions_per_second': self.decisions / self.decision_seconds if self.decision_seconds else 0.0,
+            'decision_ms': self.decision_seconds * 1000 / max(self.decisions, 1),
+            'wall_seconds': wall_seconds,
+        }
+
+
+def print_report(policy_name, report):
+    print(f"\n=== Policy: {policy_name} ===")
+    print(f"Jobs finished: {report['jobs_finished']}/{report['jobs']} ({report['tasks_done']} tasks) "
+          f"over {report['simulated_days']:.1f} simulated days")
+    print(f"Bay throughput: {report['bay_throughput_per_day']:.2f} vehicles per bay per day, "
+          f"bay occupancy {report['bay_occupancy']:.0%}")
+    print(f"Engineer utilization (opening hours): mean {report['utilization_mean']:.0%}, "
+          f"min {report['utilization_min']:.0%}, max {report['utilization_max']:.0%}")
+    print(f"Mean outcome score: {report['mean_outcome_score']:.3f}")
+    print(f"{'Urgency':<8}{'Jobs':>6}{'Mean (h)':>10}{'P90 (h)':>9}{'SLA misses':>12}")
+    for urgency, stats in report['turnaround'].items():
+        share = stats['sla_misses'] / stats['jobs'] if stats['jobs'] else 0.0
+        print(f"{urgency:<8}{stats['jobs']:>6}{stats['mean_hours']:>10.1f}{stats['p90_hours']:>9.1f}"
+              f"{stats['sla_misses']:>6} ({share:>4.0%})")
+    print(f"Decisions: {report['decisions']} ({report['assignments']} assignments), "
+          f"{report['decisions_per_second']:,.0f} decisions/s, {report['decision_ms']:.3f} ms each")
+    print(f"Simulated in {report['wall_seconds']:.2f} s")
+
+def run_simulation(policies=('greedy', 'batch'), days=DEFAULT_DAYS, source='generated', jobs_per_day=DEFAULT_JOBS_PER_DAY,
+                   bays=DEFAULT_BAYS, engineers=None, seed=42, db_path=HISTORY_DB_PATH):
+    """
+    Simulates the same arrivals and the same random draws once per policy and returns
+    {policy: report}. engineers limits the roster to the first n engineer profiles.
+    """
+    history, profiles = load_history(db_path)
+    if 'Engineer_ID' in profiles.columns:
+        engineer_ids = profiles['Engineer_ID'].tolist()
+    else:
+        engineer_ids = sorted(history['Engineer_Id'].unique())
+    engineer_ids = engineer_ids[:engineers] if engineers else engineer_ids
+    general_scores = {}
+    if 'Overall_Performance_Score' in profiles.columns:
+        general_scores = dict(zip(profiles['Engineer_ID'], profiles['Overall_Performance_Score']))
+
+    rng = np.random.default_rng(seed)
+    arrivals = arrival_times(days, jobs_per_day, rng)
+    make_visits = incoming_visits if source == 'incoming' else generated_visits
+    visits = make_visits(len(arrivals), rng)
+    print(f"Simulating {days} days: {len(visits)} {source} jobs, {bays} bays, {len(engineer_ids)} engineers")
+
+    model_pipeline = load_scorer() if 'model' in policies else None
+    reports = {}
+    for policy_name in policies:
+        engine = RecommenderEngine(db_path=db_path, snapshot_path=None)  # Private copy: outcomes are folded in
+        job_scores = JobScoreTracker(history)
+        policy = make_policy(policy_name, engine, job_scores, general_scores, model_pipeline)
+        engine.score_matrix([], [])  # Build before the clock starts
+        simulator = WorkshopSimulator([dict(v) for v in visits], arrivals, engineer_ids, policy,
+                                      HistorySampler(history, np.random.default_rng(seed)), engine, job_scores, bays,
+                                      prioritize=policy_name == 'priority')
+        reports[policy_name] = simulator.run()
+        print_report(policy_name, reports[policy_name])
+    return reports
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Discrete-event simulation of the workshop under different assignment policies.")
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help="Days of arrivals to simulate.")
+    parser.add_argument('--policy', nargs='+', choices=POLICIES, default=['greedy', 'batch'],
+                        help="Policies to compare on the same arrivals ('model' needs a trained model).")
+    parser.add_argument('--source', choices=SOURCES, default='generated',
+                        help="Arrivals from generate_and_load's generator or resampled from incoming_vehicles.xlsx.")
+    parser.add_argument('--jobs-per-day', type=float, default=DEFAULT_JOBS_PER_DAY, help="Mean arrivals per day.")
+    parser.add_argument('--bays', type=int, default=DEFAULT_BAYS, help="Vehicles that can be worked on at once.")
+    parser.add_argument('--engineers', type=int, default=None, help="Limit the roster to the first N engineers.")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', default=HISTORY_DB_PATH, help="Database with job_history and engineer_profiles.")
+    args = parser.parse_args()
+
+    try:
+        run_simulation(args.policy, args.days, args.source, args.jobs_per_day, args.bays, args.engineers, args.seed, args.db)
+    except ValueError as e:
+        print(f"Error: {e}")
@@ -3,6 +3,13 @@ import google.generativeai as genai
 from dotenv import load_dotenv
 import re
 import ast
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import linear_kernel
+from core.db import get_connection
 
 load_dotenv()
 api_key = os.getenv("GEMINI_API_KEY")
@@ -13,6 +20,22 @@ api_key = os.getenv("GEMINI_API_KEY")
 
 genai.configure(api_key=api_key)
 
+# --- Response cache and fallback configuration ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DB_PATH = os.path.join(BASE_DIR, 'database', 'llm_cache.db')
+CACHE_TTL_SECONDS = int(os.getenv("MAPPING_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("MAPPING_CACHE_MAX_ENTRIES", "5000"))
+# How long a request waits for Gemini before answering from the local matcher.
+# The Gemini call keeps running in the background and fills the cache when it returns.
+LLM_WAIT_SECONDS = float(os.getenv("MAPPING_LLM_WAIT_SECONDS", "3"))
+LLM_WORKERS = int(os.getenv("MAPPING_LLM_WORKERS", "4"))
+# Timeout of the Gemini request itself, so a hung call gives its worker thread back
+LLM_REQUEST_TIMEOUT_SECONDS = float(os.getenv("MAPPING_LLM_REQUEST_TIMEOUT_SECONDS", "30"))
+# Batch mapping: descriptions per prompt, and how long a batch waits for its prompts
+BATCH_CHUNK_SIZE = int(os.getenv("MAPPING_BATCH_CHUNK_SIZE", "25"))
+BATCH_WAIT_SECONDS = float(os.getenv("MAPPING_BATCH_WAIT_SECONDS", "20"))
+INCOMING_VEHICLES_PATH = os.path.join(BASE_DIR, 'data', 'incoming_vehicles.xlsx')
+
 
 SERVICES = [
     "Air Filter Check",
@@ -37,9 +60,209 @@ SERVICES = [
     "Wheel Alignment and Balancing"
 ]
 
+# Symptom words supervisors use for each service, for the offline matcher
+SERVICE_KEYWORDS = {
+    "Air Filter Check": "air filter intake dusty clogged poor acceleration",
+    "Battery Check": "battery dead flat won't start no start cranking slow jump start terminals",
+    "Brake Inspection": "brake brakes squeal squeak grinding stopping pedal soft spongy pads discs",
+    "Cabin Filter Replacement": "cabin filter smell musty air conditioning ac heater vents airflow",
+    "Comprehensive Diagnostic Check": "engine light check engine warning light diagnostic fault code misfire",
+    "Exhaust System Inspection": "exhaust smoke loud noise rattle muffler fumes",
+    "Fluid Levels Check": "fluid leak coolant overheating washer fluid top up",
+    "Fuel System Inspection": "fuel petrol diesel consumption stalling injector pump smell",
+    "Lights and Wipers Check": "lights headlight bulb indicator wipers streaks windscreen",
+    "Oil Change": "oil light oil change dirty oil low oil service",
+    "Oil Filter Replacement": "oil filter oil pressure",
+    "Spark Plugs Replacement": "spark plugs misfire rough idle hard start",
+    "Steering and Suspension Check": "steering suspension bumpy clunk knocking shocks heavy steering",
+    "Timing Belt Inspection": "timing belt ticking squealing belt cambelt",
+    "Transmission Check": "transmission gearbox gear slipping clutch shifting jerky",
+    "Tyre Condition and Alignment Check": "tyre tire tread worn uneven wear",
+    "Tyre Pressure Check": "tyre pressure flat tire low pressure puncture tpms",
+    "Underbody Inspection": "underbody rust scraping underneath chassis",
+    "Visual Inspection": "dent scratch damage body inspection",
+    "Wheel Alignment and Balancing": "pulls left right vibration wobble steering wheel alignment balancing"
+}
+
+
+def normalize_description(user_input):
+    """Lower-cases and strips punctuation/extra spaces so repeated complaints share a cache key."""
+    text = re.sub(r"[^a-z0-9' ]+", " ", str(user_input).lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class MappingMetrics:
+    """Counters for the cache, the Gemini calls and the local fallback."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.cache_hits = 0
+        self.llm_calls = 0
+        self.llm_failures = 0
+        self.fallbacks = 0
+        self.llm_seconds = 0.0
+
+    def record(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self):
+        with self._lock:
+            successful_calls = self.llm_calls - self.llm_failures
+            avg_llm_seconds = self.llm_seconds / successful_calls if successful_calls else 0.0
+            return {
+                'requests': self.requests,
+                'cache_hits': self.cache_hits,
+                'cache_hit_rate': self.cache_hits / self.requests if self.requests else 0.0,
+                'llm_calls': self.llm_calls,
+                'llm_failures': self.llm_failures,
+                'fallbacks': self.fallbacks,
+                'avg_llm_latency_ms': avg_llm_seconds * 1000,
+                # Each cache hit saves roughly one average Gemini round-trip
+                'latency_saved_s': self.cache_hits * avg_llm_seconds,
+            }
+
+
+class ResponseCache:
+    """
+    Persistent cache of normalized description -> services, stored in SQLite.
+    Entries expire after ttl_seconds; beyond max_entries the least recently
+    used entries are evicted.
+    """
+
+    def __init__(self, db_path=CACHE_DB_PATH, ttl_seconds=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        conn = get_connection(self.db_path)
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS mapping_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    services TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_mapping_cache_last_access ON mapping_cache (last_access)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, cache_key):
+        now = time.time()
+        conn = get_connection(self.db_path)
+        try:
+            row = conn.execute(
+                "SELECT services, created_at FROM mapping_cache WHERE cache_key = ?", (cache_key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM mapping_cache WHERE cache_key = ?", (cache_key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE mapping_cache SET last_access = ? WHERE cache_key = ?", (now, cache_key))
+            conn.commit()
+            return json.loads(row[0])
+        finally:
+            conn.close()
+
+    def get_many(self, cache_keys):
+        """Looks up several keys in one query; returns {key: services} for the fresh hits."""
+        now = time.time()
+        hits = {}
+        conn = get_connection(self.db_path)
+        try:
+            keys = list(cache_keys)
+            for start in range(0, len(keys), 500):  # Stay under SQLite's bound-parameter limit
+                chunk = keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT cache_key, services, created_at FROM mapping_cache WHERE cache_key IN ({', '.join('?' for _ in chunk)})",
+                    chunk).fetchall()
+                for cache_key, services, created_at in rows:
+                    if now - created_at <= self.ttl_seconds:
+                        hits[cache_key] = json.loads(services)
+            if hits:
+                conn.executemany("UPDATE mapping_cache SET last_access = ? WHERE cache_key = ?",
+                                 [(now, cache_key) for cache_key in hits])
+                conn.commit()
+            return hits
+        finally:
+            conn.close()
+
+    def put(self, cache_key, services):
+        self.put_many({cache_key: services})
+
+    def put_many(self, entries):
+        now = time.time()
+        conn = get_connection(self.db_path)
+        try:
+            conn.executemany("""
+                INSERT INTO mapping_cache (cache_key, services, created_at, last_access)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (cache_key) DO UPDATE SET
+                    services = excluded.services, created_at = excluded.created_at, last_access = excluded.last_access
+            """, [(cache_key, json.dumps(services), now, now) for cache_key, services in entries.items()])
+            conn.execute("""
+                DELETE FROM mapping_cache WHERE cache_key IN (
+                    SELECT cache_key FROM mapping_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            conn.commit()
+        finally:
+            conn.close()
+
 
-def get_matching_services(user_input):
-    prompt = f"""
+class LocalServiceMatcher:
+    """
+    Offline matcher: character n-gram TF-IDF over each service name plus its
+    symptom keywords. Tolerates typos and plurals ("brakes squeel").
+    """
+
+    def __init__(self, services=SERVICES, keywords=SERVICE_KEYWORDS):
+        self.services = list(services)
+        documents = [f"{service} {service} {keywords.get(service, '')}".lower() for service in self.services]
+        self.vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 5), sublinear_tf=True)
+        self.service_matrix = self.vectorizer.fit_transform(documents)
+
+    def match(self, user_input, top_k=3, min_score=0.12):
+        query = self.vectorizer.transform([normalize_description(user_input)])
+        scores = linear_kernel(query, self.service_matrix).ravel()
+        ranked = scores.argsort()[::-1][:top_k]
+        return [self.services[i] for i in ranked if scores[i] >= min_score]
+
+
+metrics = MappingMetrics()
+_cache = None
+_matcher = None
+_model = None
+_init_lock = threading.Lock()
+_llm_executor = ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix="gemini")
+
+
+def get_cache():
+    global _cache
+    with _init_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+def get_local_matcher():
+    global _matcher
+    with _init_lock:
+        if _matcher is None:
+            _matcher = LocalServiceMatcher()
+        return _matcher
+
+def get_mapping_metrics():
+    """Cache hit rate, Gemini latency and estimated latency saved so far."""
+    return metrics.snapshot()
+
+
+def build_prompt(user_input):
+    return f"""
 You're a helpful assistant. A supervisor has written: "{user_input}".
 Which of these services are most relevant?
 
@@ -50,25 +273,193 @@ Respond with a plain Python list of the most relevant service names.
 Only include services from the list. Do NOT use code blocks.
 """
 
-    try:
-        model = genai.GenerativeModel('gemini-2.0-flash') 
-        response = model.generate_content(prompt)
-        text_response = response.text.strip()
 
-    
-        cleaned_text = re.sub(r"```(?:python)?\n([\s\S]+?)```", r"\1", text_response)
+def call_gemini(prompt):
+    """Sends a prompt to Gemini and returns the raw text. Replace to stub out the LLM."""
+    global _model
+    if _model is None:
+        _model = genai.GenerativeModel('gemini-2.0-flash')
+    response = _model.generate_content(prompt, request_options={"timeout": LLM_REQUEST_TIMEOUT_SECONDS})
+    return response.text
+
 
-        
-        matches = ast.literal_eval(cleaned_text)
-        return matches
+def parse_services(text_response):
+    """Parses the model's list answer, keeping only names from SERVICES."""
+    cleaned_text = re.sub(r"```(?:python)?\n([\s\S]+?)```", r"\1", text_response.strip())
+    matches = ast.literal_eval(cleaned_text)
+    return [service for service in matches if service in SERVICES]
 
+
+def _ask_llm_and_cache(user_input, cache_key, llm_call):
+    start = time.perf_counter()
+    metrics.record(llm_calls=1)
+    text_response = None
+    try:
+        text_response = llm_call(build_prompt(user_input))
+        services = parse_services(text_response)
     except Exception as e:
+        metrics.record(llm_failures=1)
         print("Error parsing Gemini response:", e)
-        print("Raw response:", response.text if 'response' in locals() else "No response.")
-        return []
+        print("Raw response:", text_response if text_response is not None else "No response.")
+        return None
+    metrics.record(llm_seconds=time.perf_counter() - start)
+    get_cache().put(cache_key, services)
+    return services
+
+
+def get_matching_services(user_input, llm_call=None, wait_seconds=None):
+    """
+    Maps a free-text complaint to services. Answers from the persistent cache when
+    possible; otherwise asks Gemini, and if Gemini is unreachable or slower than
+    wait_seconds, answers from the local matcher instead.
+    """
+    llm_call = llm_call or call_gemini
+    wait_seconds = LLM_WAIT_SECONDS if wait_seconds is None else wait_seconds
+    metrics.record(requests=1)
+
+    cache_key = normalize_description(user_input)
+    cached = get_cache().get(cache_key)
+    if cached is not None:
+        metrics.record(cache_hits=1)
+        return cached
+
+    if llm_call is call_gemini and not api_key:
+        metrics.record(fallbacks=1)
+        return get_local_matcher().match(user_input)
+
+    future = _llm_executor.submit(_ask_llm_and_cache, user_input, cache_key, llm_call)
+    try:
+        services = future.result(timeout=wait_seconds)
+    except FutureTimeoutError:
+        services = None  # Gemini is slow; its answer will still land in the cache
+
+    if services is None:
+        metrics.record(fallbacks=1)
+        return get_local_matcher().match(user_input)
+    return services
+
+
+def build_batch_prompt(descriptions):
+    numbered = "\n".join(f"{i}. {description}" for i, description in enumerate(descriptions, start=1))
+    return f"""
+You're a helpful assistant. Supervisors have written these numbered descriptions:
+{numbered}
+
+For each description, which of these services are most relevant?
+
+Available services:
+{', '.join(SERVICES)}
+
+Respond with a plain JSON object mapping each description number to a list of
+the most relevant service names, e.g. {{"1": ["Oil Change"], "2": []}}.
+Only include services from the list. Do NOT use code blocks.
+"""
+
+
+def parse_batch_services(text_response, count):
+    """Parses a batch answer into one service list per description (None where missing)."""
+    cleaned_text = re.sub(r"```(?:json|python)?\n([\s\S]+?)```", r"\1", text_response.strip())
+    try:
+        answer = json.loads(cleaned_text)
+    except ValueError:
+        answer = ast.literal_eval(cleaned_text)
+    answer = {str(number): services for number, services in answer.items()}
+    results = []
+    for i in range(1, count + 1):
+        services = answer.get(str(i))
+        results.append(None if services is None else [service for service in services if service in SERVICES])
+    return results
+
+
+def _ask_llm_batch(descriptions, llm_call):
+    start = time.perf_counter()
+    metrics.record(llm_calls=1)
+    text_response = None
+    try:
+        text_response = llm_call(build_batch_prompt(descriptions))
+        results = parse_batch_services(text_response, len(descriptions))
+    except Exception as e:
+        metrics.record(llm_failures=1)
+        print("Error parsing Gemini batch response:", e)
+        print("Raw response:", text_response if text_response is not None else "No response.")
+        return [None] * len(descriptions)
+    metrics.record(llm_seconds=time.perf_counter() - start)
+    return results
+
+
+def get_matching_services_batch(descriptions, llm_call=None, chunk_size=None, wait_seconds=None):
+    """
+    Maps many descriptions at once and returns one service list per input, in order.
+    Duplicates (after normalization) and cached descriptions are resolved without
+    the LLM; the rest are packed chunk_size to a prompt and the prompts run
+    concurrently. Anything Gemini doesn't answer within wait_seconds comes from
+    the local matcher.
+    """
+    llm_call = llm_call or call_gemini
+    chunk_size = chunk_size or BATCH_CHUNK_SIZE
+    wait_seconds = BATCH_WAIT_SECONDS if wait_seconds is None else wait_seconds
+    metrics.record(requests=len(descriptions))
+
+    # One representative description per normalized key, in first-seen order
+    keys = [normalize_description(description) for description in descriptions]
+    unique = {}
+    for key, description in zip(keys, descriptions):
+        unique.setdefault(key, description)
+
+    resolved = get_cache().get_many(unique)
+    metrics.record(cache_hits=sum(1 for key in keys if key in resolved))
+    missing = [key for key in unique if key not in resolved]
+
+    if missing and not (llm_call is call_gemini and not api_key):
+        chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+        futures = {_llm_executor.submit(_ask_llm_batch, [unique[key] for key in chunk], llm_call): chunk
+                   for chunk in chunks}
+        deadline = time.monotonic() + wait_seconds
+        answered = {}
+        for future, chunk in futures.items():
+            try:
+                results = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                continue
+            for key, services in zip(chunk, results):
+                if services is not None:
+                    answered[key] = services
+        if answered:
+            get_cache().put_many(answered)
+            resolved.update(answered)
+
+    matcher = None
+    for key in unique:
+        if key not in resolved:
+            matcher = matcher or get_local_matcher()
+            resolved[key] = matcher.match(unique[key])
+            metrics.record(fallbacks=1)
+
+    return [resolved[key] for key in keys]
+
+
+def map_incoming_vehicles(file_path=INCOMING_VEHICLES_PATH, **batch_options):
+    """Maps every job description in the incoming vehicles sheet in one batch call."""
+    from core.excel_snapshot import read_excel_cached
+    vehicles = read_excel_cached(file_path)
+    desc_columns = [col for col in vehicles.columns if col.endswith('_Desc')]
+    jobs = vehicles.melt(id_vars=['Car_Id'], value_vars=desc_columns, value_name='Description')
+    jobs = jobs.dropna(subset=['Description']).sort_values(['Car_Id', 'variable'])
+    jobs = jobs.drop(columns='variable').reset_index(drop=True)
+    jobs['Services'] = get_matching_services_batch(jobs['Description'].tolist(), **batch_options)
+    return jobs
 
 
 if __name__ == "__main__":
+    import sys
+    if '--incoming' in sys.argv:
+        start = time.perf_counter()
+        mapped = map_incoming_vehicles()
+        print(mapped.to_string())
+        print(f"\nMapped {len(mapped)} descriptions in {time.perf_counter() - start:.2f} s")
+        print(get_mapping_metrics())
+        sys.exit(0)
+
     user_input = input("Enter a description of the issue or damage: ")
     services = get_matching_services(user_input)
     if services:
@@ -2,10 +2,12 @@
 import pandas as pd
 import random
 import sqlite3
-from faker import Faker
 from datetime import datetime, timedelta
 import os
 import numpy as np
+from core.engineer_analyzer import calculate_overall_performance, merge_engineer_scores, pandas_engineer_scores
+from core.excel_snapshot import read_excel_cached
+from utils.helpers import COLUMN_MAPPING, standardize_columns
 
 # --- Configuration ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -54,15 +56,6 @@ JOB_TO_TASKS_MAPPING = {
 
 available_jobs = list(JOB_TO_TASKS_MAPPING.keys())
 
-COLUMN_MAPPING = {
-    # Standard Name : [Possible Variation 1, Possible Variation 2, etc.]
-    'Engineer_Id': ['Assigned_Engineer_Id', 'engineer_id', 'Engineer ID', 'Engineer Id'],
-    'Time_Taken_minutes': ['Time_Taken_minutes', 'Time Taken minutes', 'Time Taken (minutes)'],
-    'Outcome_Score': ['Outcome_Score', 'Outcome Score'],
-    'Job_Name': ['Job_Name', 'Job Name'],
-    'Task_to_be_done': ['Task_to_be_done', 'Task to be done', 'Task Description', 'Task']
-}
-
 ENGINEERS_DATA = {
     'ENG001': {'name': 'John Doe', 'level': 'Senior'},
     'ENG002': {'name': 'Jane Smith', 'level': 'Master'},
@@ -122,18 +115,6 @@ CAR_MODELS = {
 
 URGENCY_LEVELS = ['Normal', 'High', 'Low']
 
-def standardize_columns(df, mapping):
-    """Renames DataFrame columns based on a mapping of possible names."""
-    rename_dict = {}
-    df_columns = [col.strip() for col in df.columns] # Remove leading/trailing spaces
-    for standard_name, possible_names in mapping.items():
-        for possible_name in possible_names:
-            if possible_name in df_columns:
-                rename_dict[possible_name] = standard_name
-                break # Move to the next standard name once a match is found
-    df.rename(columns=rename_dict, inplace=True)
-    return df
-
 def get_tenure_from_level(level):
     """Calculates tenure in months based on experience level as per business rules."""
     if level == "Junior":
@@ -145,35 +126,13 @@ def get_tenure_from_level(level):
     else:
         return random.randint(1, 60) # Fallback
 
-def calculate_overall_performance(engineer_df):
-    print("Calculating credible Overall_Performance_Score...")
-    score_columns = [col for col in engineer_df.columns if col.endswith('_Score') and 'Overall_Performance_Score' not in col]
-    
-    engineer_df['Quality_Score'] = engineer_df[score_columns].mean(axis=1)
-    engineer_df['Normalized_Customer_Rating'] = ((engineer_df['Customer_Rating'] - 1) / 4) * 100
-    
-    global_avg_time = engineer_df['Avg_Job_Completion_Time'].mean()
-    speed_factor = global_avg_time / engineer_df['Avg_Job_Completion_Time']
-    
-    engineer_df['Timeliness_Score'] = np.clip(speed_factor * 75, 0, 100)
-    
-    weights = {'quality': 0.75, 'customer': 0.05, 'timeliness': 0.20}
-    final_score = (engineer_df['Quality_Score'] * weights['quality'] + engineer_df['Normalized_Customer_Rating'] * weights['customer'] + engineer_df['Timeliness_Score'] * weights['timeliness'])
-    
-    engineer_df['Overall_Performance_Score'] = np.clip(final_score.round().astype(int), 0, 100)
-    
-    columns_to_drop = ['Quality_Score', 'Normalized_Customer_Rating', 'Timeliness_Score']
-    
-    engineer_df.drop(columns=columns_to_drop, inplace=True, errors='ignore')
-    return engineer_df
-
 # --- MODIFIED FUNCTION TO GENERATE AND CALCULATE ENGINEER PROFILES ---
 def generate_and_save_engineer_profiles():
     """Generates engineer profiles using data from the generated history file."""
     print("\n--- Generating Engineer Profiles Based on Job History ---")
     
     try:
-        df_history = pd.read_excel(FLAT_FILE_EXCEL_PATH)
+        df_history = read_excel_cached(FLAT_FILE_EXCEL_PATH)
         print(f"Successfully loaded job history from: {FLAT_FILE_EXCEL_PATH}")
     except FileNotFoundError:
         print(f"Error: Job history file not found at {FLAT_FILE_EXCEL_PATH}. Cannot generate engineer profiles.")
@@ -200,29 +159,10 @@ def generate_and_save_engineer_profiles():
 
     print("Calculating real metrics from history data...")
     # The groupby operations now use the GUARANTEED standard column names
-    engineer_stats = df_history.groupby('Engineer_Id').agg(
-        Avg_Job_Completion_Time=('Time_Taken_minutes', 'mean'),
-        Customer_Rating=('Outcome_Score', 'mean')
-    ).reset_index()
-
-    job_scores = df_history.groupby(['Engineer_Id', 'Job_Name'])['Outcome_Score'].mean().unstack()
-    job_scores = ((job_scores - 1) / 4) * 100
-    job_scores.columns = [f"Overall_{col.replace(' ', '_')}_Score" for col in job_scores.columns]
-
-    task_scores = df_history.groupby(['Engineer_Id', 'Task_Description'])['Outcome_Score'].mean().unstack()
-    task_scores = ((task_scores - 1) / 4) * 100
-    task_scores.columns = [f"{col.replace(' ', '_').replace('(', '').replace(')', '').replace(',', '')}_Score" for col in task_scores.columns]
-    
+    scores = pandas_engineer_scores(df_history, 'Engineer_Id', 'Task_Description')
+
     print("Merging all calculated scores into engineer profiles...")
-    engineer_df = pd.merge(engineer_df, engineer_stats, left_on='Engineer_ID', right_on='Engineer_Id', how='left')
-    engineer_df.drop(columns=['Engineer_Id'], inplace=True, errors='ignore') # Clean up after merge
-    engineer_df = pd.merge(engineer_df, job_scores, left_on='Engineer_ID', right_index=True, how='left')
-    engineer_df = pd.merge(engineer_df, task_scores, left_on='Engineer_ID', right_index=True, how='left')
-    
-    score_cols_to_fill = [col for col in engineer_df.columns if '_Score' in col]
-    engineer_df[score_cols_to_fill] = engineer_df[score_cols_to_fill].fillna(75.0)
-    engineer_df['Avg_Job_Completion_Time'].fillna(engineer_df['Avg_Job_Completion_Time'].mean(), inplace=True)
-    engineer_df['Customer_Rating'].fillna(3.0, inplace=True)
+    engineer_df = merge_engineer_scores(engineer_df, scores)
 
     engineer_df_final = calculate_overall_performance(engineer_df)
     engineer_df_final.to_excel(ENGINEER_EXCEL_PATH, index=False)
@@ -231,97 +171,263 @@ def generate_and_save_engineer_profiles():
 
 # --- Main Generation Logic ---
 
-def generate_flat_data(num_jobs):
+VIN_ALPHABET = np.frombuffer(b'ABCDEFGHJKLMNPRSTUVWXYZ0123456789', dtype=np.uint8)  # No I, O or Q
+ENGINEER_LEVELS = ['Junior', 'Senior', 'Master']
+SHARD_JOBS = 50_000  # Jobs per generated block (about 500k task rows)
+HISTORY_COLUMNS = ['Job_ID', 'Job_Name', 'Task_Id', 'Task_Description', 'Status', 'Date_Completed', 'Urgency',
+                   'VIN', 'Make', 'Model', 'Mileage', 'Assigned_Engineer_Id', 'Engineer_Name', 'Engineer_Level',
+                   'Time_Started', 'Time_Ended', 'Time_Taken_minutes', 'Estimated_Standard_Time', 'Outcome_Score']
+DATETIME_COLUMNS = ['Date_Completed', 'Time_Started', 'Time_Ended']
+TIME_OF_DAY = np.array([f" {m // 60:02d}:{m % 60:02d}:00" for m in range(24 * 60)], dtype=object)
+
+def build_engineers(num_engineers=len(ENGINEERS_DATA)):
+    """ENGINEERS_DATA, extended with synthetic engineers when more are requested."""
+    engineers = dict(list(ENGINEERS_DATA.items())[:num_engineers])
+    for i in range(len(engineers) + 1, num_engineers + 1):
+        engineers[f"ENG{i:03d}"] = {'name': f"Engineer {i}", 'level': ENGINEER_LEVELS[i % len(ENGINEER_LEVELS)]}
+    return engineers
+
+def mean_tasks_per_job():
+    """Average task rows per job (custom services pick 2-5 tasks)."""
+    sizes = [len(tasks) if tasks else 3.5 for tasks in JOB_TO_TASKS_MAPPING.values()]
+    return sum(sizes) / len(sizes)
+
+def _lookup(values):
+    return np.array(values, dtype=object)
+
+def generate_history_arrays(num_jobs, rng, first_job_number=1001, engineers=None, now=None):
+    """
+    Vectorized version of the per-task loop: draws every column for num_jobs jobs as
+    NumPy arrays and applies the same outcome rules (urgency and overrun penalties).
+
+    Returns a compact block: {column: array} for numbers, {column: (codes, values)}
+    for text (values[codes] is the column) and minutes since the epoch for datetimes.
+    """
+    engineers = engineers or ENGINEERS_DATA
+    now = np.datetime64(now or datetime.now(), 'm')
+    task_ids = list(TASKS_DATA.keys())
+    makes = list(CAR_MODELS.keys())
+
+    # --- Job-level columns ---
+    job_type = rng.integers(0, len(available_jobs), num_jobs)
+    urgency = rng.integers(0, len(URGENCY_LEVELS), num_jobs)
+    make = rng.integers(0, len(makes), num_jobs)
+    models_per_make = np.array([len(CAR_MODELS[m]) for m in makes])
+    model = (rng.random(num_jobs) * models_per_make[make]).astype(np.int64)
+    mileage = rng.integers(10000, 200001, num_jobs)
+    base_completion = now - rng.integers(1, 366, num_jobs).astype('timedelta64[D]')
+    vins = VIN_ALPHABET[rng.integers(0, len(VIN_ALPHABET), (num_jobs, 17))].view('S17').ravel()
+
+    # --- Tasks per job: a padded [jobs, tasks] matrix of task indices, cut at each job's count ---
+    max_tasks = len(task_ids)
+    type_tasks = np.zeros((len(available_jobs), max_tasks), dtype=np.int64)
+    type_counts = np.zeros(len(available_jobs), dtype=np.int64)
+    for t, job_name in enumerate(available_jobs):
+        positions = [task_ids.index(task_id) for task_id in JOB_TO_TASKS_MAPPING[job_name]]
+        type_tasks[t, :len(positions)] = positions
+        type_counts[t] = len(positions)
+    task_matrix = type_tasks[job_type]
+    counts = type_counts[job_type]
+    custom = np.flatnonzero(job_type == available_jobs.index('Custom Service'))
+    task_matrix[custom] = np.argsort(rng.random((len(custom), max_tasks)), axis=1)  # Sample without replacement
+    counts[custom] = rng.integers(2, 6, len(custom))
+    task = task_matrix[np.arange(max_tasks) < counts[:, None]]
+    job = np.repeat(np.arange(num_jobs), counts)
+    num_rows = len(task)
+
+    # --- Task-level columns ---
+    engineer_ids = list(engineers.keys())
+    engineer = rng.integers(0, len(engineer_ids), num_rows)
+    estimated_time = np.array([TASKS_DATA[t]['time'] for t in task_ids])[task]
+
+    high = urgency[job] == URGENCY_LEVELS.index('High')
+    day_variation = np.where(high, 0, rng.integers(0, 3, num_rows))
+    time_variation = np.where(high, rng.integers(-5, 31, num_rows), rng.integers(-5, 61, num_rows))
+    date_completed = base_completion[job].astype('datetime64[D]') + day_variation.astype('timedelta64[D]')
+    time_taken = estimated_time + time_variation
+
+    outcome_score = rng.integers(3, 6, num_rows)  # Default good outcome score
+    penalized = high & (time_variation > 18)
+    overrun = ~penalized & (time_variation > 50)
+    outcome_score[penalized] = rng.integers(1, 3, penalized.sum())  # Penalize score heavily
+    outcome_score[overrun] = rng.integers(2, 4, overrun.sum())
+
+    date_minutes = date_completed.astype('datetime64[m]').astype(np.int64)
+    time_ended = date_minutes + rng.integers(8, 21, num_rows) * 60 + rng.integers(0, 60, num_rows)
+
+    model_names = [CAR_MODELS[m][i] for m in makes for i in range(len(CAR_MODELS[m]))]
+    model_offsets = np.concatenate([[0], np.cumsum(models_per_make)[:-1]])
+    return {
+        'rows': num_rows,
+        'numbers': {
+            'Mileage': mileage[job],
+            'Time_Taken_minutes': time_taken,
+            'Estimated_Standard_Time': estimated_time,
+            'Outcome_Score': outcome_score,
+        },
+        'text': {
+            'Job_ID': (job, np.char.add('JOB', (first_job_number + np.arange(num_jobs)).astype(str)).astype(object)),
+            'Job_Name': (job_type[job], _lookup(available_jobs)),
+            'Task_Id': (task, _lookup(task_ids)),
+            'Task_Description': (task, _lookup([TASKS_DATA[t]['name'] for t in task_ids])),
+            'Status': (np.zeros(num_rows, dtype=np.int64), _lookup(['Completed'])),
+            'Urgency': (urgency[job], _lookup(URGENCY_LEVELS)),
+            'VIN': (job, vins.astype(str).astype(object)),
+            'Make': (make[job], _lookup(makes)),
+            'Model': ((model_offsets[make] + model)[job], _lookup(model_names)),
+            'Assigned_Engineer_Id': (engineer, _lookup(engineer_ids)),
+            'Engineer_Name': (engineer, _lookup([engineers[e]['name'] for e in engineer_ids])),
+            'Engineer_Level': (engineer, _lookup([engineers[e]['level'] for e in engineer_ids])),
+        },
+        'minutes': {
+            'Date_Completed': date_minutes,
+            'Time_Started': time_ended - time_taken,
+            'Time_Ended': time_ended,
+        },
+    }
+
+def history_arrays_to_frame(block):
+    """Expands a block from generate_history_arrays into the flat DataFrame."""
+    data = {}
+    for col in HISTORY_COLUMNS:
+        if col in block['text']:
+            codes, values = block['text'][col]
+            data[col] = values[codes]
+        elif col in block['minutes']:
+            data[col] = block['minutes'][col].astype('datetime64[m]').astype('datetime64[s]')
+        else:
+            data[col] = block['numbers'][col]
+    return pd.DataFrame(data)
+
+def history_arrays_to_rows(block):
+    """Row tuples for executemany, with datetimes as 'YYYY-MM-DD HH:MM:SS' like to_sql."""
+    columns = []
+    for col in HISTORY_COLUMNS:
+        if col in block['text']:
+            codes, values = block['text'][col]
+            columns.append(values[codes].tolist())
+        elif col in block['minutes']:
+            # Format each distinct day once, then append the time of day
+            minutes = block['minutes'][col]
+            days, day_codes = np.unique(minutes // 1440, return_inverse=True)
+            day_strings = _lookup(np.datetime_as_string(days.astype('datetime64[D]')).tolist())
+            columns.append((day_strings[day_codes] + TIME_OF_DAY[minutes % 1440]).tolist())
+        else:
+            columns.append(block['numbers'][col].tolist())
+    return zip(*columns)
+
+def generate_history_block(num_jobs, rng, first_job_number=1001, engineers=None, now=None):
+    """One row per task for num_jobs jobs, with the same columns as generate_flat_data."""
+    return history_arrays_to_frame(generate_history_arrays(num_jobs, rng, first_job_number, engineers, now))
+
+def generate_flat_data(num_jobs, seed=None):
     """
     Generates a single, denormalized DataFrame where each row is a task,
     but car and job info is repeated.
     """
-    fake = Faker()
-    all_records = []
-
-    task_id_list = list(TASKS_DATA.keys())
-    
+    return generate_history_block(num_jobs, np.random.default_rng(seed))
+
+def _truncate_block(block, num_rows):
+    return {
+        'rows': min(block['rows'], num_rows),
+        'numbers': {col: values[:num_rows] for col, values in block['numbers'].items()},
+        'text': {col: (codes[:num_rows], values) for col, (codes, values) in block['text'].items()},
+        'minutes': {col: values[:num_rows] for col, values in block['minutes'].items()},
+    }
+
+def _generate_shard(shard):
+    """Process-pool worker: one block of jobs from its own child seed."""
+    num_jobs, first_job_number, seed_seq, engineers, now = shard
+    return generate_history_arrays(num_jobs, np.random.default_rng(seed_seq), first_job_number, engineers, now)
+
+def iter_history_shards(num_rows, num_engineers=len(ENGINEERS_DATA), seed=None, workers=None, shard_jobs=SHARD_JOBS,
+                        first_job_number=1001):
+    """
+    Yields blocks (see generate_history_arrays), in order, totalling exactly num_rows
+    task rows, generated in parallel. Shard i always draws from the i-th SeedSequence
+    child, so a seed gives the same data whatever the number of workers. Jobs are
+    numbered JOB<first_job_number> onwards.
+    """
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+    from itertools import count
+
+    engineers = build_engineers(num_engineers)
+    now = datetime.now().replace(second=0, microsecond=0)
+    shard_jobs = max(1, min(shard_jobs, int(num_rows / mean_tasks_per_job()) + 1))
+    seed_seq = np.random.SeedSequence(seed)
+    shards = ((shard_jobs, first_job_number + i * shard_jobs, seed_seq.spawn(1)[0], engineers, now) for i in count())
+
+    workers = workers or os.cpu_count()
+    expected_shards = int(np.ceil(num_rows / (shard_jobs * mean_tasks_per_job())))
+    remaining = num_rows
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep a bounded number of shards in flight so memory stays flat
+        pending = deque(pool.submit(_generate_shard, next(shards))
+                        for _ in range(max(1, min(2 * workers, expected_shards))))
+        while remaining > 0:
+            block = _truncate_block(pending.popleft().result(), remaining)
+            if len(pending) < 2 * workers:
+                pending.append(pool.submit(_generate_shard, next(shards)))
+            remaining -= block['rows']
+            yield block
+        for future in pending:
+            future.cancel()
+
+def next_job_number(db_path):
+    """The first JOB<n> number after the generated Job_IDs already in job_history (1001 if there are none)."""
+    from core.db import get_connection
+    conn = get_connection(db_path)
+    try:
+        highest = conn.execute(
+            "SELECT MAX(CAST(SUBSTR(Job_ID, 4) AS INTEGER)) FROM job_history WHERE Job_ID LIKE 'JOB%'").fetchone()[0]
+    except sqlite3.OperationalError:  # No job_history table yet
+        highest = None
+    finally:
+        conn.close()
+    return 1001 if highest is None else max(1001, highest + 1)
+
+def stream_history_to_sqlite(blocks, db_path, append=False):
+    """Inserts generated blocks into job_history with executemany, one transaction per block."""
+    from core.db import get_connection
+    conn = get_connection(db_path)
+    total = 0
+    try:
+        for block in blocks:
+            if total == 0:
+                history_arrays_to_frame(_truncate_block(block, 0)).to_sql(
+                    'job_history', conn, if_exists='append', index=False)
+                if not append:
+                    conn.execute("DELETE FROM job_history")
+            conn.executemany(
+                f"INSERT INTO job_history ({', '.join(HISTORY_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in HISTORY_COLUMNS)})",
+                history_arrays_to_rows(block))
+            conn.commit()
+            total += block['rows']
+            print(f"  ...{total:,} rows written to {db_path}")
+    finally:
+        conn.close()
+    return total
 
-    
-    for i in range(num_jobs):
-        # 1. Create a unique high-level job for a single car
-        job_id = f"JOB{1001 + i}" # Unique auto-incrementing Job ID
-        job_name = random.choice(available_jobs)
-        urgency = random.choice(URGENCY_LEVELS)
-        car_make = random.choice(list(CAR_MODELS.keys()))
-        car_model = random.choice(CAR_MODELS[car_make])
-        car_vin = fake.vin()
-        car_mileage = random.randint(10000, 200000)
-
-        tasks_to_perform = JOB_TO_TASKS_MAPPING[job_name]
-
-        if job_name == 'Custom Service':
-            tasks_to_perform = random.sample(list(TASKS_DATA.keys()), k=random.randint(2, 5))
-
-        base_job_completion_time = datetime.now() - timedelta(days=random.randint(1, 365))
-
-        for task_id in tasks_to_perform:
-            task_name = TASKS_DATA[task_id]['name']
-
-            engineer_id = random.choice(list(ENGINEERS_DATA.keys()))
-            engineer_info = ENGINEERS_DATA[engineer_id]
-
-            estimated_time = TASKS_DATA[task_id]['time'] # Placeholder for estimated time per task
-
-            if urgency == 'High':
-                date_completed = base_job_completion_time.date()
-                time_variation_minutes = random.randint(-5, 30)
-            else:
-                day_variation = timedelta(days=random.randint(0, 2))
-                date_completed = (base_job_completion_time + day_variation).date()
-                time_variation_minutes = random.randint(-5, 60)
-
-            time_taken = estimated_time + time_variation_minutes
-            outcome_score = random.randint(3, 5) # Default good outcome score
-            if urgency == 'High' and time_variation_minutes > 18:
-                outcome_score = random.randint(1, 2) # Penalize score heavily
-            # If any job takes more than 50 minutes over, it's also a poor outcome
-            elif time_variation_minutes > 50:
-                outcome_score = random.randint(2, 3)
-
-            time_ended = datetime(
-                date_completed.year, date_completed.month, date_completed.day,
-                hour=random.randint(8, 20), minute=random.randint(0, 59)
-            )    
-
-            time_started = time_ended - timedelta(minutes=time_taken)
-            
-
-            
-
-            # Assemble the full record for this one task
-            # Car and Job info is repeated for each task row
-            record = {
-                'Job_ID': job_id,
-                'Job_Name': job_name,
-                'Task_Id': task_id,
-                'Task_Description': task_name,
-                'Status': 'Completed',
-                'Date_Completed': date_completed,
-                'Urgency': urgency,
-                'VIN': car_vin,
-                'Make': car_make,
-                'Model': car_model,
-                'Mileage': car_mileage,
-                'Assigned_Engineer_Id': engineer_id,
-                'Engineer_Name': engineer_info['name'],
-                'Engineer_Level': engineer_info['level'],
-                #'Task_Sequence': task_sequence,
-                'Time_Started': time_started,
-                'Time_Ended': time_ended,
-                'Time_Taken_minutes': time_taken,
-                'Estimated_Standard_Time': estimated_time,
-                'Outcome_Score': outcome_score,
-                
-            }
-            all_records.append(record)
-
-    return pd.DataFrame(all_records)
+def write_history_columnar(blocks, output_dir):
+    """
+    Writes each block as an uncompressed .npz: numbers as-is, text as <col>.codes plus
+    <col>.values, datetimes as <col>.minutes since the epoch.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    total = 0
+    for i, block in enumerate(blocks):
+        arrays = dict(block['numbers'])
+        for col, (codes, values) in block['text'].items():
+            arrays[f"{col}.codes"] = codes.astype(np.int32)
+            arrays[f"{col}.values"] = values.astype(str)
+        for col, minutes in block['minutes'].items():
+            arrays[f"{col}.minutes"] = minutes
+        np.savez(os.path.join(output_dir, f"history_{i:05d}.npz"), **arrays)
+        total += block['rows']
+        print(f"  ...{total:,} rows written to {output_dir}")
+    return total
 
 def populate_database(df_history, engineer_df_final, db_path):
     print("\n--- Populating Database ---")
@@ -339,13 +445,42 @@ def populate_database(df_history, engineer_df_final, db_path):
         if conn: conn.close()
 
 if __name__ == '__main__':
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(description="Generate synthetic job history.")
+    parser.add_argument('--rows', type=int,
+                        help="stream this many task rows from the parallel generator instead of the Excel pipeline")
+    parser.add_argument('--engineers', type=int, default=len(ENGINEERS_DATA))
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None, help="generator processes (default: CPU count)")
+    parser.add_argument('--shard-jobs', type=int, default=SHARD_JOBS)
+    parser.add_argument('--db', default=None, help="SQLite database to write job_history into")
+    parser.add_argument('--columnar', default=None, help="directory to write .npz column shards into")
+    parser.add_argument('--append', action='store_true', help="keep existing job_history rows (with --db)")
+    args = parser.parse_args()
+
+    if args.rows:
+        start = time.perf_counter()
+        db_path = args.db or DB_PATH
+        # Appended jobs continue the numbering, so (Job_ID, Task_Id) stays unique
+        first_job_number = next_job_number(db_path) if args.append and not args.columnar else 1001
+        shards = iter_history_shards(args.rows, args.engineers, args.seed, args.workers, args.shard_jobs,
+                                     first_job_number)
+        if args.columnar:
+            written = write_history_columnar(shards, args.columnar)
+        else:
+            written = stream_history_to_sqlite(shards, db_path, args.append)
+        elapsed = time.perf_counter() - start
+        print(f"Generated {written:,} task rows in {elapsed:.1f} s ({written / elapsed:,.0f} rows/s).")
+        raise SystemExit(0)
+
     # Ensure the /data directory exists
     os.makedirs(DATA_DIR, exist_ok=True)
     
     try:
         print(f"--- Loading Job History from Excel file: {FLAT_FILE_EXCEL_PATH} ---")
-        df_history = pd.read_excel(FLAT_FILE_EXCEL_PATH)
-        df_engineers_final = pd.read_excel(ENGINEER_EXCEL_PATH)
+        df_history = read_excel_cached(FLAT_FILE_EXCEL_PATH)
+        df_engineers_final = read_excel_cached(ENGINEER_EXCEL_PATH)
         print(f"Generating {NUM_RECORDS} unique jobs, each with multiple random tasks...")
         flat_data_df = generate_flat_data(NUM_RECORDS)
 
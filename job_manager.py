@@ -1,14 +1,34 @@
-import sqlite3
+import time
+import threading
+from datetime import datetime
+import numpy as np
 import pandas as pd
-from recommender import recommend_engineers_memory_cf
+from scipy.optimize import linear_sum_assignment
+from recommender import recommend_engineers_memory_cf, score_engineers_for_tasks, record_task_outcome
+from core.feature_store import ensure_feature_table, get_job_features, record_outcome
+from core.job_assigner import build_candidate_features, load_scorer
+from core.db import connection_scope
+from core.task_scheduler import TaskScheduler
 
 # ✅ Correct path to your updated database
 DB_PATH = "database/workshopnew.db"  
 
+# Weight applied to a task's score in batch assignment, so urgent tasks win contested engineers
+URGENCY_WEIGHTS = {'Low': 1.0, 'Normal': 2.0, 'High': 3.0}
+# Task order within each job, used when the database has no job_task_mapping rows
+MAPPING_EXCEL_PATH = "data/Job_Task_Mapping.xlsx"
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
 
 def get_connection():
-    print(f"Connecting to DB at: {DB_PATH}")
-    return sqlite3.connect(DB_PATH)
+    """
+    Connection scope on the shared pool (core/db.py). Inside a request scope every
+    helper reuses the request's connection and transaction; on its own each call
+    commits when the `with` block ends.
+    """
+    return connection_scope(DB_PATH)
 
 
 def fetch_all_jobs():
@@ -29,7 +49,6 @@ def update_job_assignment(job_id, engineer_id):
             SET Engineer_Id = ?, Status = 'Assigned' 
             WHERE Job_Id = ?
         """, (engineer_id, job_id))
-        conn.commit()
         print(f"Assigned Engineer {engineer_id} to Job {job_id}")
 
 
@@ -50,7 +69,6 @@ def mark_engineer_unavailable(engineer_id):
     with get_connection() as conn:
         conn.execute(
             "UPDATE engineer_profiles SET Availability = 'No' WHERE Engineer_ID = ?", (engineer_id,))
-        conn.commit()
         print(f"Engineer {engineer_id} marked as unavailable")
 
 
@@ -58,7 +76,6 @@ def mark_engineer_available(engineer_id):
     with get_connection() as conn:
         conn.execute(
             "UPDATE engineer_profiles SET Availability = 'Yes' WHERE Engineer_ID = ?", (engineer_id,))
-        conn.commit()
         print(f"Engineer {engineer_id} marked as available")
 
 
@@ -70,12 +87,65 @@ def get_task_id_for_job(job_id):
         return row[0] if row else None
 
 
+def get_scheduler():
+    """
+    Returns the process-wide pending-task scheduler (core/task_scheduler.py), built
+    from job_card on first use and topped up with rows added since the last call.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = TaskScheduler()
+        scheduler = _scheduler
+    with get_connection() as conn:
+        scheduler.sync(conn, MAPPING_EXCEL_PATH)
+    return scheduler
+
+
+def claim_task_row(card_rowid, engineer_id):
+    """
+    Atomically books an engineer onto one specific job_card row, in a BEGIN IMMEDIATE
+    transaction like claim_engineer_for_task: the engineer must still be available and
+    the row still unassigned.
+    Returns 'claimed', 'engineer_unavailable' or 'task_taken'.
+    """
+    with get_connection() as conn:
+        if conn.in_transaction:
+            conn.commit()  # BEGIN IMMEDIATE must start a fresh transaction
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            claimed = conn.execute(
+                "UPDATE engineer_profiles SET Availability = 'No' WHERE Engineer_ID = ? AND Availability = 'Yes'",
+                (engineer_id,)).rowcount
+            if claimed != 1:
+                conn.rollback()
+                return 'engineer_unavailable'
+
+            assigned = conn.execute(
+                "UPDATE job_card SET Engineer_Id = ?, Status = 'Assigned' WHERE rowid = ? AND Engineer_Id IS NULL",
+                (engineer_id, card_rowid)).rowcount
+            if assigned != 1:
+                conn.rollback()
+                return 'task_taken'
+
+            conn.commit()
+            return 'claimed'
+        except Exception:
+            conn.rollback()
+            raise
+
+
 def assign_engineers_to_pending_jobs():
-    jobs = fetch_unassigned_jobs()
+    """
+    Walks the pending queue in scheduler order (urgency, age, expected duration),
+    offering only tasks whose earlier tasks in the same job are completed.
+    """
+    scheduler = get_scheduler()
 
-    for _, row in jobs.iterrows():
-        job_id = row["Job_Id"]
-        task_id = row["Task_Id"]
+    for task in scheduler.queued():
+        job_id = task["job_id"]
+        task_id = task["task_id"]
 
         print(f"\nAssigning job: {job_id} with task: {task_id}")
 
@@ -86,35 +156,339 @@ def assign_engineers_to_pending_jobs():
             continue
 
         assigned_engineer = None
+        result = None
 
         for eng_id, score in recommendations:
-            if check_availability(eng_id):
+            result = claim_task_row(task["key"], eng_id)
+            if result == 'claimed':
                 assigned_engineer = eng_id
                 break
+            if result == 'task_taken':
+                break
 
+        if assigned_engineer or result == 'task_taken':
+            scheduler.start(task["key"])
         if assigned_engineer:
-            update_job_assignment(job_id, assigned_engineer)
-            mark_engineer_unavailable(assigned_engineer)
+            print(f"Assigned Engineer {assigned_engineer} to Job {job_id}, Task {task_id}")
         else:
             print(f"[No available engineer for job {job_id}]")
 
 
-def complete_task(task_id, outcome_score):
+def dispatch_next_task(engineer_id):
+    """
+    Hands a just-freed engineer the highest-priority eligible task they have history
+    on, straight from the scheduler instead of waiting for the next batch pass.
+    Returns the claimed (Job_Id, Task_Id), or None.
+    """
+    scheduler = get_scheduler()
+
+    def has_history(task):
+        return not np.isnan(score_engineers_for_tasks([task["task_id"]], [engineer_id])[0, 0])
+
+    while True:
+        task = scheduler.pop(accept=has_history)
+        if task is None:
+            return None
+        result = claim_task_row(task["key"], engineer_id)
+        if result == 'claimed':
+            print(f"Engineer {engineer_id} dispatched to Task {task['task_id']} of Job {task['job_id']}")
+            return task["job_id"], task["task_id"]
+        if result == 'engineer_unavailable':
+            scheduler.requeue(task)
+            return None
+        # Assigned elsewhere since it was queued: it stays off the queue, try the next one
+
+
+def claim_engineer_for_task(task_id, candidate_ids):
+    """
+    Atomically assigns the first still-available candidate to one unassigned row of
+    the task. Each attempt is a BEGIN IMMEDIATE transaction that flips the engineer's
+    Availability only if it is still 'Yes' and fills Engineer_Id only if it is still
+    NULL, so two concurrent requests can never book the same engineer or the same task.
+    On conflict the next-ranked candidate is tried.
+    Returns the claimed engineer id, or None if no candidate (or no unassigned task) is left.
+    """
     with get_connection() as conn:
-        conn.execute("""
-            UPDATE job_card
-            SET Status = 'Completed', Outcome_Score = ?
-            WHERE Task_Id = ? AND Engineer_Id IS NOT NULL
-        """, (outcome_score, task_id))
-        conn.commit()
-
-        eng_id = conn.execute("""
-            SELECT Engineer_Id FROM job_card WHERE Task_Id = ?
-        """, (task_id,)).fetchone()
-
-        if eng_id and eng_id[0]:
-            mark_engineer_available(eng_id[0])
-        print(f"Task {task_id} marked completed with score {outcome_score}")
+        if conn.in_transaction:
+            conn.commit()  # BEGIN IMMEDIATE must start a fresh transaction
+
+        for eng_id in candidate_ids:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                claimed = conn.execute(
+                    "UPDATE engineer_profiles SET Availability = 'No' WHERE Engineer_ID = ? AND Availability = 'Yes'",
+                    (eng_id,)).rowcount
+                if claimed != 1:
+                    conn.rollback()  # Someone else got this engineer first
+                    continue
+
+                assigned = conn.execute("""
+                    UPDATE job_card
+                    SET Engineer_Id = ?, Status = 'Assigned'
+                    WHERE rowid = (
+                        SELECT rowid FROM job_card
+                        WHERE Task_Id = ? AND Engineer_Id IS NULL
+                        ORDER BY rowid LIMIT 1
+                    )
+                """, (eng_id, task_id)).rowcount
+                if assigned != 1:
+                    conn.rollback()  # The task itself was taken; nothing left to claim
+                    return None
+
+                conn.commit()
+                print(f"Engineer {eng_id} assigned to Task {task_id}")
+                return eng_id
+            except Exception:
+                conn.rollback()
+                raise
+
+    return None
+
+
+def solve_batch_assignment(score_matrix, task_weights, capacities):
+    """
+    Solves the task x engineer assignment for the whole queue at once.
+    Each engineer column is repeated once per unit of capacity, and the
+    urgency-weighted scores are maximised with the Hungarian algorithm.
+    NaN scores mark pairs that cannot be assigned.
+    Returns a list of (task_index, engineer_index) pairs.
+    """
+    n_tasks, _ = score_matrix.shape
+    slot_engineers = np.repeat(np.arange(len(capacities)), capacities)
+    if n_tasks == 0 or len(slot_engineers) == 0:
+        return []
+
+    weighted = score_matrix[:, slot_engineers] * np.asarray(task_weights, dtype=float)[:, None]
+    infeasible = np.isnan(weighted)
+    # Any infeasible pair costs more than every feasible assignment combined
+    big_cost = np.nansum(np.abs(weighted)) + 1.0
+    cost = np.where(infeasible, big_cost, -weighted)
+
+    task_rows, slot_cols = linear_sum_assignment(cost)
+    return [
+        (int(task), int(slot_engineers[slot]))
+        for task, slot in zip(task_rows, slot_cols)
+        if not infeasible[task, slot]
+    ]
+
+
+def greedy_assignment(score_matrix, capacities):
+    """
+    Mirrors assign_engineers_to_pending_jobs: tasks are taken in queue order and each
+    gets the best-scoring engineer that still has capacity. Used as the baseline
+    for batch assignment.
+    """
+    remaining = np.array(capacities, dtype=int)
+    pairs = []
+    for task in range(score_matrix.shape[0]):
+        scores = np.where(remaining > 0, score_matrix[task], np.nan)
+        if np.all(np.isnan(scores)):
+            continue
+        engineer = int(np.nanargmax(scores))
+        remaining[engineer] -= 1
+        pairs.append((task, engineer))
+    return pairs
+
+
+def success_probability_matrix(conn, jobs, engineers, model_pipeline):
+    """
+    Job success probability of every (pending task, engineer) pair from the success
+    model, with the candidate features job_assigner scores a single job with. Tasks of
+    the same job share one row of probabilities.
+    """
+    engineer_ids = engineers['Engineer_ID'].tolist()
+    if jobs.empty or not engineer_ids:
+        return np.zeros((len(jobs), len(engineer_ids)))
+
+    general_scores = engineers.get('Overall_Performance_Score', pd.Series([None] * len(engineers)))
+    available = [
+        {'engineer_id': eng_id, 'overall_past_job_score': None if pd.isna(score) else float(score)}
+        for eng_id, score in zip(engineer_ids, general_scores)
+    ]
+    # The model is trained on the standard time of the whole job, not of one task
+    job_minutes = dict(conn.execute(
+        "SELECT Job_Id, SUM(Estimated_Standard_Time) FROM job_card GROUP BY Job_Id").fetchall())
+
+    distinct_jobs = jobs.drop_duplicates('Job_Id')
+    frames = []
+    for job in distinct_jobs.itertuples(index=False):
+        job_to_assign = {'job_description_text': job.Job_Name, 'vehicle_make': job.Make,
+                         'job_estimated_time': job_minutes.get(job.Job_Id)}
+        histories = get_job_features(conn, engineer_ids, job.Job_Name)
+        _, features = build_candidate_features(job_to_assign, available, histories)
+        frames.append(features)
+    probabilities = model_pipeline.predict_proba(pd.concat(frames, ignore_index=True))[:, 1]
+    probabilities = probabilities.reshape(len(distinct_jobs), len(engineer_ids))
+    job_positions = {job_id: row for row, job_id in enumerate(distinct_jobs['Job_Id'])}
+    return probabilities[jobs['Job_Id'].map(job_positions).to_numpy(dtype=int)]
+
+
+def assign_engineers_to_pending_jobs_batch(capacity=1, urgency_weights=URGENCY_WEIGHTS, dry_run=False):
+    """
+    Assigns every pending task in one pass: scores the full task x engineer matrix
+    once, solves it as an assignment problem with urgency weights and per-engineer
+    capacity, and commits all assignments in a single transaction.
+    The matrix holds job success probabilities from the success model; without a
+    trained model it falls back to the recommender's engineer/task similarity, and
+    the report's score_source says which one total_score sums.
+    capacity is either an int for every engineer or a dict of Engineer_ID -> int.
+    Returns a report with the total score and solve time, next to the greedy result
+    on the same matrix. Tasks or engineers claimed by someone else in the meantime are
+    left out and counted as conflicts.
+    """
+    start = time.perf_counter()
+    jobs = fetch_unassigned_jobs()
+    engineers = fetch_available_engineers()
+    engineer_ids = engineers['Engineer_ID'].tolist()
+
+    if isinstance(capacity, dict):
+        capacities = [int(capacity.get(eng_id, 1)) for eng_id in engineer_ids]
+    else:
+        capacities = [int(capacity)] * len(engineer_ids)
+
+    model_pipeline = load_scorer()
+    if model_pipeline is not None:
+        score_source = 'success_model'
+        with get_connection() as conn:
+            score_matrix = success_probability_matrix(conn, jobs, engineers, model_pipeline)
+    else:
+        score_source = 'recommender_similarity'
+        # Score each distinct task once, then expand to one row per pending task
+        distinct_tasks = jobs['Task_Id'].unique().tolist()
+        task_scores = score_engineers_for_tasks(distinct_tasks, engineer_ids)
+        task_positions = {task_id: row for row, task_id in enumerate(distinct_tasks)}
+        score_matrix = task_scores[jobs['Task_Id'].map(task_positions).to_numpy(dtype=int)] if len(jobs) else task_scores
+    task_weights = jobs['Urgency'].map(urgency_weights).fillna(1.0).to_numpy(dtype=float)
+    scored = time.perf_counter()
+
+    pairs = solve_batch_assignment(score_matrix, task_weights, capacities)
+    solved = time.perf_counter()
+
+    greedy_pairs = greedy_assignment(score_matrix, capacities)
+
+    assignments = [
+        (engineer_ids[eng], jobs.iloc[task]['Job_Id'], jobs.iloc[task]['Task_Id'])
+        for task, eng in pairs
+    ]
+    conflicts = 0
+    if assignments and not dry_run:
+        by_engineer = {}
+        for assignment in assignments:
+            by_engineer.setdefault(assignment[0], []).append(assignment)
+        claimed = []
+        # One BEGIN IMMEDIATE transaction, with the same guards as claim_engineer_for_task:
+        # an engineer booked elsewhere since scoring loses all of their tasks here
+        with get_connection() as conn:
+            if conn.in_transaction:
+                conn.commit()  # BEGIN IMMEDIATE must start a fresh transaction
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for eng_id, engineer_assignments in by_engineer.items():
+                    available = conn.execute(
+                        "UPDATE engineer_profiles SET Availability = 'No' WHERE Engineer_ID = ? AND Availability = 'Yes'",
+                        (eng_id,)).rowcount
+                    if available != 1:
+                        continue
+                    engineer_claimed = [
+                        assignment for assignment in engineer_assignments
+                        if conn.execute("""
+                            UPDATE job_card
+                            SET Engineer_Id = ?, Status = 'Assigned'
+                            WHERE Job_Id = ? AND Task_Id = ? AND Engineer_Id IS NULL
+                        """, assignment).rowcount
+                    ]
+                    if not engineer_claimed:
+                        # Every task of theirs was taken meanwhile: leave them free
+                        conn.execute("UPDATE engineer_profiles SET Availability = 'Yes' WHERE Engineer_ID = ?", (eng_id,))
+                    claimed.extend(engineer_claimed)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        conflicts = len(assignments) - len(claimed)
+        assignments = claimed
+        print(f"Committed {len(assignments)} assignments in one transaction"
+              + (f" ({conflicts} lost to concurrent claims)" if conflicts else ""))
+
+    report = {
+        'pending_tasks': len(jobs),
+        'available_engineers': len(engineer_ids),
+        'assigned': len(assignments),
+        'conflicts': conflicts,
+        'score_source': score_source,
+        'total_score': float(sum(score_matrix[t, e] for t, e in pairs)),
+        'greedy_assigned': len(greedy_pairs),
+        'greedy_total_score': float(sum(score_matrix[t, e] for t, e in greedy_pairs)),
+        'scoring_ms': (scored - start) * 1000,
+        'solve_ms': (solved - scored) * 1000,
+        'total_ms': (time.perf_counter() - start) * 1000,
+        'assignments': assignments
+    }
+    print(f"Batch assigned {report['assigned']}/{report['pending_tasks']} tasks, "
+          f"{'expected success' if score_source == 'success_model' else 'similarity score'} "
+          f"{report['total_score']:.2f} (greedy {report['greedy_total_score']:.2f}), "
+          f"solve {report['solve_ms']:.1f} ms")
+    return report
+
+
+def minutes_since(time_started, fallback):
+    """Minutes from Time_Started until now, or fallback if it is missing or unparseable."""
+    if time_started is None:
+        return fallback
+    try:
+        return (datetime.now() - datetime.fromisoformat(str(time_started))).total_seconds() / 60
+    except (TypeError, ValueError):  # Malformed, or a timezone-aware timestamp
+        return fallback
+
+
+def complete_task(task_id, outcome_score, job_id=None):
+    """
+    Marks the task completed on every job it is assigned on (only on job_id if given),
+    frees its engineer and commits that first. Folding the outcome into the feature
+    store and the recommender and releasing the next queued tasks are best-effort
+    afterwards: a failure there is logged and never undoes the completion.
+    Returns the number of job_card rows completed.
+    """
+    job_filter, params = ("AND Job_Id = ?", (task_id, job_id)) if job_id is not None else ("", (task_id,))
+    with get_connection() as conn:
+        completed = conn.execute(f"""
+            SELECT rowid, Job_Id, Engineer_Id, Job_Name, Urgency, Estimated_Standard_Time, Time_Started
+            FROM job_card
+            WHERE Task_Id = ? {job_filter} AND Engineer_Id IS NOT NULL AND COALESCE(Status, '') != 'Completed'
+        """, params).fetchall()
+        conn.executemany("UPDATE job_card SET Status = 'Completed', Outcome_Score = ? WHERE rowid = ?",
+                         [(outcome_score, row[0]) for row in completed])
+        for engineer_id in {row[2] for row in completed}:
+            mark_engineer_available(engineer_id)
+    print(f"Task {task_id} marked completed with score {outcome_score} on {len(completed)} job(s)")
+
+    for card_rowid, card_job_id, engineer_id, job_name, urgency, estimated_time, time_started in completed:
+        try:
+            # Fold the outcome into the engineer's running job- and task-level features
+            with get_connection() as conn:
+                ensure_feature_table(conn)
+                record_outcome(conn, engineer_id, job_name, outcome_score)
+                record_outcome(conn, engineer_id, task_id, outcome_score)
+        except Exception as e:
+            print(f"Could not update the feature store for Task {task_id} of Job {card_job_id}: {e}")
+        try:
+            # Make the outcome visible to recommendations straight away
+            time_taken = minutes_since(time_started, estimated_time)
+            if time_taken:
+                record_task_outcome(task_id, engineer_id, outcome_score, time_taken, estimated_time, urgency)
+        except Exception as e:
+            print(f"Could not update the recommender for Task {task_id} of Job {card_job_id}: {e}")
+
+    # Release the next task of each job and hand the freed engineers work straight away
+    try:
+        scheduler = get_scheduler()
+        for card_rowid, *_ in completed:
+            scheduler.complete(card_rowid)
+        for engineer_id in dict.fromkeys(row[2] for row in completed):
+            dispatch_next_task(engineer_id)
+    except Exception as e:
+        print(f"Could not dispatch the next task after Task {task_id}: {e}")
+    return len(completed)
 
 
 def update_task_assignment(task_id, engineer_id):
@@ -124,5 +498,4 @@ def update_task_assignment(task_id, engineer_id):
             SET Engineer_Id = ?, Status = 'Assigned'
             WHERE Task_Id = ? AND Engineer_Id IS NULL
         """, (engineer_id, task_id))
-        conn.commit()
         print(f"Engineer {engineer_id} assigned to Task {task_id}")
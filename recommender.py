@@ -1,82 +1,356 @@
+import os
+import hashlib
+import threading
 import pandas as pd
 import numpy as np
 import sqlite3
-from sklearn.metrics.pairwise import cosine_similarity
+from core.db import get_connection
+from core.excel_snapshot import read_excel_cached
 
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 job_data_path = "data/generated_flat_job_history_FINAL.xlsx"
-df_jobs = pd.read_excel(job_data_path)
-
-# --- Feature engineering ---
-df_jobs['Job_Duration_Deviation'] = df_jobs['Time_Taken_minutes'] - df_jobs['Estimated_Standard_Time']
-df_jobs['Engineer_Efficiency'] = df_jobs['Outcome_Score'] / df_jobs['Time_Taken_minutes']
+DB_PATH = "database/workshopnew.db"
+# Compact binary copies of the engineer/task aggregates, one per database, reused until
+# that database's job_history changes
+SNAPSHOT_DIR = os.path.join(BASE_DIR, 'data')
 
 urgency_map = {'Low': 1, 'Normal': 2, 'High': 3}
-df_jobs['Urgency_Level'] = df_jobs['Urgency'].map(urgency_map)
-df_jobs['Time_Pressure_Score'] = df_jobs['Urgency_Level'] * df_jobs['Job_Duration_Deviation']
+feature_cols = ['Outcome_Score', 'Engineer_Efficiency', 'Time_Pressure_Score', 'Urgency_Level']
 
 
-engineer_task_features = df_jobs.groupby(['Assigned_Engineer_Id', 'Task_Id']).agg({
-    'Outcome_Score': 'mean',
-    'Engineer_Efficiency': 'mean',
-    'Time_Pressure_Score': 'mean',
-    'Urgency_Level': 'mean'
-}).reset_index()
+def snapshot_path_for(db_path, snapshot_dir=SNAPSHOT_DIR):
+    """Snapshot file for one database: its name plus a hash of its absolute path."""
+    db_path = os.path.abspath(db_path)
+    name = os.path.splitext(os.path.basename(db_path))[0]
+    digest = hashlib.sha1(db_path.encode('utf-8')).hexdigest()[:10]
+    return os.path.join(snapshot_dir, f"recommender_snapshot_{name}_{digest}.npz")
 
-feature_cols = ['Outcome_Score', 'Engineer_Efficiency', 'Time_Pressure_Score', 'Urgency_Level']
-engineer_task_matrix = engineer_task_features.set_index(['Task_Id', 'Assigned_Engineer_Id'])[feature_cols]
-task_profiles = engineer_task_matrix.groupby('Task_Id').mean()
 
+def _normalize_rows(matrix):
+    """L2-normalizes each row (NaN treated as 0) so cosine similarity becomes a dot product."""
+    matrix = np.nan_to_num(matrix)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
 
-DB_PATH = "database/workshopnew.db"
 
-def get_available_engineers_from_db():
-    """Fetch available engineer IDs from the database."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.execute("SELECT Engineer_Id FROM engineer_profiles WHERE Availability = 'Yes'")
-    available_engs = {row[0] for row in cursor.fetchall()}
-    conn.close()
-    return available_engs
+def _top_k_indices(scores, k):
+    """Indices of the k largest non-NaN scores, best first, via argpartition."""
+    candidates = np.flatnonzero(~np.isnan(scores))
+    if k <= 0 or candidates.size == 0:
+        return candidates[:0]
+    if candidates.size > k:
+        part = np.argpartition(-scores[candidates], k - 1)[:k]
+        candidates = candidates[part]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
 
-def get_top_similar_tasks(task_id, top_k=3):
-    """Return top-k most similar task IDs to the given task ID."""
-    if task_id not in task_profiles.index:
-        return [], []
 
-    task_vector = task_profiles.loc[task_id].values.reshape(1, -1)
-    similarities = cosine_similarity(task_vector, task_profiles)[0]
+class RecommenderEngine:
+    """
+    Memory-based collaborative filtering over engineer/task history.
 
-    similar_task_df = pd.DataFrame({
-        'task_id': task_profiles.index,
-        'similarity': similarities
-    })
+    Nothing is read at import time. On first use the engine builds its aggregates
+    from the job_history table (or from a cached .npz snapshot of them, or the
+    Excel history as a last resort) and precomputes the task x task cosine
+    similarity matrix plus every engineer's similarity to each task profile, so
+    each recommendation is an array lookup and a top-k partition.
+    """
 
-    similar_task_df = similar_task_df[similar_task_df['task_id'] != task_id]
-    similar_task_df = similar_task_df.sort_values(by='similarity', ascending=False).head(top_k)
+    def __init__(self, db_path=DB_PATH, snapshot_path=SNAPSHOT_DIR, excel_path=job_data_path):
+        """snapshot_path: a .npz file, a directory to keep one file per database in, or None for no snapshot."""
+        self.db_path = db_path
+        if snapshot_path and os.path.isdir(snapshot_path):
+            snapshot_path = snapshot_path_for(db_path, snapshot_path)
+        self.snapshot_path = snapshot_path
+        self.excel_path = excel_path
+        self._lock = threading.RLock()
+        self._built = False
 
-    return similar_task_df['task_id'].tolist(), similar_task_df['similarity'].round(2).tolist()
+    # --- Building ---
 
-def recommend_engineers_memory_cf(task_id, top_n=5):
+    def _ensure_built(self):
+        if self._built:
+            return
+        with self._lock:
+            if self._built:
+                return
+            # Stamped before reading, so rows added meanwhile make the snapshot stale rather than lost
+            source_stamp = self._source_stamp()
+            if not self._load_snapshot(source_stamp):
+                self._build_from_history(self._load_history())
+                self._save_snapshot(source_stamp)
+            self._built = True
+
+    def _source_stamp(self):
+        """
+        Content watermark of job_history: highest rowid, row count, completed count and
+        the totals of the columns the aggregates are built from. It changes with every
+        insert, delete, completion or in-place rewrite of a score or time (e.g. an
+        ingest upsert), wherever the write landed (the -wal file included), and is
+        unaffected by writes to other tables.
+        """
+        empty = np.zeros(6)
+        if not os.path.exists(self.db_path):
+            return empty
+        conn = get_connection(self.db_path)
+        try:
+            row = conn.execute("""
+                SELECT COALESCE(MAX(rowid), 0), COUNT(*), COALESCE(SUM(Status = 'Completed'), 0),
+                       TOTAL(Outcome_Score), TOTAL(Time_Taken_minutes), TOTAL(Estimated_Standard_Time)
+                FROM job_history
+            """).fetchone()
+        except sqlite3.Error:
+            return empty  # No job_history table: built from Excel
+        finally:
+            conn.close()
+        return np.array(row, dtype=float)
+
+    def _load_history(self):
+        """Reads completed task history from the database, falling back to the Excel export."""
+        columns = "Task_Id, {engineer} AS Assigned_Engineer_Id, Outcome_Score, Time_Taken_minutes, Estimated_Standard_Time, Urgency"
+        if os.path.exists(self.db_path):
+            conn = get_connection(self.db_path)
+            try:
+                history_columns = {row[1] for row in conn.execute("PRAGMA table_info(job_history)")}
+                engineer_col = 'Assigned_Engineer_Id' if 'Assigned_Engineer_Id' in history_columns else 'Engineer_Id'
+                if engineer_col in history_columns:
+                    df_jobs = pd.read_sql_query(
+                        f"SELECT {columns.format(engineer=engineer_col)} FROM job_history WHERE Status = 'Completed'", conn)
+                    if not df_jobs.empty:
+                        print(f"Recommender built from {len(df_jobs)} job_history rows in {self.db_path}")
+                        return df_jobs
+            finally:
+                conn.close()
+
+        print(f"No job history in {self.db_path}; reading {self.excel_path}")
+        return read_excel_cached(self.excel_path)
+
+    def _build_from_history(self, df_jobs):
+        # --- Feature engineering ---
+        df_jobs = df_jobs.copy()
+        df_jobs['Job_Duration_Deviation'] = df_jobs['Time_Taken_minutes'] - df_jobs['Estimated_Standard_Time']
+        df_jobs['Engineer_Efficiency'] = df_jobs['Outcome_Score'] / df_jobs['Time_Taken_minutes']
+        df_jobs['Urgency_Level'] = df_jobs['Urgency'].map(urgency_map)
+        df_jobs['Time_Pressure_Score'] = df_jobs['Urgency_Level'] * df_jobs['Job_Duration_Deviation']
+
+        task_codes, task_ids = pd.factorize(df_jobs['Task_Id'], sort=True)
+        engineer_codes, engineer_ids = pd.factorize(df_jobs['Assigned_Engineer_Id'], sort=True)
+        values = df_jobs[feature_cols].to_numpy(dtype=float)
+        present = ~np.isnan(values)
+
+        sums = np.zeros((len(task_ids), len(engineer_ids), len(feature_cols)))
+        counts = np.zeros_like(sums)
+        np.add.at(sums, (task_codes, engineer_codes), np.where(present, values, 0.0))
+        np.add.at(counts, (task_codes, engineer_codes), present)
+
+        self._set_aggregates(np.asarray(task_ids, dtype=str), np.asarray(engineer_ids, dtype=str), sums, counts)
+
+    def _set_aggregates(self, task_ids, engineer_ids, sums, counts):
+        self.task_ids = task_ids
+        self.engineer_ids = engineer_ids
+        self.task_index = {task_id: i for i, task_id in enumerate(task_ids)}
+        self.engineer_index = {eng_id: i for i, eng_id in enumerate(engineer_ids)}
+        self._sums = sums
+        self._counts = counts
+        self._precompute()
+
+    def _precompute(self):
+        """Derives the per-(engineer, task) means, task profiles and both similarity matrices."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Mean of each feature per (task, engineer) pair; NaN where there is no history
+            self.pair_means = np.where(self._counts > 0, self._sums / np.maximum(self._counts, 1), np.nan)
+            self.has_history = (self._counts > 0).any(axis=2)
+            # Task profile = mean over engineers of their per-pair means
+            pair_present = ~np.isnan(self.pair_means)
+            self.task_profiles = np.nansum(self.pair_means, axis=1) / np.maximum(pair_present.sum(axis=1), 1)
+
+        self._unit_profiles = _normalize_rows(self.task_profiles)
+        self.task_similarity = self._unit_profiles @ self._unit_profiles.T
+        unit_pairs = _normalize_rows(self.pair_means)
+        self.engineer_similarity = np.where(
+            self.has_history, np.einsum('tef,tf->te', unit_pairs, self._unit_profiles), np.nan)
+
+    # --- Incremental updates ---
+
+    def _add_entity(self, task_id, engineer_id):
+        """Grows the aggregate arrays for a task or engineer seen for the first time."""
+        task_ids, engineer_ids = self.task_ids, self.engineer_ids
+        sums, counts = self._sums, self._counts
+        if task_id not in self.task_index:
+            task_ids = np.append(task_ids, task_id)
+            sums = np.pad(sums, ((0, 1), (0, 0), (0, 0)))
+            counts = np.pad(counts, ((0, 1), (0, 0), (0, 0)))
+        if engineer_id not in self.engineer_index:
+            engineer_ids = np.append(engineer_ids, engineer_id)
+            sums = np.pad(sums, ((0, 0), (0, 1), (0, 0)))
+            counts = np.pad(counts, ((0, 0), (0, 1), (0, 0)))
+        self._set_aggregates(task_ids, engineer_ids, sums, counts)
+
+    def record_outcome(self, task_id, engineer_id, outcome_score, time_taken_minutes,
+                       estimated_standard_time, urgency):
+        """
+        Folds one completed task into the running (engineer, task) aggregates and
+        refreshes only what depends on them: that pair's mean, the task's profile,
+        the task's row/column of the task similarity matrix and the task's row of
+        engineer similarities. Costs O(tasks + engineers), independent of history size.
+        """
+        self._ensure_built()
+        urgency_level = urgency_map.get(urgency, np.nan)
+        deviation = time_taken_minutes - estimated_standard_time
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = np.array([
+                outcome_score,
+                outcome_score / time_taken_minutes,
+                urgency_level * deviation,
+                urgency_level
+            ], dtype=float)
+        present = ~np.isnan(values)
 
-    if task_id not in task_profiles.index:
-        return f"Task '{task_id}' not found in profiles."
+        with self._lock:
+            if task_id not in self.task_index or engineer_id not in self.engineer_index:
+                self._add_entity(task_id, engineer_id)
+            t = self.task_index[task_id]
+            e = self.engineer_index[engineer_id]
 
-    task_vector = task_profiles.loc[task_id].values.reshape(1, -1)
+            self._sums[t, e] += np.where(present, values, 0.0)
+            self._counts[t, e] += present
 
-    try:
-        engineers_for_task = engineer_task_matrix.loc[task_id]
-    except KeyError:
-        return f"No engineers found for task '{task_id}'."
+            with np.errstate(invalid='ignore', divide='ignore'):
+                self.pair_means[t, e] = np.where(self._counts[t, e] > 0, self._sums[t, e] / np.maximum(self._counts[t, e], 1), np.nan)
+                self.has_history[t, e] = (self._counts[t, e] > 0).any()
+                task_pairs = self.pair_means[t]
+                self.task_profiles[t] = np.nansum(task_pairs, axis=0) / np.maximum((~np.isnan(task_pairs)).sum(axis=0), 1)
 
-    engineer_vectors = engineers_for_task.values
-    engineer_ids = engineers_for_task.index.tolist()
+            self._unit_profiles[t] = _normalize_rows(self.task_profiles[t])
+            task_row = self._unit_profiles @ self._unit_profiles[t]
+            self.task_similarity[t, :] = task_row
+            self.task_similarity[:, t] = task_row
+            self.engineer_similarity[t] = np.where(
+                self.has_history[t], _normalize_rows(task_pairs) @ self._unit_profiles[t], np.nan)
 
-    similarities = cosine_similarity(engineer_vectors, task_vector).flatten()
-    top_indices = np.argsort(similarities)[::-1]
+    # --- Snapshot ---
 
+    def _load_snapshot(self, source_stamp):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with np.load(self.snapshot_path) as snapshot:
+                if not np.array_equal(snapshot['source_stamp'], source_stamp):
+                    return False
+                self._set_aggregates(snapshot['task_ids'], snapshot['engineer_ids'], snapshot['sums'], snapshot['counts'])
+        except Exception as e:
+            print(f"Ignoring unreadable recommender snapshot {self.snapshot_path}: {e}")
+            return False
+        print(f"Recommender loaded from snapshot {self.snapshot_path}")
+        return True
+
+    def _save_snapshot(self, source_stamp):
+        if not self.snapshot_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_path) or '.', exist_ok=True)
+            tmp_path = self.snapshot_path + '.tmp.npz'
+            np.savez(tmp_path, source_stamp=source_stamp, task_ids=self.task_ids,
+                     engineer_ids=self.engineer_ids, sums=self._sums, counts=self._counts)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            print(f"Could not write recommender snapshot: {e}")
+
+    def reload(self):
+        """Drops the in-memory matrices and snapshot so the next call rebuilds from history."""
+        with self._lock:
+            self._built = False
+            if self.snapshot_path and os.path.exists(self.snapshot_path):
+                os.remove(self.snapshot_path)
+
+    # --- Queries ---
+
+    def has_task(self, task_id):
+        self._ensure_built()
+        return task_id in self.task_index
+
+    def top_similar_tasks(self, task_id, top_k=3):
+        """Return top-k most similar task IDs to the given task ID, with their similarities."""
+        self._ensure_built()
+        row = self.task_index.get(task_id)
+        if row is None:
+            return [], []
+        similarities = self.task_similarity[row].copy()
+        similarities[row] = np.nan  # Exclude the task itself
+        top = _top_k_indices(similarities, top_k)
+        return self.task_ids[top].tolist(), np.round(similarities[top], 2).tolist()
+
+    def rank_engineers(self, task_id, top_n=5):
+        """Top-n engineers with history on the task, ranked by similarity to the task profile."""
+        self._ensure_built()
+        row = self.task_index.get(task_id)
+        if row is None:
+            return []
+        similarities = self.engineer_similarity[row]
+        top = _top_k_indices(similarities, top_n)
+        return [(str(self.engineer_ids[i]), round(float(similarities[i]), 4)) for i in top]
+
+    def score_matrix(self, task_ids, engineer_ids):
+        """Similarity matrix for the given tasks x engineers; NaN where there is no history."""
+        self._ensure_built()
+        scores = np.full((len(task_ids), len(engineer_ids)), np.nan)
+        rows = [(out_row, self.task_index[t]) for out_row, t in enumerate(task_ids) if t in self.task_index]
+        cols = [(out_col, self.engineer_index[e]) for out_col, e in enumerate(engineer_ids) if e in self.engineer_index]
+        if rows and cols:
+            out_rows, src_rows = map(np.array, zip(*rows))
+            out_cols, src_cols = map(np.array, zip(*cols))
+            scores[np.ix_(out_rows, out_cols)] = self.engineer_similarity[np.ix_(src_rows, src_cols)]
+        return scores
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+def get_engine():
+    """Returns the process-wide recommender engine (built lazily on first query)."""
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = RecommenderEngine(db_path=DB_PATH)
+        return _default_engine
+
+
+def record_task_outcome(task_id, engineer_id, outcome_score, time_taken_minutes,
+                        estimated_standard_time, urgency):
+    """Updates the live recommender with a newly completed task, without a rebuild."""
+    get_engine().record_outcome(task_id, engineer_id, outcome_score, time_taken_minutes,
+                                estimated_standard_time, urgency)
+
+
+def get_available_engineers_from_db():
+    """Fetch available engineer IDs from the database."""
+    conn = get_connection(DB_PATH)
+    cursor = conn.execute("SELECT Engineer_Id FROM engineer_profiles WHERE Availability = 'Yes'")
+    available_engs = {row[0] for row in cursor.fetchall()}
+    conn.close()
+    return available_engs
+
+def get_top_similar_tasks(task_id, top_k=3):
+    """Return top-k most similar task IDs to the given task ID."""
+    return get_engine().top_similar_tasks(task_id, top_k)
+
+def score_engineers_for_tasks(task_ids, engineer_ids):
+    """
+    Returns a len(task_ids) x len(engineer_ids) matrix of the engineer/task similarity
+    scores that recommend_engineers_memory_cf ranks by. Cells are NaN where the
+    engineer has no history on the task.
+    """
+    return get_engine().score_matrix(task_ids, engineer_ids)
+
+def recommend_engineers_memory_cf(task_id, top_n=5):
+    engine = get_engine()
 
-    full_recommendations = [(engineer_ids[i], round(similarities[i], 4)) for i in top_indices[:top_n]]
+    if not engine.has_task(task_id):
+        return f"Task '{task_id}' not found in profiles.", None
 
+    full_recommendations = engine.rank_engineers(task_id, top_n)
+    if not full_recommendations:
+        return f"No engineers found for task '{task_id}'.", None
 
     available_engineers = get_available_engineers_from_db()
 
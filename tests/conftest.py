@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules live at the repository root and in core/, which is not installed as a package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
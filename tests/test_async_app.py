@@ -0,0 +1,47 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp.test_utils import TestClient, TestServer
+
+import async_app
+
+
+def test_timed_out_llm_call_keeps_its_slot_until_the_thread_returns(monkeypatch):
+    release = threading.Event()
+
+    def slow_mapping(description):
+        release.wait(5)
+        return ['Brake Inspection']
+
+    monkeypatch.setattr(async_app, 'get_matching_services', slow_mapping)
+    monkeypatch.setattr(async_app, 'LLM_TIMEOUT_SECONDS', 0.05)
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    async def scenario():
+        app = async_app.create_app()
+        app['llm_slots'] = slots = async_app.ExecutorSlots(executor, 1)
+        async with TestClient(TestServer(app)) as client:
+            timed_out = await client.post('/mapping_services', json={'description': 'brakes squeal'})
+            assert timed_out.status == 504
+            assert slots.in_flight == 1  # The worker is still blocked on the first call
+
+            busy = await client.post('/mapping_services', json={'description': 'brakes squeal'})
+            assert busy.status == 503
+
+            release.set()
+            for _ in range(100):
+                if slots.in_flight == 0:
+                    break
+                await asyncio.sleep(0.01)
+            assert slots.in_flight == 0
+
+            answered = await client.post('/mapping_services', json={'description': 'brakes squeal'})
+            assert answered.status == 200
+            assert (await answered.json()) == {'services': ['Brake Inspection']}
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        executor.shutdown(wait=True)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from core.compiled_scorer import LinearScorer, check_scorer_parity
+from core.predictive_model import build_online_classifier, preprocess_data
+from tests.test_model_search import synthetic_training_frame
+
+
+def fitted_pipeline(classifier, seed=0):
+    X, y, preprocessor = preprocess_data(synthetic_training_frame(seed=seed), verbose=False)
+    pipeline = Pipeline([('preprocessor', clone(preprocessor)), ('classifier', classifier)])
+    return pipeline.fit(X, y), X
+
+
+@pytest.mark.parametrize('classifier', [LogisticRegression(solver='liblinear', C=1.0), build_online_classifier()],
+                         ids=['logistic', 'sgd'])
+def test_compiled_scorer_matches_predict_proba(classifier):
+    pipeline, X = fitted_pipeline(classifier)
+    scorer = LinearScorer.from_pipeline(pipeline)
+
+    np.testing.assert_allclose(scorer.predict_proba(X), pipeline.predict_proba(X), atol=1e-9)
+    assert check_scorer_parity(pipeline, scorer, X)[0]
+
+
+def test_saved_scorer_loads_with_the_same_probabilities(tmp_path):
+    pipeline, X = fitted_pipeline(LogisticRegression(solver='liblinear', C=1.0))
+    path = str(tmp_path / 'scorer.npz')
+    LinearScorer.from_pipeline(pipeline).save(path)
+
+    np.testing.assert_allclose(LinearScorer.load(path).predict_proba(X), pipeline.predict_proba(X), atol=1e-9)
+
+
+def test_unseen_and_missing_categories_score_like_the_pipeline():
+    pipeline, X = fitted_pipeline(build_online_classifier())
+    X = X.head(20).copy()
+    X.loc[X.index[:5], 'job_description_text'] = 'Clutch Replacement'
+    X.loc[X.index[5:10], 'vehicle_make'] = 'Tesla'
+    X.loc[X.index[10:12], 'vehicle_make'] = np.nan
+
+    np.testing.assert_allclose(LinearScorer.from_pipeline(pipeline).predict_proba(X),
+                               pipeline.predict_proba(X), atol=1e-9)
+
+
+def test_non_linear_pipeline_is_not_compiled():
+    pipeline, _ = fitted_pipeline(RandomForestClassifier(n_estimators=5, random_state=0))
+    with pytest.raises(ValueError):
+        LinearScorer.from_pipeline(pipeline)
@@ -0,0 +1,20 @@
+from core.db import get_connection
+
+
+def test_pooled_connections_enforce_foreign_keys(tmp_path):
+    db_path = str(tmp_path / 'workshop.db')
+    conn = get_connection(db_path)
+    conn.executescript("""
+        CREATE TABLE parent (id INTEGER PRIMARY KEY);
+        CREATE TABLE child (parent_id INTEGER REFERENCES parent (id));
+    """)
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    conn.close()
+
+    # Every borrower gets the same settings, without having to set them itself
+    conn = get_connection(db_path)
+    try:
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    finally:
+        conn.close()
@@ -0,0 +1,57 @@
+import sqlite3
+
+import pytest
+
+from core.db_setup import HISTORY_KEY_INDEX, SCHEMA_VERSION, migrate_database
+
+
+def index_names(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'workshop.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE job_card (Job_Id TEXT, Task_Id TEXT, Status TEXT, Engineer_Id TEXT)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_indexes_for_tables_created_after_migrating_are_added_later(db_path):
+    assert migrate_database(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        assert 'idx_job_card_status' in index_names(conn)
+        assert 'idx_job_history_status' not in index_names(conn)
+
+        conn.execute("""CREATE TABLE job_history (Job_ID TEXT, Task_Id TEXT, Status TEXT,
+                                                  Engineer_Id TEXT, Job_Name TEXT, Outcome_Score REAL)""")
+        conn.commit()
+        assert migrate_database(db_path)
+        assert {'idx_job_history_status', 'idx_job_history_engineer_job', HISTORY_KEY_INDEX} <= index_names(conn)
+    finally:
+        conn.close()
+
+
+def test_history_key_migration_stays_pending_while_duplicates_exist(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("CREATE TABLE job_history (Job_ID TEXT, Task_Id TEXT, Status TEXT)")
+        conn.executemany("INSERT INTO job_history VALUES (?, ?, 'Completed')",
+                         [('J1', 'T1'), ('J1', 'T1'), ('J2', 'T1')])
+        conn.commit()
+
+        assert not migrate_database(db_path)
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 2  # Stopped before the history key
+        assert HISTORY_KEY_INDEX not in index_names(conn)
+
+        conn.execute("DELETE FROM job_history WHERE rowid = 2")
+        conn.commit()
+        assert migrate_database(db_path)
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        assert HISTORY_KEY_INDEX in index_names(conn)
+    finally:
+        conn.close()
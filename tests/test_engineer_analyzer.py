@@ -0,0 +1,219 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import core.engineer_analyzer as engineer_analyzer
+from core.engineer_analyzer import (WATERMARK_TABLE, calculate_overall_performance, check_aggregation_parity,
+                                    merge_engineer_scores, overall_performance_scores, pandas_engineer_scores,
+                                    refresh_profiles_incremental, sql_engineer_scores)
+
+ENGINEERS = ['E1', 'E2', 'E3', 'E4', 'E5']
+JOBS = {'Basic Service': ['Oil Change', 'Air Filter Check'],
+        'Full Service': ['Oil Change', 'Spark Plugs Replacement', 'Brake Inspection (Front, Rear)'],
+        'Tyre Service': ['Tyre Pressure Check']}
+
+
+def make_history(n_rows=300, seed=7):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n_rows):
+        engineer = rng.choice(ENGINEERS)
+        job = rng.choice(list(JOBS))
+        if engineer == 'E5' and job != 'Tyre Service':
+            job = 'Tyre Service'  # E5 has no score for most jobs and tasks
+        rows.append({
+            'Job_Name': job,
+            'Task_Id': f'T{rng.integers(100)}',
+            'Task_to_be_done': rng.choice(JOBS[job]),
+            'Status': 'Completed' if rng.random() < 0.9 else 'In Progress',
+            'Assigned_Engineer_Id': engineer if rng.random() < 0.97 else None,
+            'Outcome_Score': float(rng.integers(1, 6)) if rng.random() < 0.95 else None,
+            'Time_Taken_minutes': float(rng.integers(20, 240)),
+        })
+    return pd.DataFrame(rows)
+
+
+def create_history_db(conn, history):
+    history.to_sql('job_history', conn, index=False)
+    pd.DataFrame({'Engineer_ID': ENGINEERS + ['E6'], 'Engineer_Name': list('ABCDEF')}).to_sql(
+        'engineer_profiles', conn, index=False)
+
+
+def old_overall_performance(engineer_df):
+    """The pandas formula calculate_overall_performance used before it was vectorized."""
+    engineer_df = engineer_df.copy()
+    score_columns = [col for col in engineer_df.columns if col.endswith('_Score') and 'Overall_Performance_Score' not in col]
+    quality = engineer_df[score_columns].mean(axis=1)
+    normalized_rating = ((engineer_df['Customer_Rating'] - 1) / 4) * 100
+    speed_factor = engineer_df['Avg_Job_Completion_Time'].mean() / engineer_df['Avg_Job_Completion_Time']
+    timeliness = np.clip(speed_factor * 75, 0, 100)
+    final_score = quality * 0.75 + normalized_rating * 0.05 + timeliness * 0.20
+    return np.clip(final_score.round().astype(int), 0, 100).to_numpy()
+
+
+@pytest.fixture
+def history_conn():
+    history = make_history()
+    conn = sqlite3.connect(':memory:')
+    create_history_db(conn, history)
+    yield conn, history
+    conn.close()
+
+
+def test_sql_scores_match_pandas_reference(history_conn):
+    conn, history = history_conn
+    expected = pandas_engineer_scores(history[history['Status'] == 'Completed'])
+
+    actual = sql_engineer_scores(conn)
+
+    assert list(actual.columns) == list(expected.columns)
+    assert actual.loc['E5'].isna().sum() > 0
+    pd.testing.assert_frame_equal(actual, expected.astype(float), check_exact=False, rtol=1e-12, check_names=False)
+
+
+def test_overall_scores_match_old_pandas_formula(history_conn):
+    conn, history = history_conn
+    profiles = pd.read_sql_query("SELECT Engineer_ID, Engineer_Name FROM engineer_profiles", conn)
+    merged = merge_engineer_scores(profiles, sql_engineer_scores(conn))
+    score_columns = [col for col in merged.columns if col.endswith('_Score') and col != 'Overall_Performance_Score']
+
+    actual = overall_performance_scores(merged[score_columns].to_numpy(dtype=float),
+                                        merged['Customer_Rating'].to_numpy(dtype=float),
+                                        merged['Avg_Job_Completion_Time'].to_numpy(dtype=float))
+
+    np.testing.assert_array_equal(actual, old_overall_performance(merged))
+
+
+def test_overall_scores_skip_missing_quality_scores():
+    quality = np.array([[80.0, np.nan, 60.0], [np.nan, np.nan, 100.0]])
+    actual = overall_performance_scores(quality, [5.0, 1.0], [60.0, 120.0])
+    frame = pd.DataFrame({'A_Score': quality[:, 0], 'B_Score': quality[:, 1], 'C_Score': quality[:, 2],
+                          'Customer_Rating': [5.0, 1.0], 'Avg_Job_Completion_Time': [60.0, 120.0]})
+    np.testing.assert_array_equal(actual, old_overall_performance(frame))
+
+
+def test_parity_check_passes_on_database(tmp_path):
+    path = str(tmp_path / 'workshop.db')
+    conn = sqlite3.connect(path)
+    create_history_db(conn, make_history(seed=11))
+    conn.close()
+
+    ok, report = check_aggregation_parity(path)
+
+    assert ok, report
+    assert report['engineers'] == len(ENGINEERS)
+
+
+def with_job_ids(history, first=1001):
+    return history.assign(Job_ID=[f'JOB{first + i}' for i in range(len(history))])
+
+
+def create_profile_db(path, history, profile_history):
+    """A workshop database whose engineer_profiles has every column the full analysis of profile_history writes."""
+    scratch = sqlite3.connect(':memory:')
+    create_history_db(scratch, profile_history)
+    names = pd.read_sql_query("SELECT Engineer_ID, Engineer_Name FROM engineer_profiles", scratch)
+    columns = calculate_overall_performance(merge_engineer_scores(names, sql_engineer_scores(scratch))).columns
+    scratch.close()
+
+    conn = sqlite3.connect(path)
+    history.to_sql('job_history', conn, index=False)
+    conn.execute(f"CREATE TABLE engineer_profiles ({', '.join(chr(34) + col + chr(34) for col in columns)})")
+    conn.executemany("INSERT INTO engineer_profiles (Engineer_ID, Engineer_Name) VALUES (?, ?)",
+                     names.itertuples(index=False, name=None))
+    conn.commit()
+    conn.close()
+
+
+def read_profiles(path):
+    conn = sqlite3.connect(path)
+    try:
+        return pd.read_sql_query("SELECT * FROM engineer_profiles", conn).set_index('Engineer_ID').sort_index()
+    finally:
+        conn.close()
+
+
+def analyze(path, monkeypatch):
+    monkeypatch.setattr(engineer_analyzer, 'DB_PATH', path)
+    engineer_analyzer.analyze_and_update_profiles()
+    return read_profiles(path)
+
+
+def append_history(path, rows):
+    conn = sqlite3.connect(path)
+    rows.to_sql('job_history', conn, index=False, if_exists='append')
+    conn.commit()
+    conn.close()
+
+
+def assert_profiles_match(actual, expected, engineers):
+    """
+    Refreshed engineers match the full analysis. The rest keep scores computed against
+    the previous fleet-average time, so only their overall score may be a point off.
+    """
+    pd.testing.assert_frame_equal(actual.loc[engineers], expected.loc[engineers], check_exact=False, rtol=1e-9)
+    others = [eng for eng in expected.index if eng not in engineers]
+    overall = 'Overall_Performance_Score'
+    assert (actual.loc[others, overall] - expected.loc[others, overall]).abs().max() <= 1
+
+
+@pytest.fixture
+def incremental_dbs(tmp_path, monkeypatch):
+    """An analyzed database plus new rows, and a reference database holding both."""
+    new_rows = make_history(n_rows=50, seed=8)
+    new_rows = new_rows[new_rows['Assigned_Engineer_Id'] != 'E4']  # E4 is left untouched
+    base, new_rows = with_job_ids(make_history(seed=7)), with_job_ids(new_rows.reset_index(drop=True), first=2001)
+    full = pd.concat([base, new_rows], ignore_index=True)
+    incremental_path, reference_path = str(tmp_path / 'incremental.db'), str(tmp_path / 'reference.db')
+    create_profile_db(incremental_path, base, full)
+    create_profile_db(reference_path, full, full)
+    analyze(incremental_path, monkeypatch)
+    return incremental_path, reference_path, new_rows
+
+
+def test_incremental_refresh_matches_full_analysis(incremental_dbs, monkeypatch):
+    incremental_path, reference_path, new_rows = incremental_dbs
+    append_history(incremental_path, new_rows)
+
+    refreshed = refresh_profiles_incremental(incremental_path)
+
+    touched = sorted(set(new_rows.loc[new_rows['Status'] == 'Completed', 'Assigned_Engineer_Id'].dropna()))
+    assert refreshed == touched and 'E4' not in touched
+    assert_profiles_match(read_profiles(incremental_path), analyze(reference_path, monkeypatch), touched)
+    conn = sqlite3.connect(incremental_path)
+    watermark = conn.execute(f"SELECT last_rowid, last_key FROM {WATERMARK_TABLE}").fetchone()
+    assert watermark == (conn.execute("SELECT MAX(rowid) FROM job_history").fetchone()[0], '|'.join(new_rows[['Job_ID', 'Task_Id']].iloc[-1]))
+    conn.close()
+
+
+def test_incremental_refresh_without_new_rows_writes_nothing(incremental_dbs):
+    incremental_path = incremental_dbs[0]
+    conn = sqlite3.connect(incremental_path)
+    before = conn.execute(f"SELECT * FROM {WATERMARK_TABLE}").fetchall()
+    profiles = read_profiles(incremental_path)
+
+    assert refresh_profiles_incremental(incremental_path) == []
+
+    assert conn.execute(f"SELECT * FROM {WATERMARK_TABLE}").fetchall() == before
+    conn.close()
+    pd.testing.assert_frame_equal(read_profiles(incremental_path), profiles)
+
+
+def test_replaced_history_table_triggers_a_rebuild(incremental_dbs, tmp_path, monkeypatch, capsys):
+    incremental_path = incremental_dbs[0]
+    replacement = with_job_ids(make_history(seed=9), first=5001)
+    conn = sqlite3.connect(incremental_path)
+    conn.execute("DROP TABLE job_history")
+    replacement.to_sql('job_history', conn, index=False)
+    conn.commit()
+    conn.close()
+    reference_path = str(tmp_path / 'replaced.db')
+    create_profile_db(reference_path, replacement, replacement)
+
+    refreshed = refresh_profiles_incremental(incremental_path)
+
+    assert 'rebuilding aggregates' in capsys.readouterr().out
+    assert refreshed == ENGINEERS
+    assert_profiles_match(read_profiles(incremental_path), analyze(reference_path, monkeypatch), ENGINEERS)
@@ -0,0 +1,111 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from core.db_setup import migrate_database
+from core.feature_store import FEATURE_TABLE, SQL_CREATE_FEATURE_TABLE, get_job_features, record_outcome
+from core.job_assigner import score_candidates_batch
+
+PAST_PERFORMANCE = [
+    ('E1', 'Brake Service', 'Ford', 'Focus', 5.0),
+    ('E1', 'Brake Service', 'Ford', 'Fiesta', 4.0),
+    ('E1', 'Oil Change', 'Ford', 'Focus', 2.0),
+    ('E2', 'Brake Service', 'VW', 'Golf', 2.0),
+    ('E2', 'Brake Service', 'VW', 'Polo', None),
+]
+
+
+def create_workshop_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE engineers (engineer_id TEXT PRIMARY KEY, name TEXT, overall_past_job_score REAL);
+        CREATE TABLE engineer_past_performance (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, engineer_id TEXT, job_description_text TEXT,
+            vehicle_make TEXT, vehicle_model TEXT, outcome_score REAL);
+    """)
+    conn.executemany("INSERT INTO engineers VALUES (?, ?, ?)",
+                     [('E1', 'Alice', 3.5), ('E2', 'Bob', 4.5), ('E3', 'Carol', 3.0)])
+    conn.executemany("""
+        INSERT INTO engineer_past_performance
+            (engineer_id, job_description_text, vehicle_make, vehicle_model, outcome_score)
+        VALUES (?, ?, ?, ?, ?)""", PAST_PERFORMANCE)
+    conn.commit()
+    conn.close()
+
+
+class RecordingModel:
+    """Stands in for the pipeline and keeps the feature frame it was asked to score."""
+
+    def predict_proba(self, feature_df):
+        self.feature_df = feature_df.copy()
+        p = feature_df['eng_job_specific_avg_score'].to_numpy() / 5.0
+        return np.column_stack([1 - p, p])
+
+
+@pytest.fixture
+def migrated_db(tmp_path):
+    path = str(tmp_path / 'workshop.db')
+    create_workshop_db(path)
+    assert migrate_database(path)
+    conn = sqlite3.connect(path)
+    yield conn
+    conn.close()
+
+
+def test_migration_seeds_store_from_past_performance(migrated_db):
+    features = get_job_features(migrated_db, ['E1', 'E2', 'E3'], 'Brake Service')
+    assert features == {'E1': (4.5, 2), 'E2': (2.0, 1)}
+
+
+def test_assignment_on_migrated_db_uses_job_averages(migrated_db):
+    job = {'job_description_text': 'Brake Service', 'vehicle_make': 'Ford', 'job_estimated_time': 90}
+    engineers = [{'engineer_id': 'E1', 'overall_past_job_score': 3.5},
+                 {'engineer_id': 'E2', 'overall_past_job_score': 4.5},
+                 {'engineer_id': 'E3', 'overall_past_job_score': 3.0}]
+    model = RecordingModel()
+    ranked, _ = score_candidates_batch(migrated_db, model, job, engineers)
+
+    assert model.feature_df['eng_job_specific_avg_score'].tolist() == [4.5, 2.0, 3.0]
+    assert model.feature_df['eng_job_specific_exp_count'].tolist() == [2, 1, 0]
+    assert [c['engineer_id'] for c in ranked] == ['E1', 'E3', 'E2']
+
+
+def test_new_past_performance_rows_reach_the_store(migrated_db):
+    migrated_db.execute("""
+        INSERT INTO engineer_past_performance
+            (engineer_id, job_description_text, vehicle_make, vehicle_model, outcome_score)
+        VALUES ('E2', 'Brake Service', 'VW', 'Golf', 5.0)""")
+    migrated_db.commit()
+    assert get_job_features(migrated_db, ['E2'], 'Brake Service') == {'E2': (3.5, 2)}
+
+
+def test_read_path_creates_and_seeds_store_on_unmigrated_db(tmp_path):
+    path = str(tmp_path / 'workshop.db')
+    create_workshop_db(path)
+    conn = sqlite3.connect(path)
+    try:
+        assert get_job_features(conn, ['E1'], 'Oil Change') == {'E1': (2.0, 1)}
+        assert conn.execute(f"SELECT COUNT(*) FROM {FEATURE_TABLE}").fetchone()[0] == 3
+        assert not conn.in_transaction
+    finally:
+        conn.close()
+
+
+def test_installing_the_trigger_keeps_recorded_outcomes(tmp_path):
+    path = str(tmp_path / 'workshop.db')
+    create_workshop_db(path)
+    conn = sqlite3.connect(path)
+    try:
+        # The store was created and fed by record_outcome before the trigger existed
+        conn.execute(SQL_CREATE_FEATURE_TABLE)
+        record_outcome(conn, 'E1', 'Oil Change', 4.0)
+        record_outcome(conn, 'E3', 'Oil Change', 5.0)
+        conn.commit()
+
+        expected = {'E1': (3.0, 2), 'E3': (5.0, 1)}
+        assert get_job_features(conn, ['E1', 'E3'], 'Oil Change') == expected
+        assert get_job_features(conn, ['E1', 'E3'], 'Oil Change') == expected
+        assert get_job_features(conn, ['E1'], 'Brake Service') == {'E1': (4.5, 2)}
+    finally:
+        conn.close()
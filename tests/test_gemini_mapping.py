@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+import gemini_mapping
+from gemini_mapping import LocalServiceMatcher, MappingMetrics, ResponseCache
+
+
+class StubLLM:
+    """Stands in for call_gemini: records prompts and answers with a fixed text (or raises it)."""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.prompts = []
+
+    def __call__(self, prompt):
+        self.prompts.append(prompt)
+        if isinstance(self.answer, Exception):
+            raise self.answer
+        return self.answer
+
+
+@pytest.fixture(autouse=True)
+def isolated_mapping(tmp_path, monkeypatch):
+    monkeypatch.setattr(gemini_mapping, '_cache', ResponseCache(db_path=str(tmp_path / 'llm_cache.db')))
+    monkeypatch.setattr(gemini_mapping, 'metrics', MappingMetrics())
+
+
+def test_cache_miss_asks_the_llm_and_caches_the_answer():
+    llm = StubLLM("['Brake Inspection', 'Not A Service']")
+
+    assert gemini_mapping.get_matching_services("Brakes squeal", llm_call=llm) == ['Brake Inspection']
+    assert len(llm.prompts) == 1
+    assert 'Brakes squeal' in llm.prompts[0]
+    assert gemini_mapping.get_cache().get('brakes squeal') == ['Brake Inspection']
+
+
+def test_cache_hit_skips_the_llm():
+    gemini_mapping.get_cache().put('brakes squeal', ['Brake Inspection'])
+    llm = StubLLM("['Oil Change']")
+
+    # Same complaint after normalization: case and punctuation do not matter
+    assert gemini_mapping.get_matching_services("  BRAKES squeal!! ", llm_call=llm) == ['Brake Inspection']
+    assert llm.prompts == []
+    stats = gemini_mapping.get_mapping_metrics()
+    assert stats['cache_hits'] == 1 and stats['llm_calls'] == 0
+
+
+@pytest.mark.parametrize('answer', [RuntimeError('quota exceeded'), 'Sorry, I cannot help with that.'])
+def test_llm_failure_falls_back_to_tfidf(answer):
+    description = "brakes squeeling when stopping"
+    llm = StubLLM(answer)
+
+    services = gemini_mapping.get_matching_services(description, llm_call=llm)
+
+    assert services == LocalServiceMatcher().match(description)
+    assert 'Brake Inspection' in services
+    stats = gemini_mapping.get_mapping_metrics()
+    assert stats['llm_failures'] == 1 and stats['fallbacks'] == 1
+    assert gemini_mapping.get_cache().get(gemini_mapping.normalize_description(description)) is None
+
+
+def test_slow_llm_falls_back_and_fills_the_cache_later():
+    release = threading.Event()
+    done = threading.Event()
+
+    def slow_llm(prompt):
+        release.wait(5)
+        done.set()
+        return "['Battery Check']"
+
+    services = gemini_mapping.get_matching_services("car won't start", llm_call=slow_llm, wait_seconds=0.05)
+    assert services == LocalServiceMatcher().match("car won't start")
+
+    release.set()
+    assert done.wait(5)
+    for _ in range(100):  # The answer is cached by the background call once it returns
+        if gemini_mapping.get_cache().get("car won't start") is not None:
+            break
+        time.sleep(0.01)
+    assert gemini_mapping.get_cache().get("car won't start") == ['Battery Check']
+
+
+def test_batch_dedupes_uses_cache_and_sends_one_prompt():
+    gemini_mapping.get_cache().put('brakes squeal', ['Brake Inspection'])
+    llm = StubLLM('{"1": ["Oil Change"], "2": ["Battery Check"]}')
+    descriptions = ["Oil light on", "oil light on!", "Battery dead", "Brakes squeal"]
+
+    results = gemini_mapping.get_matching_services_batch(descriptions, llm_call=llm)
+
+    assert results == [['Oil Change'], ['Oil Change'], ['Battery Check'], ['Brake Inspection']]
+    assert len(llm.prompts) == 1
+    assert '1. Oil light on' in llm.prompts[0] and '2. Battery dead' in llm.prompts[0]
+    assert 'Brakes squeal' not in llm.prompts[0]
+    assert gemini_mapping.get_cache().get('battery dead') == ['Battery Check']
+
+
+def test_batch_falls_back_for_unanswered_and_failed_chunks():
+    partial = StubLLM('{"1": ["Oil Change"]}')
+    results = gemini_mapping.get_matching_services_batch(["oil light on", "brakes grinding"], llm_call=partial)
+    assert results == [['Oil Change'], LocalServiceMatcher().match("brakes grinding")]
+
+    failing = StubLLM(RuntimeError('service unavailable'))
+    results = gemini_mapping.get_matching_services_batch(["battery flat", "tyre puncture"], llm_call=failing, chunk_size=1)
+    matcher = LocalServiceMatcher()
+    assert results == [matcher.match("battery flat"), matcher.match("tyre puncture")]
+    assert len(failing.prompts) == 2
+    assert gemini_mapping.get_mapping_metrics()['fallbacks'] == 3
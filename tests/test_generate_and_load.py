@@ -0,0 +1,34 @@
+import sqlite3
+
+from core.db_setup import migrate_database
+from generate_and_load import iter_history_shards, next_job_number, stream_history_to_sqlite
+
+
+def test_next_job_number_on_empty_and_missing_history(tmp_path):
+    path = str(tmp_path / 'workshop.db')
+    assert next_job_number(path) == 1001
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE job_history (Job_ID TEXT, Task_Id TEXT)")
+    conn.executemany("INSERT INTO job_history VALUES (?, 'T1')", [('JOB1005',), ('JOB998',), ('MANUAL-7',)])
+    conn.commit()
+    conn.close()
+    assert next_job_number(path) == 1006
+
+
+def test_append_continues_job_numbers_on_migrated_database(tmp_path):
+    path = str(tmp_path / 'workshop.db')
+    stream_history_to_sqlite(iter_history_shards(300, seed=1, workers=1), path)
+    assert migrate_database(path)  # Adds the unique (Job_ID, Task_Id) key
+
+    first_job_number = next_job_number(path)
+    stream_history_to_sqlite(iter_history_shards(300, seed=1, workers=1, first_job_number=first_job_number),
+                             path, append=True)
+
+    conn = sqlite3.connect(path)
+    try:
+        rows, keys = conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT Job_ID || '|' || Task_Id) FROM job_history").fetchone()
+        assert rows == keys == 600
+        assert conn.execute("SELECT MIN(Job_ID) FROM job_history WHERE rowid > 300").fetchone()[0] == f'JOB{first_job_number}'
+    finally:
+        conn.close()
@@ -0,0 +1,125 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import job_manager
+from core.task_scheduler import TaskScheduler
+
+JOB_CARD = [
+    ('J1', 'Brake Service', 'T1', 'High', 'Ford', 60),
+    ('J2', 'Oil Change', 'T2', 'Low', 'VW', 30),
+]
+
+
+class AverageScoreModel:
+    """Success probability = job-specific average score / 5, so the expected matrix is known."""
+
+    def predict_proba(self, feature_df):
+        p = feature_df['eng_job_specific_avg_score'].to_numpy(dtype=float) / 5.0
+        return np.column_stack([1 - p, p])
+
+
+@pytest.fixture
+def workshop_db(tmp_path, monkeypatch):
+    path = str(tmp_path / 'workshop.db')
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE job_card (Job_Id TEXT, Job_Name TEXT, Task_Id TEXT NOT NULL, Task_Description TEXT,
+                               Status TEXT, Date_Created DATE, Urgency TEXT, Make TEXT, Engineer_Id TEXT,
+                               Time_Started DATETIME, Estimated_Standard_Time INTEGER, Outcome_Score INTEGER);
+        CREATE TABLE engineer_profiles (Engineer_ID TEXT PRIMARY KEY, Availability TEXT,
+                                        Overall_Performance_Score REAL);
+        CREATE TABLE engineer_past_performance (engineer_id TEXT, job_description_text TEXT,
+                                                vehicle_make TEXT, outcome_score REAL);
+    """)
+    conn.executemany("""
+        INSERT INTO job_card (Job_Id, Job_Name, Task_Id, Urgency, Make, Estimated_Standard_Time, Status)
+        VALUES (?, ?, ?, ?, ?, ?, 'Pending')""", JOB_CARD)
+    conn.executemany("INSERT INTO engineer_profiles VALUES (?, 'Yes', ?)", [('E1', 3.0), ('E2', 2.0)])
+    conn.executemany("INSERT INTO engineer_past_performance VALUES (?, ?, 'Ford', ?)",
+                     [('E1', 'Brake Service', 4.0), ('E2', 'Oil Change', 5.0)])
+    conn.commit()
+    monkeypatch.setattr(job_manager, 'DB_PATH', path)
+    monkeypatch.setattr(job_manager, 'load_scorer', lambda: AverageScoreModel())
+    yield conn
+    conn.close()
+
+
+def test_batch_assignment_maximises_success_probability(workshop_db):
+    report = job_manager.assign_engineers_to_pending_jobs_batch()
+
+    assert report['score_source'] == 'success_model'
+    assert sorted(report['assignments']) == [('E1', 'J1', 'T1'), ('E2', 'J2', 'T2')]
+    assert report['total_score'] == pytest.approx(4.0 / 5 + 5.0 / 5)
+    assert workshop_db.execute("SELECT COUNT(*) FROM engineer_profiles WHERE Availability = 'No'").fetchone()[0] == 2
+
+
+def test_batch_assignment_skips_tasks_claimed_meanwhile(workshop_db, monkeypatch):
+    stale_jobs = pd.read_sql("SELECT * FROM job_card WHERE Engineer_Id IS NULL", workshop_db)
+    workshop_db.execute("UPDATE job_card SET Engineer_Id = 'E9', Status = 'Assigned' WHERE Job_Id = 'J1'")
+    workshop_db.commit()
+    monkeypatch.setattr(job_manager, 'fetch_unassigned_jobs', lambda: stale_jobs)
+
+    report = job_manager.assign_engineers_to_pending_jobs_batch()
+
+    assert report['conflicts'] == 1
+    assert report['assignments'] == [('E2', 'J2', 'T2')]
+    availability = dict(workshop_db.execute("SELECT Engineer_ID, Availability FROM engineer_profiles"))
+    assert availability == {'E1': 'Yes', 'E2': 'No'}
+
+
+def test_complete_task_commits_even_when_follow_ups_fail(workshop_db, monkeypatch):
+    workshop_db.execute("""
+        INSERT INTO job_card (Job_Id, Job_Name, Task_Id, Urgency, Make, Estimated_Standard_Time, Status)
+        VALUES ('J3', 'Brake Service', 'T1', 'Low', 'Ford', 45, 'Pending')""")
+    workshop_db.execute("""
+        UPDATE job_card SET Engineer_Id = 'E1', Status = 'In Progress', Time_Started = 'yesterday-ish'
+        WHERE Task_Id = 'T1'""")
+    workshop_db.execute("UPDATE engineer_profiles SET Availability = 'No' WHERE Engineer_ID = 'E1'")
+    workshop_db.commit()
+
+    recorded, dispatched = [], []
+
+    def failing_recommender(*args):
+        recorded.append(args)
+        raise RuntimeError('recommender unavailable')
+
+    monkeypatch.setattr(job_manager, 'record_task_outcome', failing_recommender)
+    monkeypatch.setattr(job_manager, 'dispatch_next_task', dispatched.append)
+    monkeypatch.setattr(job_manager, '_scheduler', TaskScheduler())
+    monkeypatch.setattr(job_manager, 'MAPPING_EXCEL_PATH', None)
+
+    assert job_manager.complete_task('T1', 5, job_id='J1') == 1
+
+    statuses = dict(workshop_db.execute("SELECT Job_Id, Status FROM job_card WHERE Task_Id = 'T1'"))
+    assert statuses == {'J1': 'Completed', 'J3': 'In Progress'}
+    assert workshop_db.execute("SELECT Availability FROM engineer_profiles WHERE Engineer_ID = 'E1'").fetchone() == ('Yes',)
+    # The malformed Time_Started falls back to the standard time
+    assert recorded == [('T1', 'E1', 5, 60, 60, 'High')]
+    assert workshop_db.execute("""
+        SELECT score_sum, score_count FROM engineer_job_features
+        WHERE engineer_id = 'E1' AND job_type = 'Brake Service'""").fetchone() == (9.0, 2)
+    assert dispatched == ['E1']
+
+
+def test_minutes_since_falls_back_on_bad_timestamps():
+    assert job_manager.minutes_since(None, 30) == 30
+    assert job_manager.minutes_since('not a date', 30) == 30
+    assert job_manager.minutes_since('2020-01-01T10:00:00+00:00', 30) == 30
+    assert job_manager.minutes_since('2020-01-01 10:00:00', 30) > 60
+
+
+def test_batch_assignment_does_not_double_book_an_engineer(workshop_db, monkeypatch):
+    stale_engineers = pd.read_sql("SELECT * FROM engineer_profiles WHERE Availability = 'Yes'", workshop_db)
+    # /tasks/assign books E1 between scoring and the batch commit
+    workshop_db.execute("UPDATE engineer_profiles SET Availability = 'No' WHERE Engineer_ID = 'E1'")
+    workshop_db.commit()
+    monkeypatch.setattr(job_manager, 'fetch_available_engineers', lambda: stale_engineers)
+
+    report = job_manager.assign_engineers_to_pending_jobs_batch()
+
+    assert report['conflicts'] == 1
+    assert report['assignments'] == [('E2', 'J2', 'T2')]
+    assert workshop_db.execute("SELECT Engineer_Id FROM job_card WHERE Job_Id = 'J1'").fetchone() == (None,)
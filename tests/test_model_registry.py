@@ -0,0 +1,33 @@
+import joblib
+
+from core.compiled_scorer import LinearScorer
+from core.model_registry import get_model_registry
+
+
+def read_text(path):
+    with open(path) as f:
+        return f.read()
+
+
+def read_length(path):
+    return len(read_text(path))
+
+
+def test_each_loader_gets_its_own_registry(tmp_path):
+    model_path = str(tmp_path / 'model.txt')
+    with open(model_path, 'w') as f:
+        f.write('weights')
+
+    text_registry = get_model_registry(model_path, read_text)
+    length_registry = get_model_registry(model_path, read_length)
+
+    assert text_registry is not length_registry
+    assert text_registry.get() == 'weights'
+    assert length_registry.get() == len('weights')
+
+
+def test_same_path_and_loader_share_a_registry(tmp_path):
+    model_path = str(tmp_path / 'model.joblib')
+    assert get_model_registry(model_path) is get_model_registry(model_path, joblib.load)
+    assert get_model_registry(model_path, LinearScorer.load) is get_model_registry(model_path, LinearScorer.load)
+    assert get_model_registry(model_path) is not get_model_registry(model_path, LinearScorer.load)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+
+from core.model_search import LATENCY_BUDGET_US, search_model_family, select_candidate, serving_cost
+from core.predictive_model import preprocess_data
+
+
+def result(name, auc, total_us):
+    return {'name': name, 'auc_mean': auc, 'total_us': total_us}
+
+
+def test_best_auc_within_budget_is_selected():
+    results = [result('slow but best', 0.90, 500.0), result('fast', 0.80, 20.0),
+               result('fastest', 0.78, 10.0), result('good', 0.85, 90.0)]
+    assert select_candidate(results, budget_us=100)['name'] == 'good'
+
+
+def test_auc_decides_when_nothing_fits_the_budget():
+    results = [result('fastest', 0.80, 300.0), result('best', 0.85, 420.0)]
+    assert select_candidate(results, budget_us=100)['name'] == 'best'
+
+
+def test_serving_cost_prefers_the_compiled_scorer():
+    compiled = serving_cost({'inference_us': 30.0, 'compiled_us': 12.0}, transform_us=400.0)
+    pipeline = serving_cost({'inference_us': 30.0, 'compiled_us': None}, transform_us=400.0)
+    assert (compiled['served_as'], compiled['total_us']) == ('compiled', 12.0)
+    assert (pipeline['served_as'], pipeline['total_us']) == ('pipeline', 430.0)
+
+
+def synthetic_training_frame(n_rows=600, seed=0):
+    rng = np.random.default_rng(seed)
+    skill = rng.normal(size=n_rows)
+    return pd.DataFrame({
+        'engineer_id': rng.choice(['E1', 'E2', 'E3', 'E4'], n_rows),
+        'job_description_text': rng.choice(['Basic Service', 'Full Service'], n_rows),
+        'vehicle_make': rng.choice(['Ford', 'VW'], n_rows),
+        'vehicle_model': 'Focus',
+        'outcome_score': np.clip(np.round(3 + skill + rng.normal(0, 1, n_rows)), 1, 5),
+        'engineer_general_score': 3 + skill,
+        'job_estimated_time': rng.integers(30, 200, n_rows).astype(float),
+        'history_order': np.arange(n_rows),
+    })
+
+
+def test_search_charges_linear_candidates_the_compiled_cost():
+    X, y, preprocessor = preprocess_data(synthetic_training_frame(), verbose=False)
+    candidates = [('logistic', LogisticRegression(solver='liblinear', C=1.0)),
+                  ('boosting', HistGradientBoostingClassifier(max_iter=20, random_state=0))]
+
+    best, results = search_model_family(X, y, preprocessor, candidates=candidates, workers=1, n_folds=3)
+
+    served_as = {r['name']: r['served_as'] for r in results}
+    assert served_as == {'logistic': 'compiled', 'boosting': 'pipeline'}
+    assert type(best) is type(dict(candidates)[select_candidate(results, LATENCY_BUDGET_US)['name']])
@@ -0,0 +1,93 @@
+import os
+import sqlite3
+
+from recommender import RecommenderEngine
+
+HISTORY = [
+    ('T1', 'E1', 'Completed', 4.0, 50, 60, 'High'),
+    ('T1', 'E2', 'Completed', 3.0, 70, 60, 'Normal'),
+    ('T2', 'E1', 'Completed', 5.0, 30, 45, 'Low'),
+]
+
+
+def insert_history(conn, rows):
+    conn.executemany("""
+        INSERT INTO job_history (Task_Id, Assigned_Engineer_Id, Status, Outcome_Score,
+                                 Time_Taken_minutes, Estimated_Standard_Time, Urgency)
+        VALUES (?, ?, ?, ?, ?, ?, ?)""", rows)
+    conn.commit()
+
+
+def create_history_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("""
+        CREATE TABLE job_history (
+            Job_Id INTEGER PRIMARY KEY AUTOINCREMENT, Task_Id TEXT, Assigned_Engineer_Id TEXT,
+            Status TEXT, Outcome_Score REAL, Time_Taken_minutes REAL,
+            Estimated_Standard_Time REAL, Urgency TEXT)""")
+    insert_history(conn, HISTORY)
+    return conn
+
+
+def build_engine(db_path, snapshot_path):
+    engine = RecommenderEngine(db_path=db_path, snapshot_path=snapshot_path)
+    engine._ensure_built()
+    return engine
+
+
+def test_snapshot_is_reused_while_history_is_unchanged(tmp_path):
+    db_path, snapshot_path = str(tmp_path / 'history.db'), str(tmp_path / 'snapshot.npz')
+    conn = create_history_db(db_path)
+    try:
+        build_engine(db_path, snapshot_path)
+        conn.execute("CREATE TABLE unrelated (x)")
+        conn.execute("INSERT INTO unrelated VALUES (1)")
+        conn.commit()
+        stamp = RecommenderEngine(db_path=db_path, snapshot_path=snapshot_path)._source_stamp()
+        engine = RecommenderEngine(db_path=db_path, snapshot_path=snapshot_path)
+        assert engine._load_snapshot(stamp)
+    finally:
+        conn.close()
+
+
+def test_snapshot_is_rebuilt_after_wal_insert(tmp_path):
+    db_path, snapshot_path = str(tmp_path / 'history.db'), str(tmp_path / 'snapshot.npz')
+    conn = create_history_db(db_path)
+    try:
+        assert not build_engine(db_path, snapshot_path).has_task('T3')
+        # Left in the -wal file: the main database file is not touched until a checkpoint
+        conn.execute("PRAGMA wal_autocheckpoint = 0")
+        insert_history(conn, [('T3', 'E2', 'Completed', 4.0, 20, 30, 'High')])
+        assert build_engine(db_path, snapshot_path).has_task('T3')
+    finally:
+        conn.close()
+
+
+def test_snapshot_is_rebuilt_after_in_place_rewrite(tmp_path, capsys):
+    db_path, snapshot_path = str(tmp_path / 'history.db'), str(tmp_path / 'snapshot.npz')
+    conn = create_history_db(db_path)
+    try:
+        build_engine(db_path, snapshot_path)
+        # A corrected re-ingest rewrites scores and times without adding rows
+        conn.execute("UPDATE job_history SET Outcome_Score = 1.0, Time_Taken_minutes = 90 WHERE Task_Id = 'T2'")
+        conn.commit()
+        engine = RecommenderEngine(db_path=db_path, snapshot_path=snapshot_path)
+        assert not engine._load_snapshot(engine._source_stamp())
+        capsys.readouterr()
+        build_engine(db_path, snapshot_path)
+        assert 'Recommender built from' in capsys.readouterr().out
+    finally:
+        conn.close()
+
+
+def test_each_database_gets_its_own_snapshot_file(tmp_path):
+    first, second = str(tmp_path / 'a' / 'workshop.db'), str(tmp_path / 'b' / 'workshop.db')
+    snapshot_dir = tmp_path / 'snapshots'
+    snapshot_dir.mkdir()
+    first_engine = RecommenderEngine(db_path=first, snapshot_path=str(snapshot_dir))
+    second_engine = RecommenderEngine(db_path=second, snapshot_path=str(snapshot_dir))
+
+    assert first_engine.snapshot_path != second_engine.snapshot_path
+    assert os.path.dirname(first_engine.snapshot_path) == str(snapshot_dir)
+    assert os.path.isabs(RecommenderEngine(db_path='workshop.db').snapshot_path)
@@ -0,0 +1,22 @@
+# In utils/helpers.py
+
+COLUMN_MAPPING = {
+    # Standard Name : [Possible Variation 1, Possible Variation 2, etc.]
+    'Engineer_Id': ['Assigned_Engineer_Id', 'engineer_id', 'Engineer ID', 'Engineer Id'],
+    'Time_Taken_minutes': ['Time_Taken_minutes', 'Time Taken minutes', 'Time Taken (minutes)'],
+    'Outcome_Score': ['Outcome_Score', 'Outcome Score'],
+    'Job_Name': ['Job_Name', 'Job Name'],
+    'Task_to_be_done': ['Task_to_be_done', 'Task to be done', 'Task Description', 'Task']
+}
+
+def standardize_columns(df, mapping=COLUMN_MAPPING):
+    """Renames DataFrame columns based on a mapping of possible names."""
+    df.columns = [str(col).strip() for col in df.columns] # Remove leading/trailing spaces
+    rename_dict = {}
+    for standard_name, possible_names in mapping.items():
+        for possible_name in possible_names:
+            if possible_name in df.columns:
+                rename_dict[possible_name] = standard_name
+                break # Move to the next standard name once a match is found
+    df.rename(columns=rename_dict, inplace=True)
+    return df